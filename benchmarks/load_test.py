@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+End-to-end HTTP load benchmark for the FastAPI and Flask variants.
+
+Generates each framework variant from this template, serves it with
+gunicorn (the production entrypoint) against local stand-ins for its
+backing services - SQLite (or the in-memory repository) for the database
+and an in-process fakeredis server for the cache - and drives the /api/v1/items CRUD endpoints at a
+fixed concurrency. Throughput and latency percentiles are printed as
+JSON, tagged with the current commit, so runs can be compared across
+commits.
+
+Run from the cookiecutter-microservice directory:
+
+    python benchmarks/load_test.py --output bench.json
+    python benchmarks/load_test.py --framework flask --concurrency 32 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent
+FRAMEWORKS = ("fastapi", "flask")
+OPERATIONS = ("create", "get", "update", "list", "delete")
+APP_TARGETS = {"fastapi": "src.app_fastapi:app", "flask": "src.app_flask:app"}
+
+
+def free_port() -> int:
+    """Get a TCP port that is free right now on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    values = sorted(latencies)
+    return {
+        "p50": round(percentile(values, 0.50) * 1000, 3),
+        "p95": round(percentile(values, 0.95) * 1000, 3),
+        "p99": round(percentile(values, 0.99) * 1000, 3),
+        "mean": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "max": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def git_revision() -> Dict[str, Optional[str]]:
+    """Get the commit being benchmarked and whether the tree has local changes."""
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=TEMPLATE_DIR, check=True, capture_output=True, text=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+def start_fake_redis() -> Tuple[object, int]:
+    """Serve an in-memory Redis stand-in on a free port from a daemon thread."""
+    from fakeredis import TcpFakeServer
+
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-redis", daemon=True).start()
+    return server, port
+
+
+def generate_project(framework: str, cache_type: str, output_dir: Path, context: List[str]) -> Path:
+    """Generate one framework variant and return its project directory.
+
+    Everything the harness relies on is pinned rather than left to the
+    template defaults: no queue (/ready would wait on a broker), no
+    worker, and the project name the returned path assumes. --context
+    values come last, so they can still override these.
+    """
+    cmd = [
+        "cookiecutter",
+        str(TEMPLATE_DIR),
+        "--no-input",
+        "--output-dir", str(output_dir),
+        "project_name=my-microservice",
+        f"web_framework={framework}",
+        "database_type=postgresql",
+        f"cache_type={cache_type}",
+        "queue_type=none",
+        "use_async_workers=no",
+        "enable_metrics=yes",
+        "enable_tracing=yes",
+        *context,
+    ]
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    return output_dir / "my-microservice"
+
+
+class Server:
+    """A generated project served by gunicorn in a child process."""
+
+    def __init__(self, project_dir: Path, framework: str, env: Dict[str, str], log_path: Path):
+        """Initialize server."""
+        self.project_dir = project_dir
+        self.framework = framework
+        self.env = env
+        self.log_path = log_path
+        self.port = int(env["PORT"])
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 60.0) -> None:
+        """Start gunicorn and wait until /ready answers 200."""
+        log = open(self.log_path, "w")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", APP_TARGETS[self.framework]],
+            cwd=self.project_dir,
+            env=self.env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        log.close()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if httpx.get(f"{self.base_url}/ready", timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        # The log may live in a temporary directory, so include its tail
+        tail = "".join(self.log_path.read_text().splitlines(keepends=True)[-20:])
+        raise RuntimeError(f"{self.framework} server did not become ready; last log lines:\n{tail}")
+
+    def stop(self) -> None:
+        """Stop gunicorn, killing it if it does not exit in time."""
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class LoadGenerator:
+    """Virtual users looping over create, get, update, list and delete."""
+
+    def __init__(self, base_url: str, concurrency: int, page_size: int):
+        """Initialize load generator."""
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.latencies: Dict[str, List[float]] = {op: [] for op in OPERATIONS}
+        self.errors: Dict[str, int] = {op: 0 for op in OPERATIONS}
+        self.recording = False
+
+    async def _call(self, client: httpx.AsyncClient, op: str, method: str, path: str, expected: int, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            ok = response.status_code == expected
+        except httpx.HTTPError:
+            response, ok = None, False
+        elapsed = time.perf_counter() - start
+        if self.recording:
+            if ok:
+                self.latencies[op].append(elapsed)
+            else:
+                self.errors[op] += 1
+        return response if ok else None
+
+    async def _user(self, client: httpx.AsyncClient, user: int, stop_at: float) -> None:
+        iteration = 0
+        while time.monotonic() < stop_at:
+            iteration += 1
+            payload = {"name": f"bench-{user}-{iteration}", "description": "load test item", "price": 9.99}
+            created = await self._call(client, "create", "POST", "/api/v1/items", 201, json=payload)
+            if created is None:
+                continue
+            path = f"/api/v1/items/{created.json()['id']}"
+            await self._call(client, "get", "GET", path, 200)
+            await self._call(client, "update", "PUT", path, 200, json={**payload, "price": 19.99})
+            await self._call(client, "list", "GET", "/api/v1/items", 200, params={"limit": self.page_size})
+            await self._call(client, "delete", "DELETE", path, 204)
+
+    async def seed(self, count: int) -> None:
+        """Create items that stay for the whole run, so list pages are full."""
+        limits = httpx.Limits(max_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=30.0) as client:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def create(index: int) -> None:
+                async with semaphore:
+                    payload = {"name": f"seed-{index}", "price": 1.0 + index % 100}
+                    response = await client.post("/api/v1/items", json=payload)
+                    response.raise_for_status()
+
+            await asyncio.gather(*(create(index) for index in range(count)))
+
+    async def run(self, warmup: float, duration: float) -> float:
+        """Run warmup then the measured phase; return the measured wall time."""
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=30.0) as client:
+            if warmup > 0:
+                stop_at = time.monotonic() + warmup
+                await asyncio.gather(*(self._user(client, user, stop_at) for user in range(self.concurrency)))
+            self.recording = True
+            start = time.monotonic()
+            stop_at = start + duration
+            await asyncio.gather(*(self._user(client, user, stop_at) for user in range(self.concurrency)))
+            # Users finish their in-flight iteration, so measure the real elapsed time
+            return time.monotonic() - start
+
+    def report(self, elapsed: float) -> Dict[str, object]:
+        all_latencies = [value for op in OPERATIONS for value in self.latencies[op]]
+        requests = len(all_latencies)
+        return {
+            "requests": requests,
+            "errors": sum(self.errors.values()),
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": summarize(all_latencies),
+            "operations": {
+                op: {
+                    "requests": len(self.latencies[op]),
+                    "errors": self.errors[op],
+                    "throughput_rps": round(len(self.latencies[op]) / elapsed, 2) if elapsed else 0.0,
+                    "latency_ms": summarize(self.latencies[op]),
+                }
+                for op in OPERATIONS
+            },
+        }
+
+
+def server_env(args: argparse.Namespace, workdir: Path, cache_port: Optional[int]) -> Dict[str, str]:
+    """Environment for the server: local stand-ins and quiet, export-free telemetry."""
+    env = dict(os.environ)
+    env.update({
+        "HOST": "127.0.0.1",
+        "PORT": str(free_port()),
+        "WEB_CONCURRENCY": str(args.workers),
+        "GUNICORN_THREADS": str(args.threads),
+        "DB_URL": f"sqlite+aiosqlite:///{workdir / 'bench.db'}",
+        "CACHE_TYPE": "redis" if cache_port else "none",
+        "CACHE_HOST": "127.0.0.1",
+        "CACHE_PORT": str(cache_port or 6379),
+        "LOG_LEVEL": "WARNING",
+        "TRACING_EXPORTER": "none",
+        "PROMETHEUS_MULTIPROC_DIR": str(workdir / "metrics"),
+    })
+    if args.database == "memory":
+        env["DB_TYPE"] = "memory"
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def benchmark(framework: str, args: argparse.Namespace) -> Dict[str, object]:
+    """Generate, serve and load one framework variant.
+
+    Each variant gets its own fakeredis, so no run starts on cache entries
+    (or a list generation) left behind by the one before.
+    """
+    cache_server, cache_port = (None, None) if args.no_cache else start_fake_redis()
+    try:
+        return _benchmark(framework, args, cache_port)
+    finally:
+        if cache_server is not None:
+            cache_server.shutdown()
+            cache_server.server_close()
+
+
+def _benchmark(framework: str, args: argparse.Namespace, cache_port: Optional[int]) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory(prefix=f"bench-{framework}-") as tmpdir:
+        workdir = Path(tmpdir)
+        print(f"🧪 Generating {framework} variant in {workdir}", file=sys.stderr)
+        project_dir = generate_project(framework, "redis" if cache_port else "none", workdir, args.context)
+        log_path = Path(args.log_dir or workdir) / f"{framework}-server.log"
+        server = Server(project_dir, framework, server_env(args, workdir, cache_port), log_path)
+        server.start()
+        try:
+            generator = LoadGenerator(server.base_url, args.concurrency, args.page_size)
+            asyncio.run(generator.seed(args.seed_items))
+            print(
+                f"🚀 Loading {framework}: {args.concurrency} users, "
+                f"{args.warmup}s warmup + {args.duration}s measured",
+                file=sys.stderr,
+            )
+            elapsed = asyncio.run(generator.run(args.warmup, args.duration))
+        finally:
+            server.stop()
+        result = generator.report(elapsed)
+        print(
+            f"✅ {framework}: {result['throughput_rps']} req/s, "
+            f"p50 {result['latency_ms']['p50']}ms, p99 {result['latency_ms']['p99']}ms, "
+            f"{result['errors']} errors",
+            file=sys.stderr,
+        )
+        return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--framework", choices=FRAMEWORKS, action="append",
+                        help="Framework to benchmark (repeatable; default: both)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per framework")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--workers", type=int, default=1, help="Gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="Threads per gthread worker (Flask)")
+    parser.add_argument("--seed-items", type=int, default=200, help="Items created before the run")
+    parser.add_argument("--page-size", type=int, default=20, help="limit used for list requests")
+    parser.add_argument("--no-cache", action="store_true", help="Run with CACHE_TYPE=none")
+    parser.add_argument("--database", choices=("sqlite", "memory"), default="sqlite",
+                        help="SQLite file, or the in-memory repository (DB_TYPE=memory) for a run without database I/O")
+    parser.add_argument("--context", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra cookiecutter context for the generated variants")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the servers, e.g. LOG_LEVEL=INFO")
+    parser.add_argument("--log-dir", help="Keep server logs here instead of discarding them")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if shutil.which("cookiecutter") is None:
+        print("❌ cookiecutter is not installed (pip install -r benchmarks/requirements.txt)", file=sys.stderr)
+        return 1
+    if args.log_dir:
+        Path(args.log_dir).mkdir(parents=True, exist_ok=True)
+
+    report: Dict[str, object] = {
+        **git_revision(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "workers": args.workers,
+            "threads": args.threads,
+            "seed_items": args.seed_items,
+            "page_size": args.page_size,
+            "cache": "none" if args.no_cache else "fakeredis",
+            "database": args.database,
+            "context": args.context,
+            "env": args.env,
+        },
+        "results": {},
+    }
+    try:
+        for framework in args.framework or FRAMEWORKS:
+            report["results"][framework] = benchmark(framework, args)
+    except (RuntimeError, subprocess.CalledProcessError) as e:
+        print(f"❌ Benchmark failed: {e}", file=sys.stderr)
+        return 1
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
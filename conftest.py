@@ -0,0 +1,2 @@
+# Tests under the project template only run in a generated project
+collect_ignore_glob = ["{{cookiecutter.project_slug}}/*"]
@@ -60,6 +60,9 @@ def main():
     # Clean up queue files
     if queue_type == "none" or use_async_workers == "no":
         remove_file("src/worker.py")
+        remove_file("src/handlers.py")
+        remove_file("src/utils/consumer.py")
+        remove_file("src/tests/unit/test_consumer.py")
         remove_file("k8s/worker-deployment.yaml")
         print("✓ No worker configured")
     else:
@@ -0,0 +1 @@
+"""Micro-benchmarks for per-request hot paths."""
@@ -0,0 +1,296 @@
+"""Micro-benchmarks for the code every request runs, with regression gating.
+
+Each benchmark times one small hot path in isolation. Results are compared
+with a stored baseline, and the run fails when any benchmark is more than
+--threshold percent slower than its baseline. Baselines are only
+comparable on the same machine and Python version, so record them where
+the comparison runs (e.g. on the CI runner).
+
+Usage (from the project root):
+    python -m benchmarks.micro                  # run and compare with benchmarks/baseline.json
+    python -m benchmarks.micro --save           # run and store the results as the new baseline
+    python -m benchmarks.micro -k item --threshold 15
+"""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import time
+import uuid
+
+from src.classes.models.entities import Item
+from src.classes.models.schemas import ItemCreate
+from src.classes.services.item_service import ItemService
+from src.utils.logging import JSONFormatter
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+# A benchmark's setup returns a function that runs the hot path n times
+Setup = Callable[[], Callable[[int], Any]]
+
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    """Register a benchmark setup function under name."""
+    def decorator(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+def make_rows(count: int) -> List[Any]:
+    """Build item rows as the repository returns them."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        Item(
+            id=str(uuid.uuid4()),
+            name=f"item-{index}",
+            description="A benchmark item",
+            price=1.0 + index,
+            is_active=index % 10 != 0,
+            created_at=start + timedelta(seconds=index),
+            updated_at=start + timedelta(seconds=index),
+        )
+        for index in range(count)
+    ]
+
+
+@benchmark("logging.json_formatter")
+def bench_json_formatter():
+    formatter = JSONFormatter()
+    record = logging.LogRecord("src.api", logging.INFO, __file__, 1, "Handled %s %s", ("GET", "/api/v1/items"), None)
+    record.extra = {"status": 200, "duration_ms": 1.234, "request_id": str(uuid.uuid4())}
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            formatter.format(record)
+    return run
+
+
+def _bench_rows_to_responses(count: int) -> Setup:
+    def setup():
+        service = ItemService(repository=None)
+        rows = make_rows(count)
+
+        def run(n: int) -> None:
+            for _ in range(n):
+                service._to_responses(rows)
+        return run
+    return setup
+
+
+for _count in (100, 1000):
+    benchmark(f"item_service.to_responses[{_count}]")(_bench_rows_to_responses(_count))
+
+
+@benchmark("schemas.item_create_validate")
+def bench_item_create_validate():
+    payload = {"name": "Widget", "description": "A benchmark item", "price": 9.99, "is_active": True}
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            ItemCreate.model_validate(payload)
+    return run
+
+
+@benchmark("schemas.item_create_validate_json")
+def bench_item_create_validate_json():
+    body = json.dumps({"name": "Widget", "description": "A benchmark item", "price": 9.99}).encode()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            ItemCreate.model_validate_json(body)
+    return run
+{%- if cookiecutter.web_framework == 'fastapi' %}
+
+
+def _asgi_get(app, path: str) -> Callable[[], Any]:
+    """Build a coroutine factory that sends one GET straight to the ASGI app."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    return lambda: app(dict(scope), receive, send)
+
+
+def _bench_route(with_dependency: bool) -> Setup:
+    def setup():
+        from fastapi import Depends, FastAPI
+        from src.dependencies import get_item_service
+
+        app = FastAPI()
+        app.state.db_manager = None
+        app.state.cache_manager = None
+        if with_dependency:
+            @app.get("/bench")
+            async def route(service: ItemService = Depends(get_item_service)):
+                return None
+        else:
+            @app.get("/bench")
+            async def route():
+                return None
+
+        call = _asgi_get(app, "/bench")
+        loop = asyncio.new_event_loop()
+
+        async def many(n: int) -> None:
+            for _ in range(n):
+                await call()
+
+        return lambda n: loop.run_until_complete(many(n))
+    return setup
+
+
+# The difference between the two is the cost of resolving the dependency chain
+benchmark("fastapi.route_noop")(_bench_route(with_dependency=False))
+benchmark("fastapi.route_depends_item_service")(_bench_route(with_dependency=True))
+{%- else %}
+
+
+@benchmark("flask.async_route")
+def bench_async_route():
+    from src.utils.event_loop import async_route, background_loop
+
+    background_loop.start()
+
+    @async_route
+    async def view():
+        return None
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            view()
+    return run
+{%- endif %}
+
+
+def measure(run: Callable[[int], Any], min_time: float = 0.2, repeat: int = 5) -> Dict[str, float]:
+    """Time run, calibrating the iteration count so each repeat takes about min_time.
+
+    The fastest repeat is reported: noise only ever makes a run slower.
+    """
+    n = 1
+    while True:
+        start = time.perf_counter()
+        run(n)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        n = max(n * 2, int(n * min_time / elapsed * 1.1)) if elapsed > 0 else n * 10
+    timings = [elapsed / n]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        run(n)
+        timings.append((time.perf_counter() - start) / n)
+    return {"ns_per_op": round(min(timings) * 1e9, 1), "iterations": n}
+
+
+def environment() -> Dict[str, str]:
+    """Describe where results were recorded, since baselines only hold there."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "node": platform.node(),
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print results against the baseline and return the names that regressed."""
+    regressions = []
+    previous = baseline.get("results", {})
+    for name, result in results.items():
+        current = result["ns_per_op"]
+        before = previous.get(name, {}).get("ns_per_op")
+        if before is None:
+            verdict = "new"
+        else:
+            change = (current - before) / before * 100
+            verdict = f"{change:+.1f}%"
+            if change > threshold:
+                verdict += "  REGRESSION"
+                regressions.append(name)
+        print(f"{name:<48} {current:>14,.1f} ns/op  {verdict}")
+    return regressions
+
+
+def slower(result: Dict[str, float], baseline: Dict[str, Any], name: str, threshold: float) -> bool:
+    """Check whether a result is more than threshold percent slower than its baseline."""
+    before = baseline.get("results", {}).get(name, {}).get("ns_per_op")
+    return before is not None and result["ns_per_op"] > before * (1 + threshold / 100)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the micro-benchmarks and gate on regressions.")
+    parser.add_argument("-k", "--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline file")
+    parser.add_argument("--save", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed repeat")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats per benchmark")
+    parser.add_argument("--output", type=Path, help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    baseline: Dict[str, Any] = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("environment") != environment():
+            print(f"Warning: {args.baseline} was recorded in a different environment: {baseline.get('environment')}")
+
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+        run = setup()
+        result = measure(run, args.min_time, args.repeat)
+        if not args.save and slower(result, baseline, name, args.threshold):
+            # Measure a suspected regression again, so one noisy run does not fail the gate
+            retry = measure(run, args.min_time, args.repeat)
+            result = min(result, retry, key=lambda r: r["ns_per_op"])
+        results[name] = result
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save:
+        # Keep baselines of benchmarks that were filtered out of this run
+        merged = {**baseline.get("results", {}), **results}
+        args.baseline.write_text(json.dumps({"environment": report["environment"], "results": merged}, indent=2) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not baseline:
+        print(f"No baseline at {args.baseline}; record one with --save")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
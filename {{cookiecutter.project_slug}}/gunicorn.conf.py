@@ -0,0 +1,35 @@
+"""Gunicorn configuration for running several worker processes per pod.
+
+Usage: gunicorn -c gunicorn.conf.py {% if cookiecutter.web_framework == 'fastapi' %}src.app_fastapi:app{% else %}src.app_flask:app{% endif %}
+"""
+import multiprocessing
+import os
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+{%- if cookiecutter.web_framework == 'fastapi' %}
+worker_class = "uvicorn.workers.UvicornWorker"
+{%- else %}
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+{%- endif %}
+timeout = 60
+graceful_timeout = 30
+{%- if cookiecutter.enable_metrics == 'yes' %}
+
+# Workers inherit this, so each one writes its metrics to files that any
+# worker's /metrics aggregates. It must be set before prometheus_client loads.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/{{ cookiecutter.project_slug }}-metrics")
+
+
+def on_starting(server):
+    """Start every run with an empty multiprocess metrics directory."""
+    from src.utils.metrics import clear_multiprocess_dir
+    clear_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited, including crashed ones."""
+    from src.utils.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
+{%- endif %}
@@ -1,22 +1,36 @@
 """API routes for FastAPI."""
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Any, List, Optional
 
-from src.classes.models.schemas import ItemCreate, ItemResponse
-from src.classes.services.item_service import ItemService
+from src.classes.models.schemas import (
+    ItemBatchDelete,
+    ItemBatchResponse,
+    ItemCreate,
+    ItemPage,
+    ItemResponse,
+)
+from src.classes.services.item_service import BatchTooLargeError, ItemService
 from src.dependencies import get_item_service
+from src.utils.pagination import InvalidCursorError
+from src.utils.serialization import model_response
 
 router = APIRouter()
 
 
-@router.get("/items", response_model=List[ItemResponse])
+@router.get("/items", response_model=ItemPage)
 async def list_items(
-    skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     service: ItemService = Depends(get_item_service)
 ):
-    """List all items."""
-    return await service.list_items(skip=skip, limit=limit)
+    """List items, one page at a time."""
+    try:
+        page = await service.list_items(limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # The page is already validated, so encode it directly instead of through response_model
+    return model_response(page)
 
 
 @router.post("/items", response_model=ItemResponse, status_code=status.HTTP_201_CREATED)
@@ -25,7 +39,53 @@ async def create_item(
     service: ItemService = Depends(get_item_service)
 ):
     """Create a new item."""
-    return await service.create_item(item)
+    return model_response(await service.create_item(item), status_code=status.HTTP_201_CREATED)
+
+
+# Export and batch routes are declared before /items/{item_id} so they are not taken as IDs
+@router.get("/items/export", response_class=StreamingResponse)
+async def export_items(service: ItemService = Depends(get_item_service)):
+    """Stream every item as NDJSON (one JSON object per line)."""
+    return StreamingResponse(service.export_items(), media_type="application/x-ndjson")
+
+
+@router.post("/items/batch", response_model=ItemBatchResponse)
+async def create_items(
+    items: List[Any] = Body(..., description="Items to create, each validated on its own"),
+    service: ItemService = Depends(get_item_service)
+):
+    """Create many items in one batched write."""
+    try:
+        results = await service.create_items(items)
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return model_response(ItemBatchResponse(results=results))
+
+
+@router.put("/items/batch", response_model=ItemBatchResponse)
+async def update_items(
+    items: List[Any] = Body(..., description="Items to update, each with its id"),
+    service: ItemService = Depends(get_item_service)
+):
+    """Update many items in one batched write."""
+    try:
+        results = await service.update_items(items)
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return model_response(ItemBatchResponse(results=results))
+
+
+@router.post("/items/batch/delete", response_model=ItemBatchResponse)
+async def delete_items(
+    batch: ItemBatchDelete,
+    service: ItemService = Depends(get_item_service)
+):
+    """Delete many items in one batched write."""
+    try:
+        results = await service.delete_items(batch.ids)
+    except BatchTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return model_response(ItemBatchResponse(results=results))
 
 
 @router.get("/items/{item_id}", response_model=ItemResponse)
@@ -37,7 +97,7 @@ async def get_item(
     item = await service.get_item(item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    return model_response(item)
 
 
 @router.put("/items/{item_id}", response_model=ItemResponse)
@@ -50,7 +110,7 @@ async def update_item(
     updated = await service.update_item(item_id, item)
     if not updated:
         raise HTTPException(status_code=404, detail="Item not found")
-    return updated
+    return model_response(updated)
 
 
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -1,45 +1,28 @@
 """Health check routes for FastAPI."""
-from fastapi import APIRouter, Response, status, Request
+from fastapi import APIRouter, status, Request
 from fastapi.responses import JSONResponse
 
 router = APIRouter()
 
 
 @router.get("/healthz")
-async def health_check():
-    """Basic health check."""
-    return JSONResponse(
-        content={"status": "healthy"},
-        status_code=status.HTTP_200_OK
-    )
+async def health_check(request: Request):
+    """Liveness: healthy while background dependency checks keep running."""
+    prober = getattr(request.app.state, 'health_prober', None)
+    if prober is None:
+        return JSONResponse(content={"status": "healthy"}, status_code=status.HTTP_200_OK)
+    body, status_code = prober.liveness()
+    return JSONResponse(content=body, status_code=status_code)
 
 
 @router.get("/ready")
 async def readiness_check(request: Request):
-    """Readiness check with dependency health."""
-    checks = {
-        "database": "healthy",
-        "cache": "healthy",
-    }
-    
-    # Get managers from app state
-    db_manager = getattr(request.app.state, 'db_manager', None)
-    cache_manager = getattr(request.app.state, 'cache_manager', None)
-    
-    # Check database
-    if db_manager and not await db_manager.health_check():
-        checks["database"] = "unhealthy"
-    
-    # Check cache
-    if cache_manager and not await cache_manager.health_check():
-        checks["cache"] = "unhealthy"
-    
-    all_healthy = all(v == "healthy" for v in checks.values())
-    
-    return JSONResponse(
-        content={
-            "status": "ready" if all_healthy else "not_ready",
-            "checks": checks
-        },
-        status_code=status.HTTP_200_OK if all_healthy else status.HTTP_503_SERVICE_UNAVAILABLE
-    )
+    """Readiness from the latest background dependency check, without checking again."""
+    prober = getattr(request.app.state, 'health_prober', None)
+    if prober is None:
+        return JSONResponse(
+            content={"status": "not_ready", "checks": {}},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    body, status_code = prober.readiness()
+    return JSONResponse(content=body, status_code=status_code)
@@ -1,39 +1,32 @@
 """API routes for Flask."""
-from flask import Blueprint, jsonify, request, current_app
-import asyncio
-from functools import wraps
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
 
-from src.classes.models.schemas import ItemCreate
-from src.classes.services.item_service import ItemService
+from pydantic import ValidationError
+
+from src.classes.models.schemas import ItemBatchDelete, ItemBatchResponse, ItemCreate
+from src.classes.services.item_service import BatchTooLargeError, ItemService
 from src.dependencies import get_item_service_flask
+from src.utils.event_loop import async_route, background_loop
+from src.utils.pagination import InvalidCursorError
+from src.utils.serialization import model_response
 
 api_bp = Blueprint("api", __name__)
 
 
-def async_route(f):
-    """Decorator to run async functions in Flask routes."""
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(f(*args, **kwargs))
-        finally:
-            loop.close()
-    return wrapper
-
-
 @api_bp.route("/items", methods=["GET"])
 @async_route
 async def list_items():
-    """List all items."""
-    skip = request.args.get("skip", 0, type=int)
-    limit = request.args.get("limit", 100, type=int)
+    """List items, one page at a time."""
+    limit = min(max(request.args.get("limit", 100, type=int), 1), 1000)
+    cursor = request.args.get("cursor")
     
     service = await get_item_service_flask()
-    items = await service.list_items(skip=skip, limit=limit)
+    try:
+        page = await service.list_items(limit=limit, cursor=cursor)
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
     
-    return jsonify([item.dict() for item in items])
+    return model_response(page)
 
 
 @api_bp.route("/items", methods=["POST"])
@@ -46,7 +39,70 @@ async def create_item():
     service = await get_item_service_flask()
     item = await service.create_item(item_create)
     
-    return jsonify(item.dict()), 201
+    return model_response(item, status=201)
+
+
+@api_bp.route("/items/export", methods=["GET"])
+def export_items():
+    """Stream every item as NDJSON (one JSON object per line)."""
+    async def chunks():
+        service = await get_item_service_flask()
+        async for chunk in service.export_items():
+            yield chunk
+    
+    return Response(stream_with_context(background_loop.iterate(chunks())), mimetype="application/x-ndjson")
+
+
+@api_bp.route("/items/batch", methods=["POST"])
+@async_route
+async def create_items():
+    """Create many items in one batched write."""
+    data = request.get_json()
+    if not isinstance(data, list):
+        return jsonify({"error": "Expected a JSON array of items"}), 400
+    
+    service = await get_item_service_flask()
+    try:
+        results = await service.create_items(data)
+    except BatchTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    
+    return model_response(ItemBatchResponse(results=results))
+
+
+@api_bp.route("/items/batch", methods=["PUT"])
+@async_route
+async def update_items():
+    """Update many items in one batched write."""
+    data = request.get_json()
+    if not isinstance(data, list):
+        return jsonify({"error": "Expected a JSON array of items"}), 400
+    
+    service = await get_item_service_flask()
+    try:
+        results = await service.update_items(data)
+    except BatchTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    
+    return model_response(ItemBatchResponse(results=results))
+
+
+@api_bp.route("/items/batch/delete", methods=["POST"])
+@async_route
+async def delete_items():
+    """Delete many items in one batched write."""
+    try:
+        batch = ItemBatchDelete(**request.get_json())
+    except (TypeError, ValidationError) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    service = await get_item_service_flask()
+    try:
+        results = await service.delete_items(batch.ids)
+    except BatchTooLargeError as e:
+        return jsonify({"error": str(e)}), 413
+    
+    return model_response(ItemBatchResponse(results=results))
 
 
 @api_bp.route("/items/<item_id>", methods=["GET"])
@@ -59,7 +115,7 @@ async def get_item(item_id):
     if not item:
         return jsonify({"error": "Item not found"}), 404
     
-    return jsonify(item.dict())
+    return model_response(item)
 
 
 @api_bp.route("/items/<item_id>", methods=["PUT"])
@@ -75,7 +131,7 @@ async def update_item(item_id):
     if not item:
         return jsonify({"error": "Item not found"}), 404
     
-    return jsonify(item.dict())
+    return model_response(item)
 
 
 @api_bp.route("/items/<item_id>", methods=["DELETE"])
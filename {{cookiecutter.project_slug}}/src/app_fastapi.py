@@ -2,47 +2,88 @@
 import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
+{%- if cookiecutter.enable_metrics == 'yes' %}
+import time
+{%- endif %}
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.responses import JSONResponse, PlainTextResponse
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 from src.api.routes import health, api_v1
-from src.utils.database import DatabaseManager
-from src.utils.cache import CacheManager
-from src.utils.metrics import MetricsCollector
+from src.utils.database import create_database_manager
+from src.utils.cache import create_cache_manager
+from src.utils.message_queue import create_queue_manager
+{%- if cookiecutter.enable_metrics == 'yes' %}
+from src.utils.metrics import UNMATCHED_ROUTE, generate_metrics, get_metrics
+{%- elif cookiecutter.enable_tracing == 'yes' %}
+from src.utils.metrics import UNMATCHED_ROUTE
+{%- endif %}
 from src.config import Settings, InfrastructureConfig
+from src.utils.health import HealthChecker, HealthProber
 from src.utils.logging import setup_logging
+from src.utils.loop_monitor import LoopMonitor
+from src.utils.profiling import get_profiler
+from src.utils.query_log import get_query_log
+from src.utils.serialization import FastJSONResponse
+{%- if cookiecutter.enable_tracing == 'yes' %}
+from src.utils.tracing import server_span, set_http_status, setup_tracing
+{%- endif %}
 
 
 # Initialize configuration
 settings = Settings()
 infra_config = InfrastructureConfig()
-setup_logging(settings.LOG_LEVEL)
+setup_logging(settings.LOG_LEVEL, settings)
+{%- if cookiecutter.enable_tracing == 'yes' %}
+setup_tracing(settings)
+{%- endif %}
 
 # Initialize infrastructure managers
-db_manager = DatabaseManager(settings, infra_config)
-cache_manager = CacheManager(settings, infra_config)
-metrics = MetricsCollector()
+db_manager = create_database_manager(settings, infra_config)
+cache_manager = create_cache_manager(settings, infra_config)
+queue_manager = create_queue_manager(settings, infra_config)
+loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_STALL_THRESHOLD)
+health_prober = HealthProber(
+    HealthChecker(settings, infra_config, timeout=settings.HEALTH_CHECK_TIMEOUT),
+    db_manager,
+    cache_manager,
+    queue_manager,
+    interval=settings.HEALTH_CHECK_INTERVAL,
+    max_staleness=settings.HEALTH_MAX_STALENESS,
+)
+{%- if cookiecutter.enable_metrics == 'yes' %}
+metrics = get_metrics()
+{%- endif %}
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Manage application lifespan."""
     # Startup
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
     await db_manager.initialize()
     await cache_manager.initialize()
+    await queue_manager.initialize()
+    await health_prober.start()
     
     # Store managers in app state for access in routes
     app.state.db_manager = db_manager
     app.state.cache_manager = cache_manager
+    app.state.queue_manager = queue_manager
+    app.state.health_prober = health_prober
+    {%- if cookiecutter.enable_metrics == 'yes' %}
     app.state.metrics = metrics
+    {%- endif %}
     
     yield
     
     # Shutdown
+    await health_prober.stop()
+    await queue_manager.close()
     await cache_manager.close()
     await db_manager.close()
+    await loop_monitor.stop()
 
 
 app = FastAPI(
@@ -50,31 +91,128 @@ app = FastAPI(
     description="{{ cookiecutter.project_description }}",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse if settings.FAST_JSON else JSONResponse,
+    {%- if cookiecutter.enable_tracing == 'yes' %}
+    # Server spans come from tracing_middleware; turn off the built-in ones
+    # in FastAPI releases that have them (older releases ignore this)
+    telemetry={"tracing": False},
+    {%- endif %}
 )
 
 
-# Middleware for metrics
+{% if cookiecutter.enable_metrics == 'yes' or cookiecutter.enable_tracing == 'yes' %}def route_template(request) -> str:
+    """Get the matched route's path template, including any router prefix."""
+    route = request.scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    # Routes in included routers may hold only their own part of the path, so
+    # recover the prefix by stripping the concrete route path from the URL
+    try:
+        concrete = route.path_format.format(**request.path_params)
+    except (AttributeError, KeyError, IndexError, ValueError):
+        return route.path
+    path = request.scope["path"]
+    if concrete and path.endswith(concrete):
+        return path[: len(path) - len(concrete)] + route.path
+    return route.path
+
+
+{% endif %}{% if cookiecutter.enable_metrics == 'yes' %}# Middleware for metrics
 @app.middleware("http")
 async def metrics_middleware(request, call_next):
-    """Track HTTP metrics."""
-    response = await call_next(request)
-    metrics.track_request(
-        method=request.method,
-        endpoint=request.url.path,
-        status_code=response.status_code,
-    )
-    return response
-
-
-# Include routers
+    """Track HTTP metrics, labelled by route template rather than raw path."""
+    start = time.perf_counter()
+    status_code = 500
+    with metrics.track_in_progress(request.method):
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            metrics.track_request(
+                method=request.method,
+                endpoint=route_template(request),
+                status_code=status_code,
+                duration=time.perf_counter() - start,
+            )
+
+
+{% endif %}{% if cookiecutter.enable_tracing == 'yes' %}# Middleware for tracing, outside the metrics middleware so its span covers it
+@app.middleware("http")
+async def tracing_middleware(request, call_next):
+    """Run each request in a server span, continuing the caller's trace."""
+    attributes = {"http.request.method": request.method, "url.path": request.url.path}
+    with server_span(request.method, request.headers, attributes) as span:
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            set_http_status(span, status_code)
+            # The route is only known once routing has run
+            span.update_name(f"{request.method} {route_template(request)}")
+
+
+{% endif %}# Include routers
 app.include_router(health.router, tags=["Health"])
 app.include_router(api_v1.router, prefix="/api/v1", tags=["API"])
 
 
-@app.get("/metrics", response_class=PlainTextResponse)
+{% if cookiecutter.enable_metrics == 'yes' %}@app.get("/metrics", response_class=PlainTextResponse)
 async def metrics_endpoint():
-    """Prometheus metrics endpoint."""
-    return generate_latest()
+    """Prometheus metrics endpoint, aggregated across processes in multiprocess mode."""
+    payload, content_type = generate_metrics()
+    return PlainTextResponse(payload, media_type=content_type)
+
+
+{% endif %}profiler = get_profiler()
+
+
+def require_debug_access(request: Request) -> None:
+    """Allow debug endpoints only for requests carrying the profiling header."""
+    if not profiler.authorized(request.headers.get(settings.PROFILING_HEADER)):
+        raise HTTPException(status_code=403, detail="Profiling header missing or invalid")
+
+
+if settings.PROFILING_ENABLED:
+    @app.middleware("http")
+    async def profiling_middleware(request, call_next):
+        """Profile requests carrying the profiling header, plus a random sample."""
+        if request.url.path.startswith("/debug/") or not profiler.should_profile(
+            request.headers.get(settings.PROFILING_HEADER)
+        ):
+            return await call_next(request)
+        with profiler.profile(f"{request.method} {request.url.path}") as profile_id:
+            response = await call_next(request)
+        if profile_id is not None:
+            response.headers["X-Profile-Id"] = str(profile_id)
+        return response
+    
+    @app.get("/debug/profiles", dependencies=[Depends(require_debug_access)], include_in_schema=False)
+    async def list_profiles():
+        """List buffered profiles, newest first."""
+        return [profile.summary() for profile in profiler.profiles()]
+    
+    @app.get(
+        "/debug/profiles/{profile_id}",
+        response_class=PlainTextResponse,
+        dependencies=[Depends(require_debug_access)],
+        include_in_schema=False,
+    )
+    async def get_profile(profile_id: int):
+        """Get one profile as collapsed stacks, ready for flamegraph.pl or speedscope."""
+        profile = profiler.get(profile_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return PlainTextResponse(profile.collapsed())
+
+
+if settings.DEBUG_QUERIES_ENABLED:
+    @app.get("/debug/queries", dependencies=[Depends(require_debug_access)], include_in_schema=False)
+    async def slow_queries():
+        """Slowest recent statements and per-statement totals, slowest first."""
+        return get_query_log().snapshot()
 
 
 if __name__ == "__main__":
@@ -1,145 +1,282 @@
 """Flask application entry point."""
-import asyncio
 import atexit
+import logging
+import threading
 import time
-from functools import wraps
+from contextlib import ExitStack
 
 from flask import Flask, jsonify, Response
-{% if cookiecutter.enable_metrics == 'yes' -%}
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
-{% endif -%}
 
 from src.api.routes_flask import health_bp, api_bp
-from src.utils.database import DatabaseManager
-from src.utils.cache import CacheManager
+from src.utils.database import create_database_manager
+from src.utils.cache import create_cache_manager
+from src.utils.message_queue import create_queue_manager
 {% if cookiecutter.enable_metrics == 'yes' -%}
-from src.utils.metrics import MetricsCollector
+from src.utils.metrics import UNMATCHED_ROUTE, generate_metrics, get_metrics
+{% elif cookiecutter.enable_tracing == 'yes' -%}
+from src.utils.metrics import UNMATCHED_ROUTE
 {% endif -%}
 from src.config import Settings, InfrastructureConfig
+from src.utils.event_loop import background_loop
+from src.utils.health import HealthChecker, HealthProber
 from src.utils.logging import setup_logging
+from src.utils.loop_monitor import LoopMonitor
+from src.utils.profiling import get_profiler
+from src.utils.query_log import get_query_log
+from src.utils.serialization import FastJSONProvider
+{%- if cookiecutter.enable_tracing == 'yes' %}
+from src.utils.tracing import server_span, set_http_status, setup_tracing
+{%- endif %}
 
+logger = logging.getLogger(__name__)
 
 # Initialize configuration
 settings = Settings()
 infra_config = InfrastructureConfig()
-setup_logging(settings.LOG_LEVEL)
+setup_logging(settings.LOG_LEVEL, settings)
+{%- if cookiecutter.enable_tracing == 'yes' %}
+setup_tracing(settings)
+{%- endif %}
 
 # Initialize infrastructure managers
-db_manager = DatabaseManager(settings, infra_config)
-cache_manager = CacheManager(settings, infra_config)
+db_manager = create_database_manager(settings, infra_config)
+cache_manager = create_cache_manager(settings, infra_config)
+queue_manager = create_queue_manager(settings, infra_config)
+loop_monitor = LoopMonitor(settings.LOOP_MONITOR_INTERVAL, settings.LOOP_STALL_THRESHOLD)
+health_prober = HealthProber(
+    HealthChecker(settings, infra_config, timeout=settings.HEALTH_CHECK_TIMEOUT),
+    db_manager,
+    cache_manager,
+    queue_manager,
+    interval=settings.HEALTH_CHECK_INTERVAL,
+    max_staleness=settings.HEALTH_MAX_STALENESS,
+)
 {% if cookiecutter.enable_metrics == 'yes' -%}
-metrics = MetricsCollector()
+metrics = get_metrics()
 {% endif -%}
 
 
-def async_route(f):
-    """Decorator to run async functions in Flask routes."""
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(f(*args, **kwargs))
-        finally:
-            loop.close()
-    return wrapper
+async def startup():
+    """Open database, cache and queue connections on the background loop."""
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    await db_manager.initialize()
+    await cache_manager.initialize()
+    await queue_manager.initialize()
+    await health_prober.start()
+
+
+async def shutdown():
+    """Close connection pools on the loop that owns them."""
+    await health_prober.stop()
+    await queue_manager.close()
+    await cache_manager.close()
+    await db_manager.close()
+    await loop_monitor.stop()
 
 
 def create_app():
     """Application factory."""
     app = Flask(__name__)
     app.config.from_object(settings)
+    if settings.FAST_JSON:
+        app.json = FastJSONProvider(app)
     
     # Store managers in app context
     app.db_manager = db_manager
     app.cache_manager = cache_manager
+    app.queue_manager = queue_manager
+    app.health_prober = health_prober
     {%- if cookiecutter.enable_metrics == 'yes' %}
     app.metrics = metrics
     {%- endif %}
+    {%- if cookiecutter.enable_tracing == 'yes' %}
     
-    # Initialize infrastructure on startup (Flask 3.0+ compatible)
+    # Registered first, so the span covers every other request hook
+    _register_tracing(app)
+    {%- endif %}
+    
+    # Initialize infrastructure on first request (Flask 3.0+ compatible), so
+    # pools are created in the serving process rather than before a fork
     app._initialized = False
+    init_lock = threading.Lock()
     
+    def ensure_initialized():
+        if app._initialized:
+            return
+        with init_lock:
+            if not app._initialized:
+                background_loop.run(startup())
+                app._initialized = True
     {%- if cookiecutter.enable_metrics == 'yes' %}
+    
     # Combined startup and metrics middleware
     @app.before_request
     def before_request_handler():
         from flask import request
         # Initialize on first request
-        if not app._initialized:
-            app._initialized = True
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(db_manager.initialize())
-                loop.run_until_complete(cache_manager.initialize())
-            finally:
-                loop.close()
+        ensure_initialized()
         
-        # Track request start time for metrics
-        try:
-            request._start_time = asyncio.get_event_loop().time()
-        except RuntimeError:
-            request._start_time = time.time()
+        # Track request start time and in-flight count for metrics
+        request._start_time = time.perf_counter()
+        metrics.request_started(request.method)
+        request._in_progress = True
     {%- else %}
+    
     # Initialize infrastructure on first request
     @app.before_request
     def _startup():
-        if not app._initialized:
-            app._initialized = True
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(db_manager.initialize())
-                loop.run_until_complete(cache_manager.initialize())
-            finally:
-                loop.close()
+        ensure_initialized()
     {%- endif %}
     
     # Cleanup on shutdown
-    def shutdown():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            loop.run_until_complete(cache_manager.close())
-            loop.run_until_complete(db_manager.close())
-        finally:
-            loop.close()
-    
-    atexit.register(shutdown)
+    def _shutdown():
+        if app._initialized and background_loop.is_running:
+            background_loop.run(shutdown())
+        background_loop.stop()
     
+    atexit.register(_shutdown)
     {%- if cookiecutter.enable_metrics == 'yes' %}
-    # Metrics tracking middleware
+    
+    # Metrics tracking middleware, labelled by route template rather than raw path
     @app.after_request
     def after_request(response):
         from flask import request
         try:
-            m = getattr(app, 'metrics', None)
-            if m is not None:
-                m.track_request(
-                    method=request.method,
-                    endpoint=request.endpoint or "unknown",
-                    status_code=response.status_code,
-                )
+            start = getattr(request, "_start_time", None)
+            metrics.track_request(
+                method=request.method,
+                endpoint=request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE,
+                status_code=response.status_code,
+                duration=time.perf_counter() - start if start is not None else None,
+            )
         except Exception:
-            pass
+            # Never fail a response over metrics, but leave a trace of why they are missing
+            logger.exception("Could not record request metrics")
         return response
     
+    @app.teardown_request
+    def teardown_request(exc):
+        from flask import request
+        # Runs even when the view raised, so the in-flight gauge never leaks
+        if getattr(request, "_in_progress", False):
+            metrics.request_finished(request.method)
     {%- endif %}
+    
     # Register blueprints
     app.register_blueprint(health_bp)
     app.register_blueprint(api_bp, url_prefix="/api/v1")
-    
     {%- if cookiecutter.enable_metrics == 'yes' %}
+    
     # Metrics endpoint
     @app.route("/metrics")
     def metrics_endpoint():
-        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
-    
+        payload, content_type = generate_metrics()
+        return Response(payload, content_type=content_type)
     {%- endif %}
+    
+    if settings.PROFILING_ENABLED:
+        _register_profiling(app)
+    if settings.DEBUG_QUERIES_ENABLED:
+        _register_query_log(app)
+    
     return app
 
 
+{% if cookiecutter.enable_tracing == 'yes' %}def _register_tracing(app):
+    """Run each request in a server span, continuing the caller's trace."""
+    from flask import g, request
+    
+    @app.before_request
+    def start_span():
+        stack = ExitStack()
+        attributes = {"http.request.method": request.method, "url.path": request.path}
+        g.trace_span = stack.enter_context(server_span(request.method, request.headers, attributes))
+        g.trace_stack = stack
+    
+    @app.after_request
+    def record_status(response):
+        span = g.get("trace_span")
+        if span is not None:
+            set_http_status(span, response.status_code)
+        return response
+    
+    @app.teardown_request
+    def end_span(exc):
+        stack = g.pop("trace_stack", None)
+        if stack is None:
+            return
+        span = g.pop("trace_span")
+        span.update_name(f"{request.method} {request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE}")
+        if exc is not None:
+            # Flask has already handled the exception, so report it here
+            stack.__exit__(type(exc), exc, exc.__traceback__)
+        else:
+            stack.close()
+
+
+{% endif %}def require_debug_access():
+    """Allow debug endpoints only for requests carrying the profiling header."""
+    from flask import abort, request
+    if not get_profiler().authorized(request.headers.get(settings.PROFILING_HEADER)):
+        abort(403)
+
+
+def _register_profiling(app):
+    """Profile requests carrying the profiling header, plus a random sample."""
+    from flask import abort, g, request
+    profiler = get_profiler()
+    
+    @app.before_request
+    def start_profile():
+        if request.path.startswith("/debug/") or not profiler.should_profile(
+            request.headers.get(settings.PROFILING_HEADER)
+        ):
+            return
+        # Async views run on the background loop, so sample its thread too
+        stack = ExitStack()
+        g.profile_id = stack.enter_context(
+            profiler.profile(f"{request.method} {request.path}", extra_threads=[background_loop.thread_id])
+        )
+        g.profile_stack = stack
+    
+    @app.after_request
+    def add_profile_id(response):
+        profile_id = g.get("profile_id")
+        if profile_id is not None:
+            response.headers["X-Profile-Id"] = str(profile_id)
+        return response
+    
+    @app.teardown_request
+    def stop_profile(exc):
+        stack = g.pop("profile_stack", None)
+        if stack is not None:
+            stack.close()
+    
+    @app.route("/debug/profiles")
+    def list_profiles():
+        """List buffered profiles, newest first."""
+        require_debug_access()
+        return jsonify([profile.summary() for profile in profiler.profiles()])
+    
+    @app.route("/debug/profiles/<int:profile_id>")
+    def get_profile(profile_id):
+        """Get one profile as collapsed stacks, ready for flamegraph.pl or speedscope."""
+        require_debug_access()
+        profile = profiler.get(profile_id)
+        if profile is None:
+            abort(404)
+        return Response(profile.collapsed(), mimetype="text/plain")
+
+
+def _register_query_log(app):
+    """Serve the slowest recent statements and per-statement totals."""
+    @app.route("/debug/queries")
+    def slow_queries():
+        require_debug_access()
+        return jsonify(get_query_log().snapshot())
+
+
 app = create_app()
 
 
@@ -18,8 +18,8 @@ class Item(BaseModel):
     class Config:
         populate_by_name = True
 {% else %}
-from datetime import datetime
-from sqlalchemy import Column, String, Float, Boolean, DateTime
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Text, Float, Boolean, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 import uuid
@@ -30,12 +30,17 @@ Base = declarative_base()
 class Item(Base):
     """SQLAlchemy Item model."""
     __tablename__ = "items"
+    __table_args__ = (
+        # Backs keyset pagination, which orders and seeks by (created_at, id)
+        Index("ix_items_created_at_id", "created_at", "id"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(255), nullable=False)
-    description = Column(String)
+    description = Column(Text)
     price = Column(Float, nullable=False)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side so the value (and any cursor built from it) keeps full precision
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 {% endif %}
@@ -1,7 +1,7 @@
 """Pydantic schemas for API requests/responses."""
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ItemBase(BaseModel):
@@ -25,9 +25,40 @@ class ItemUpdate(ItemBase):
 
 class ItemResponse(ItemBase):
     """Schema for item response."""
+    model_config = ConfigDict(from_attributes=True)
+    
     id: str
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+
+class ItemPage(BaseModel):
+    """Schema for a page of items."""
+    items: List[ItemResponse]
+    next_cursor: Optional[str] = Field(
+        None, description="Opaque cursor for the next page; null on the last page"
+    )
+
+
+class ItemBatchUpdate(ItemCreate):
+    """Schema for one entry of a batch update."""
+    id: str
+
+
+class ItemBatchDelete(BaseModel):
+    """Schema for a batch delete."""
+    ids: List[str] = Field(..., min_length=1)
+
+
+class ItemBatchResult(BaseModel):
+    """Outcome of one entry in a batch request."""
+    index: int = Field(..., description="Position of the entry in the request")
+    id: Optional[str] = None
+    status: int = Field(..., description="HTTP status the entry would have had on its own")
+    item: Optional[ItemResponse] = None
+    error: Optional[str] = None
+
+
+class ItemBatchResponse(BaseModel):
+    """Schema for a batch response, one result per entry in request order."""
+    results: List[ItemBatchResult]
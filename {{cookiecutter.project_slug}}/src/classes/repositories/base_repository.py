@@ -1,14 +1,21 @@
 """Base repository with common CRUD operations."""
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from src.utils.pagination import CursorKey
 
 
 class BaseRepository(ABC):
     """Abstract base repository."""
     
     @abstractmethod
-    async def find_all(self, skip: int = 0, limit: int = 100) -> List[Any]:
-        """Find all records."""
+    async def find_all(self, limit: int = 100, after: Optional[CursorKey] = None) -> List[Any]:
+        """Find records ordered by (created_at, id), starting after the given key."""
+        pass
+    
+    @abstractmethod
+    def stream_all(self, batch_size: int = 1000) -> AsyncIterator[Any]:
+        """Stream every record ordered by (created_at, id) from a server-side cursor."""
         pass
     
     @abstractmethod
@@ -30,3 +37,18 @@ class BaseRepository(ABC):
     async def delete(self, id: str) -> bool:
         """Delete a record."""
         pass
+    
+    @abstractmethod
+    async def create_many(self, data: List[Dict[str, Any]]) -> List[Any]:
+        """Create records in one batched write, in input order."""
+        pass
+    
+    @abstractmethod
+    async def update_many(self, updates: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[Any]]:
+        """Update records in one batched write; None for IDs that do not exist."""
+        pass
+    
+    @abstractmethod
+    async def delete_many(self, ids: List[str]) -> List[bool]:
+        """Delete records in one batched write; False for IDs that do not exist."""
+        pass
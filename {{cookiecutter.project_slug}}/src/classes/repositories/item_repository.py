@@ -1,11 +1,17 @@
 """Item repository implementation."""
 {% if cookiecutter.database_type == 'mongodb' %}
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime
 import uuid
 
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+
 from src.classes.repositories.base_repository import BaseRepository
 from src.classes.models.entities import Item
+from src.utils.pagination import CursorKey
+from src.utils.tracing import traced
+
+_indexes_created = False
 
 
 class ItemRepository(BaseRepository):
@@ -16,16 +22,43 @@ class ItemRepository(BaseRepository):
         self.db_manager = db_manager
         self.collection_name = "items"
     
-    async def find_all(self, skip: int = 0, limit: int = 100) -> List[Item]:
-        """Find all items."""
+    async def _collection(self):
+        """Get the items collection, creating its indexes on first use."""
+        global _indexes_created
         connection = await self.db_manager.get_connection()
         collection = connection[self.collection_name]
+        if not _indexes_created:
+            # Backs keyset pagination, which orders and seeks by (created_at, _id)
+            await collection.create_index([("created_at", ASCENDING), ("_id", ASCENDING)])
+            _indexes_created = True
+        return collection
+    
+    @traced()
+    async def find_all(self, limit: int = 100, after: Optional[CursorKey] = None) -> List[Item]:
+        """Find items ordered by (created_at, id), starting after the given key."""
+        collection = await self._collection()
         
-        cursor = collection.find().skip(skip).limit(limit)
+        query: Dict[str, Any] = {}
+        if after is not None:
+            created_at, id = after
+            query = {"$or": [
+                {"created_at": {"$gt": created_at}},
+                {"created_at": created_at, "_id": {"$gt": id}},
+            ]}
+        cursor = collection.find(query).sort([("created_at", ASCENDING), ("_id", ASCENDING)]).limit(limit)
         items = await cursor.to_list(length=limit)
         
         return [Item(**item) for item in items]
     
+    async def stream_all(self, batch_size: int = 1000) -> AsyncIterator[Item]:
+        """Stream every item from a server-side cursor, batch_size documents per fetch."""
+        collection = await self._collection()
+        
+        cursor = collection.find().sort([("created_at", ASCENDING), ("_id", ASCENDING)]).batch_size(batch_size)
+        async for item in cursor:
+            yield Item(**item)
+    
+    @traced()
     async def find_by_id(self, id: str) -> Optional[Item]:
         """Find item by ID."""
         connection = await self.db_manager.get_connection()
@@ -36,6 +69,7 @@ class ItemRepository(BaseRepository):
             return Item(**item)
         return None
     
+    @traced()
     async def create(self, data: Dict[str, Any]) -> Item:
         """Create a new item."""
         connection = await self.db_manager.get_connection()
@@ -51,21 +85,22 @@ class ItemRepository(BaseRepository):
         await collection.insert_one(item_data)
         return Item(**item_data)
     
+    @traced()
     async def update(self, id: str, data: Dict[str, Any]) -> Optional[Item]:
-        """Update an item."""
+        """Update an item and return the new version in one round trip."""
         connection = await self.db_manager.get_connection()
         collection = connection[self.collection_name]
         
-        data["updated_at"] = datetime.utcnow()
-        result = await collection.update_one(
+        item = await collection.find_one_and_update(
             {"_id": id},
-            {"$set": data}
+            {"$set": {**data, "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
         )
-        
-        if result.modified_count:
-            return await self.find_by_id(id)
+        if item:
+            return Item(**item)
         return None
     
+    @traced()
     async def delete(self, id: str) -> bool:
         """Delete an item."""
         connection = await self.db_manager.get_connection()
@@ -73,75 +108,236 @@ class ItemRepository(BaseRepository):
         
         result = await collection.delete_one({"_id": id})
         return result.deleted_count > 0
+    
+    @traced()
+    async def create_many(self, data: List[Dict[str, Any]]) -> List[Item]:
+        """Create many items with one insert_many."""
+        collection = await self._collection()
+        
+        now = datetime.utcnow()
+        documents = [
+            {"_id": str(uuid.uuid4()), **row, "created_at": now, "updated_at": now}
+            for row in data
+        ]
+        if documents:
+            await collection.insert_many(documents, ordered=False)
+        return [Item(**document) for document in documents]
+    
+    @traced()
+    async def update_many(self, updates: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[Item]]:
+        """Update many items with one bulk_write, then read them back in one query."""
+        if not updates:
+            return []
+        collection = await self._collection()
+        
+        now = datetime.utcnow()
+        await collection.bulk_write(
+            [UpdateOne({"_id": id}, {"$set": {**data, "updated_at": now}}) for id, data in updates],
+            ordered=False,
+        )
+        ids = [id for id, _ in updates]
+        found = {doc["_id"]: Item(**doc) async for doc in collection.find({"_id": {"$in": ids}})}
+        return [found.get(id) for id in ids]
+    
+    @traced()
+    async def delete_many(self, ids: List[str]) -> List[bool]:
+        """Delete many items: find the existing IDs, then remove them with one delete_many.
+
+        delete_many only reports a count, so the per-ID results come from the
+        find. An item another request deletes between the two calls is still
+        reported as deleted here.
+        """
+        if not ids:
+            return []
+        collection = await self._collection()
+        
+        existing = {doc["_id"] async for doc in collection.find({"_id": {"$in": ids}}, {"_id": 1})}
+        if existing:
+            await collection.delete_many({"_id": {"$in": list(existing)}})
+        return [id in existing for id in ids]
 {% else %}
-from typing import Any, Dict, List, Optional
-from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
 import uuid
 
-from sqlalchemy import select
+{% if cookiecutter.database_type == 'postgresql' -%}
+from sqlalchemy import bindparam, delete, insert, select, tuple_, update
+{%- else -%}
+from sqlalchemy import and_, bindparam, delete, insert, or_, select, update
+{%- endif %}
 from src.classes.repositories.base_repository import BaseRepository
 from src.classes.models.entities import Item
+from src.utils.pagination import CursorKey
+from src.utils.tracing import traced
 
 
 class ItemRepository(BaseRepository):
-    """SQLAlchemy repository for items."""
+    """SQLAlchemy repository for items.
+    
+    Every operation runs in its own session from the database manager's pool,
+    so concurrent requests never share a connection or transaction. Operations
+    that are a single statement run in autocommit sessions, which saves the
+    BEGIN and COMMIT round trips where the driver allows it.
+    """
     
     def __init__(self, db_manager):
         """Initialize with database manager."""
         self.db_manager = db_manager
     
-    async def find_all(self, skip: int = 0, limit: int = 100) -> List[Item]:
-        """Find all items."""
-        connection = await self.db_manager.get_connection()
+    @traced()
+    async def find_all(self, limit: int = 100, after: Optional[CursorKey] = None) -> List[Item]:
+        """Find items ordered by (created_at, id), starting after the given key.
         
-        query = select(Item).offset(skip).limit(limit)
-        result = await connection.execute(query)
-        return result.scalars().all()
+        Seeking past the last key instead of using OFFSET keeps every page
+        an index range scan, so deep pages cost the same as the first.
+        """
+        async with self.db_manager.session(autocommit=True) as session:
+            query = select(Item).order_by(Item.created_at, Item.id).limit(limit)
+            if after is not None:
+                {%- if cookiecutter.database_type == 'postgresql' %}
+                query = query.where(tuple_(Item.created_at, Item.id) > after)
+                {%- else %}
+                created_at, id = after
+                query = query.where(or_(
+                    Item.created_at > created_at,
+                    and_(Item.created_at == created_at, Item.id > id),
+                ))
+                {%- endif %}
+            result = await session.execute(query)
+            return result.scalars().all()
     
+    async def stream_all(self, batch_size: int = 1000) -> AsyncIterator[Any]:
+        """Stream every item from a server-side cursor, batch_size rows per fetch.
+        
+        Yields plain rows rather than ORM objects so nothing accumulates in
+        the session's identity map and memory stays flat for any table size.
+        """
+        query = (
+            select(Item.__table__)
+            .order_by(Item.created_at, Item.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async with self.db_manager.session() as session:
+            result = await session.stream(query)
+            async for row in result:
+                yield row
+    
+    @traced()
     async def find_by_id(self, id: str) -> Optional[Item]:
         """Find item by ID."""
-        connection = await self.db_manager.get_connection()
-        
-        query = select(Item).where(Item.id == id)
-        result = await connection.execute(query)
-        return result.scalar_one_or_none()
+        async with self.db_manager.session(autocommit=True) as session:
+            query = select(Item).where(Item.id == id)
+            result = await session.execute(query)
+            return result.scalar_one_or_none()
     
+    @traced()
     async def create(self, data: Dict[str, Any]) -> Item:
         """Create a new item."""
-        connection = await self.db_manager.get_connection()
-        
-        item = Item(id=str(uuid.uuid4()), **data)
-        connection.add(item)
-        await connection.commit()
-        await connection.refresh(item)
+        async with self.db_manager.session() as session:
+            item = Item(id=str(uuid.uuid4()), **data)
+            session.add(item)
+            await session.flush()
+            await session.refresh(item)
         
         return item
     
+    @traced()
     async def update(self, id: str, data: Dict[str, Any]) -> Optional[Item]:
-        """Update an item."""
-        item = await self.find_by_id(id)
-        if not item:
-            return None
-        
-        connection = await self.db_manager.get_connection()
-        
-        for key, value in data.items():
-            setattr(item, key, value)
+        """Update an item and return the new version.
+        {%- if cookiecutter.database_type == 'postgresql' %}
         
-        await connection.commit()
-        await connection.refresh(item)
+        UPDATE ... RETURNING writes and reads the row in one statement.
+        {%- else %}
         
-        return item
+        MySQL has no UPDATE ... RETURNING, so the row is read back by primary
+        key in the same transaction.
+        {%- endif %}
+        """
+        statement = update(Item).where(Item.id == id).values(**data)
+        {%- if cookiecutter.database_type == 'postgresql' %}
+        async with self.db_manager.session(autocommit=True) as session:
+            result = await session.execute(
+                statement.returning(Item),
+                execution_options={"synchronize_session": False},
+            )
+            return result.scalar_one_or_none()
+        {%- else %}
+        async with self.db_manager.session() as session:
+            result = await session.execute(statement, execution_options={"synchronize_session": False})
+            if not result.rowcount:
+                return None
+            result = await session.execute(select(Item).where(Item.id == id))
+            return result.scalar_one_or_none()
+        {%- endif %}
     
+    @traced()
     async def delete(self, id: str) -> bool:
-        """Delete an item."""
-        item = await self.find_by_id(id)
-        if not item:
-            return False
+        """Delete an item with a single DELETE, reporting whether it existed."""
+        async with self.db_manager.session(autocommit=True) as session:
+            result = await session.execute(
+                delete(Item).where(Item.id == id),
+                execution_options={"synchronize_session": False},
+            )
+            return result.rowcount > 0
+    
+    @traced()
+    async def create_many(self, data: List[Dict[str, Any]]) -> List[Item]:
+        """Create many items with one batched multi-row INSERT."""
+        if not data:
+            return []
+        now = datetime.now(timezone.utc)
+        rows = [
+            {"id": str(uuid.uuid4()), **row, "created_at": now, "updated_at": now}
+            for row in data
+        ]
+        async with self.db_manager.session() as session:
+            await session.execute(insert(Item), rows)
         
-        connection = await self.db_manager.get_connection()
-        await connection.delete(item)
-        await connection.commit()
+        return [Item(**row) for row in rows]
+    
+    @traced()
+    async def update_many(self, updates: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[Item]]:
+        """Update many items with one executemany UPDATE, then read them back in one query.
+        
+        Every entry must update the same set of columns.
+        """
+        if not updates:
+            return []
+        table = Item.__table__
+        columns = list(updates[0][1])
+        statement = (
+            table.update()
+            .where(table.c.id == bindparam("match_id"))
+            .values({column: bindparam(f"new_{column}") for column in columns})
+        )
+        params = [
+            {"match_id": id, **{f"new_{column}": data[column] for column in columns}}
+            for id, data in updates
+        ]
+        ids = [id for id, _ in updates]
+        async with self.db_manager.session() as session:
+            await session.execute(statement, params)
+            result = await session.execute(select(Item).where(Item.id.in_(ids)))
+            found = {item.id: item for item in result.scalars()}
+        
+        return [found.get(id) for id in ids]
+    
+    @traced()
+    async def delete_many(self, ids: List[str]) -> List[bool]:
+        """Delete many items with one DELETE ... WHERE id IN (...)."""
+        if not ids:
+            return []
+        async with self.db_manager.session() as session:
+            {%- if cookiecutter.database_type == 'postgresql' %}
+            result = await session.execute(delete(Item).where(Item.id.in_(ids)).returning(Item.id))
+            deleted = set(result.scalars())
+            {%- else %}
+            # MySQL has no DELETE ... RETURNING, so find the existing IDs first
+            result = await session.execute(select(Item.id).where(Item.id.in_(ids)))
+            deleted = set(result.scalars())
+            if deleted:
+                await session.execute(delete(Item).where(Item.id.in_(deleted)))
+            {%- endif %}
         
-        return True
+        return [id in deleted for id in ids]
 {% endif %}
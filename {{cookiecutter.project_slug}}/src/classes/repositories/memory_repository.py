@@ -0,0 +1,239 @@
+"""In-memory item repository (DB_TYPE=memory)."""
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import threading
+import uuid
+
+from src.classes.repositories.base_repository import BaseRepository
+from src.utils.pagination import CursorKey
+from src.utils.tracing import traced
+
+ITEM_FIELDS = ("id", "name", "description", "price", "is_active", "created_at", "updated_at")
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes as UTC, so every stored key compares with every other."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class ItemRecord:
+    """One stored item.
+
+    Slots keep a record to seven fields with no per-instance dict. Records
+    are never changed once stored; an update stores a new record, so rows
+    already handed to callers stay consistent.
+    """
+
+    __slots__ = ITEM_FIELDS
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        price: float,
+        description: Optional[str] = None,
+        is_active: bool = True,
+        created_at: Optional[datetime] = None,
+        updated_at: Optional[datetime] = None,
+    ):
+        """Initialize record; timestamps default to now."""
+        now = datetime.now(timezone.utc)
+        self.id = id
+        self.name = name
+        self.description = description
+        self.price = price
+        self.is_active = bool(is_active)
+        self.created_at = _as_utc(created_at) if created_at else now
+        self.updated_at = _as_utc(updated_at) if updated_at else now
+
+    @property
+    def key(self) -> CursorKey:
+        """Sort key, the same (created_at, id) the database repositories order by."""
+        return self.created_at, self.id
+
+    def replace(self, changes: Dict[str, Any]) -> "ItemRecord":
+        """Get a copy with some fields changed."""
+        fields = {name: getattr(self, name) for name in ITEM_FIELDS}
+        fields.update(changes)
+        return ItemRecord(**fields)
+
+
+def _discard(keys: List[CursorKey], key: CursorKey) -> None:
+    """Remove key from a sorted key list, if present."""
+    index = bisect_left(keys, key)
+    if index < len(keys) and keys[index] == key:
+        del keys[index]
+
+
+class ItemStore:
+    """Items in process memory, with sorted secondary indexes.
+
+    Records are kept by id. The created_at index is a sorted list of
+    (created_at, id) keys, and the is_active index one such list per value,
+    so a page is a binary search plus a slice, like an index range scan.
+    Inserts with the newest created_at append to the end; deletes and key
+    changes shift the lists, which stays cheap for the dataset sizes this
+    store is meant for (benchmarks and reference data).
+    """
+
+    def __init__(self):
+        """Initialize empty store."""
+        self._rows: Dict[str, ItemRecord] = {}
+        self._by_created_at: List[CursorKey] = []
+        self._by_active: Dict[bool, List[CursorKey]] = {True: [], False: []}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _index(self, record: ItemRecord) -> None:
+        key = record.key
+        insort(self._by_created_at, key)
+        insort(self._by_active[record.is_active], key)
+
+    def _unindex(self, record: ItemRecord) -> None:
+        key = record.key
+        _discard(self._by_created_at, key)
+        _discard(self._by_active[record.is_active], key)
+
+    def get(self, id: str) -> Optional[ItemRecord]:
+        """Get a record by id."""
+        return self._rows.get(id)
+
+    def page(self, limit: int, after: Optional[CursorKey] = None, is_active: Optional[bool] = None) -> List[ItemRecord]:
+        """Get up to limit records ordered by (created_at, id), starting after the given key."""
+        with self._lock:
+            keys = self._by_created_at if is_active is None else self._by_active[is_active]
+            start = 0
+            if after is not None:
+                start = bisect_right(keys, (_as_utc(after[0]), after[1]))
+            return [self._rows[id] for _, id in keys[start:start + limit]]
+
+    def insert(self, records: Iterable[ItemRecord]) -> None:
+        """Store records, replacing any with the same id."""
+        with self._lock:
+            for record in records:
+                previous = self._rows.get(record.id)
+                if previous is not None:
+                    self._unindex(previous)
+                self._rows[record.id] = record
+                self._index(record)
+
+    def update(self, id: str, changes: Dict[str, Any]) -> Optional[ItemRecord]:
+        """Store a changed copy of a record; None if it does not exist."""
+        with self._lock:
+            previous = self._rows.get(id)
+            if previous is None:
+                return None
+            record = previous.replace(changes)
+            self._rows[id] = record
+            # Only a changed sort key or is_active moves the record in the indexes
+            if record.key != previous.key or record.is_active != previous.is_active:
+                self._unindex(previous)
+                self._index(record)
+            return record
+
+    def delete(self, id: str) -> bool:
+        """Delete a record, reporting whether it existed."""
+        with self._lock:
+            record = self._rows.pop(id, None)
+            if record is None:
+                return False
+            self._unindex(record)
+            return True
+
+    def clear(self) -> None:
+        """Delete every record."""
+        with self._lock:
+            self._rows.clear()
+            self._by_created_at.clear()
+            for keys in self._by_active.values():
+                keys.clear()
+
+
+class MemoryItemRepository(BaseRepository):
+    """Repository for items held in process memory.
+
+    Used with DB_TYPE=memory, to run the service without a database server:
+    for benchmarking the HTTP and service layers without I/O, and for
+    serving small reference datasets. Ordering and pagination match the
+    database repositories. Data belongs to one process and is lost on exit.
+    """
+
+    def __init__(self, db_manager):
+        """Initialize with the memory database manager owning the store."""
+        self.db_manager = db_manager
+        self.store: ItemStore = db_manager.store
+
+    @traced()
+    async def find_all(
+        self, limit: int = 100, after: Optional[CursorKey] = None, is_active: Optional[bool] = None
+    ) -> List[ItemRecord]:
+        """Find items ordered by (created_at, id), starting after the given key.
+
+        With is_active, only items with that value are returned, read from
+        the is_active index.
+        """
+        return self.store.page(limit, after, is_active)
+
+    async def stream_all(self, batch_size: int = 1000, is_active: Optional[bool] = None) -> AsyncIterator[ItemRecord]:
+        """Stream every item, one page of batch_size at a time.
+
+        Each page seeks past the last key, so items added or deleted while
+        streaming never shift the ones still to come.
+        """
+        after: Optional[CursorKey] = None
+        while True:
+            records = self.store.page(batch_size, after, is_active)
+            for record in records:
+                yield record
+            if len(records) < batch_size:
+                return
+            after = records[-1].key
+
+    @traced()
+    async def find_by_id(self, id: str) -> Optional[ItemRecord]:
+        """Find item by ID."""
+        return self.store.get(id)
+
+    @traced()
+    async def create(self, data: Dict[str, Any]) -> ItemRecord:
+        """Create a new item."""
+        record = ItemRecord(id=str(uuid.uuid4()), **data)
+        self.store.insert([record])
+        return record
+
+    @traced()
+    async def update(self, id: str, data: Dict[str, Any]) -> Optional[ItemRecord]:
+        """Update an item and return the new version."""
+        return self.store.update(id, {"updated_at": datetime.now(timezone.utc), **data})
+
+    @traced()
+    async def delete(self, id: str) -> bool:
+        """Delete an item."""
+        return self.store.delete(id)
+
+    @traced()
+    async def create_many(self, data: List[Dict[str, Any]]) -> List[ItemRecord]:
+        """Create many items, all with the same timestamps."""
+        now = datetime.now(timezone.utc)
+        records = [
+            ItemRecord(**{"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, **row})
+            for row in data
+        ]
+        self.store.insert(records)
+        return records
+
+    @traced()
+    async def update_many(self, updates: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[ItemRecord]]:
+        """Update many items; None for IDs that do not exist."""
+        now = datetime.now(timezone.utc)
+        return [self.store.update(id, {"updated_at": now, **data}) for id, data in updates]
+
+    @traced()
+    async def delete_many(self, ids: List[str]) -> List[bool]:
+        """Delete many items; False for IDs that do not exist."""
+        # Like the database backends, a repeated ID reports the same result each time
+        deleted = {id for id in set(ids) if self.store.delete(id)}
+        return [id in deleted for id in ids]
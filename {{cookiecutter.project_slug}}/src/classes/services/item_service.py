@@ -1,45 +1,297 @@
 """Business logic service for items."""
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, List, Optional, Tuple
+from datetime import datetime, timezone
+import uuid
 
-from src.classes.models.schemas import ItemCreate, ItemResponse
-from src.classes.repositories.item_repository import ItemRepository
+from pydantic import TypeAdapter, ValidationError
+
+from src.classes.models.schemas import (
+    ItemBatchResult,
+    ItemBatchUpdate,
+    ItemCreate,
+    ItemPage,
+    ItemResponse,
+)
+from src.classes.repositories.base_repository import BaseRepository
+from src.config import get_settings
+from src.utils.pagination import CursorKey, decode_cursor, encode_cursor
+from src.utils.single_flight import SingleFlight
+from src.utils.tracing import traced
+
+# Changed on every write; cached list pages from an older generation are ignored.
+# A missing generation (never set, or evicted) is replaced by a new one before
+# use, so it never matches a page cached under a generation that was lost.
+LIST_GENERATION_KEY = "items:list:generation"
+
+# Shared by all service instances so concurrent misses on a key load it once
+_loads = SingleFlight()
+
+# Built once; validates a whole list of rows in a single pydantic-core call
+_item_list_adapter = TypeAdapter(List[ItemResponse])
+
+
+class BatchTooLargeError(ValueError):
+    """Raised when a batch request has more entries than BATCH_MAX_ITEMS."""
 
 
 class ItemService:
     """Service layer for item business logic."""
     
-    def __init__(self, repository: ItemRepository):
-        """Initialize service with repository."""
+    def __init__(self, repository: BaseRepository, cache=None):
+        """Initialize service with repository and optional cache manager."""
         self.repository = repository
+        self.cache = cache
+        self.settings = get_settings()
+    
+    @staticmethod
+    def item_cache_key(item_id: str) -> str:
+        """Get the cache key for a single item."""
+        return f"item:{item_id}"
+    
+    @staticmethod
+    def item_version_key(item_id: str) -> str:
+        """Get the cache key for an item's version, changed on every write to it."""
+        return f"item:{item_id}:version"
+    
+    @staticmethod
+    def list_cache_key(cursor: Optional[str], limit: int) -> str:
+        """Get the cache key for a page of items."""
+        return f"items:list:{cursor or 'first'}:{limit}"
+    
+    def _to_response(self, row: Any) -> ItemResponse:
+        """Convert a row read from the database into a response model."""
+        return ItemResponse.model_validate(row, from_attributes=True)
+    
+    def _to_responses(self, rows: Iterable[Any]) -> List[ItemResponse]:
+        """Convert rows read from the database into response models.
+        
+        Validating the whole list in one pydantic-core call is faster than
+        one model per row, and faster than skipping validation with
+        model_construct, whose Python-level setup costs more per row.
+        """
+        return _item_list_adapter.validate_python(rows, from_attributes=True)
+    
+    async def _invalidate(self, *item_ids: str) -> None:
+        """Evict items and retire all cached list pages."""
+        if self.cache is None:
+            return
+        if item_ids:
+            # Rather than deleting the entries, which a load that started before
+            # this write could fill again, give the items versions no entry has
+            await self.cache.set_many(
+                {self.item_version_key(item_id): uuid.uuid4().hex for item_id in item_ids},
+                ttl=self._item_version_ttl,
+            )
+        await self.cache.set(LIST_GENERATION_KEY, uuid.uuid4().hex, ttl=0)
+    
+    @property
+    def _item_version_ttl(self) -> int:
+        """Get the TTL of item versions, long enough to outlive the entries stamped with them."""
+        return 2 * max(self.settings.CACHE_ITEM_TTL, self.settings.CACHE_NEGATIVE_TTL)
+    
+    async def _current_version(self, key: str, version: Optional[str], ttl: int) -> Optional[str]:
+        """Get the version stored under key, storing a new one if it is missing.
+        
+        Returns None if the cache could not store or read one; the caller
+        should then skip the cache rather than stamp entries with None.
+        """
+        if version is not None:
+            return version
+        version = uuid.uuid4().hex
+        if await self.cache.add(key, version, ttl=ttl):
+            return version
+        # Another request stored one first
+        return await self.cache.get(key)
+    
+    @traced()
+    async def list_items(self, limit: int = 100, cursor: Optional[str] = None) -> ItemPage:
+        """List a page of items, starting after the given cursor.
+        
+        Raises InvalidCursorError if the cursor is malformed.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        if self.cache is None:
+            return await self._load_items(limit, after)
+        
+        key = self.list_cache_key(cursor, limit)
+        cached = await self.cache.get_many([LIST_GENERATION_KEY, key])
+        generation = await self._current_version(LIST_GENERATION_KEY, cached.get(LIST_GENERATION_KEY), ttl=0)
+        if generation is None:
+            return await self._load_items(limit, after)
+        page = cached.get(key)
+        if page is not None and page.get("generation") == generation:
+            return ItemPage.model_validate(page["page"])
+        
+        # Keyed by generation too, so a request made after a write never
+        # waits on a load that started before it
+        return await _loads.do(
+            f"{key}:{generation}", lambda: self._load_items_into_cache(key, generation, limit, after)
+        )
+    
+    async def _load_items(self, limit: int, after: Optional[CursorKey]) -> ItemPage:
+        """Load a page of items from the repository."""
+        # Fetch one extra row to know whether another page follows
+        items = await self.repository.find_all(limit=limit + 1, after=after)
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+        return ItemPage.model_construct(items=self._to_responses(items), next_cursor=next_cursor)
+    
+    async def _load_items_into_cache(
+        self, key: str, generation: str, limit: int, after: Optional[CursorKey]
+    ) -> ItemPage:
+        """Load a page of items and cache it under the current list generation."""
+        page = await self._load_items(limit, after)
+        cached = {"generation": generation, "page": page.model_dump(mode="json")}
+        await self.cache.fill(key, cached, ttl=self.settings.CACHE_LIST_TTL)
+        return page
     
-    async def list_items(self, skip: int = 0, limit: int = 100) -> List[ItemResponse]:
-        """List items with pagination."""
-        items = await self.repository.find_all(skip=skip, limit=limit)
-        return [ItemResponse.from_orm(item) for item in items]
+    async def export_items(self, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """Stream every item as NDJSON, in chunks of roughly chunk_size bytes."""
+        buffer = bytearray()
+        async for item in self.repository.stream_all():
+            buffer += self._to_response(item).model_dump_json().encode()
+            buffer += b"\n"
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
     
+    @traced()
     async def get_item(self, item_id: str) -> Optional[ItemResponse]:
-        """Get item by ID."""
+        """Get item by ID.
+        
+        Cached entries are stamped with the item's version when their load
+        started, so an entry filled by a load that raced a write is ignored.
+        """
+        if self.cache is None:
+            return await self._load_item(item_id)
+        
+        key = self.item_cache_key(item_id)
+        version_key = self.item_version_key(item_id)
+        cached = await self.cache.get_many([version_key, key])
+        version = await self._current_version(version_key, cached.get(version_key), ttl=self._item_version_ttl)
+        if version is None:
+            return await self._load_item(item_id)
+        entry = cached.get(key)
+        if entry is not None and entry.get("version") == version:
+            # A None item caches its absence, so repeated 404s skip the database
+            return None if entry["item"] is None else ItemResponse.model_validate(entry["item"])
+        
+        return await _loads.do(f"{key}:{version}", lambda: self._load_item_into_cache(key, version, item_id))
+    
+    async def _load_item(self, item_id: str) -> Optional[ItemResponse]:
+        """Load an item from the repository."""
         item = await self.repository.find_by_id(item_id)
         if item:
-            return ItemResponse.from_orm(item)
+            return self._to_response(item)
         return None
     
+    async def _load_item_into_cache(self, key: str, version: str, item_id: str) -> Optional[ItemResponse]:
+        """Load an item and cache it, or cache its absence, under the version read before loading."""
+        item = await self._load_item(item_id)
+        if item is None:
+            entry = {"version": version, "item": None}
+            await self.cache.fill(key, entry, ttl=self.settings.CACHE_NEGATIVE_TTL)
+        else:
+            entry = {"version": version, "item": item.model_dump(mode="json")}
+            await self.cache.fill(key, entry, ttl=self.settings.CACHE_ITEM_TTL)
+        return item
+    
+    @traced()
     async def create_item(self, item_data: ItemCreate) -> ItemResponse:
         """Create a new item."""
-        item = await self.repository.create(item_data.dict())
-        return ItemResponse.from_orm(item)
+        item = await self.repository.create(item_data.model_dump())
+        await self._invalidate()
+        return self._to_response(item)
     
+    @traced()
     async def update_item(self, item_id: str, item_data: ItemCreate) -> Optional[ItemResponse]:
         """Update an existing item."""
-        update_data = item_data.dict()
-        update_data["updated_at"] = datetime.utcnow()
+        update_data = item_data.model_dump()
+        update_data["updated_at"] = datetime.now(timezone.utc)
         
         item = await self.repository.update(item_id, update_data)
         if item:
-            return ItemResponse.from_orm(item)
+            await self._invalidate(item_id)
+            return self._to_response(item)
         return None
     
+    @traced()
     async def delete_item(self, item_id: str) -> bool:
         """Delete an item."""
-        return await self.repository.delete(item_id)
+        deleted = await self.repository.delete(item_id)
+        if deleted:
+            await self._invalidate(item_id)
+        return deleted
+    
+    def _check_batch_size(self, size: int) -> None:
+        """Reject batches larger than BATCH_MAX_ITEMS."""
+        if size > self.settings.BATCH_MAX_ITEMS:
+            raise BatchTooLargeError(
+                f"Batch has {size} entries; the limit is {self.settings.BATCH_MAX_ITEMS}"
+            )
+    
+    @traced()
+    async def create_items(self, payloads: List[Any]) -> List[ItemBatchResult]:
+        """Create many items in one batched write.
+        
+        Each entry is validated on its own, so invalid entries are reported
+        in their result instead of failing the whole batch.
+        """
+        self._check_batch_size(len(payloads))
+        results: List[Optional[ItemBatchResult]] = [None] * len(payloads)
+        valid: List[Tuple[int, ItemCreate]] = []
+        for index, payload in enumerate(payloads):
+            try:
+                valid.append((index, ItemCreate.model_validate(payload)))
+            except ValidationError as e:
+                results[index] = ItemBatchResult(index=index, status=422, error=str(e))
+        
+        if valid:
+            items = await self.repository.create_many([item.model_dump() for _, item in valid])
+            for (index, _), item in zip(valid, items):
+                response = self._to_response(item)
+                results[index] = ItemBatchResult(index=index, id=response.id, status=201, item=response)
+            await self._invalidate()
+        return results
+    
+    @traced()
+    async def update_items(self, payloads: List[Any]) -> List[ItemBatchResult]:
+        """Update many items in one batched write, validating each entry on its own."""
+        self._check_batch_size(len(payloads))
+        results: List[Optional[ItemBatchResult]] = [None] * len(payloads)
+        valid: List[Tuple[int, ItemBatchUpdate]] = []
+        for index, payload in enumerate(payloads):
+            try:
+                valid.append((index, ItemBatchUpdate.model_validate(payload)))
+            except ValidationError as e:
+                results[index] = ItemBatchResult(index=index, status=422, error=str(e))
+        
+        if valid:
+            now = datetime.now(timezone.utc)
+            updates = [(item.id, {**item.model_dump(exclude={"id"}), "updated_at": now}) for _, item in valid]
+            items = await self.repository.update_many(updates)
+            for (index, update), item in zip(valid, items):
+                if item is None:
+                    results[index] = ItemBatchResult(index=index, id=update.id, status=404, error="Item not found")
+                else:
+                    response = self._to_response(item)
+                    results[index] = ItemBatchResult(index=index, id=response.id, status=200, item=response)
+            await self._invalidate(*(item.id for _, item in valid))
+        return results
+    
+    @traced()
+    async def delete_items(self, item_ids: List[str]) -> List[ItemBatchResult]:
+        """Delete many items in one batched write."""
+        self._check_batch_size(len(item_ids))
+        deleted = await self.repository.delete_many(item_ids)
+        if any(deleted):
+            await self._invalidate(*(item_id for item_id, ok in zip(item_ids, deleted) if ok))
+        return [
+            ItemBatchResult(index=index, id=item_id, status=204)
+            if ok else ItemBatchResult(index=index, id=item_id, status=404, error="Item not found")
+            for index, (item_id, ok) in enumerate(zip(item_ids, deleted))
+        ]
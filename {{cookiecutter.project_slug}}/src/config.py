@@ -1,5 +1,5 @@
 """Configuration management."""
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pathlib import Path
 import yaml
 from pydantic_settings import BaseSettings
@@ -15,27 +15,111 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     LOG_LEVEL: str = "INFO"
+    FAST_JSON: bool = True  # Encode JSON responses with orjson
+    LOG_ASYNC: bool = True  # Write logs from a background thread instead of the caller's
+    LOG_QUEUE_SIZE: int = 10000  # Records beyond this are dropped (and counted) rather than blocking
+    LOG_BATCH_SIZE: int = 256  # Max records per write to stdout
+    LOG_LEVELS: Dict[str, str] = {}  # Per-logger levels, e.g. {"sqlalchemy.engine": "WARNING"}
+    LOG_SAMPLE_RATES: Dict[str, float] = {}  # Fraction of sub-WARNING records kept per logger
     
     # Database
-    DB_TYPE: str = "{{ cookiecutter.database_type }}"
+    DB_TYPE: str = "{{ cookiecutter.database_type }}"  # "memory" keeps items in process memory, with no database server
     DB_HOST: str = "localhost"
     DB_PORT: int = 5432
     DB_NAME: str = "{{ cookiecutter.project_slug }}"
     DB_USER: str = "admin"
     DB_PASSWORD: str = "changeme"
+    DB_URL: Optional[str] = None  # Full URL overriding the DB_* connection fields
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_MAX_IDLE_TIME: int = 1800  # MongoDB: close pooled connections idle this long (seconds)
+    DB_POOL_PRE_PING: bool = True
+    DB_CREATE_TABLES: bool = True
+    DB_MEMORY_SEED_FILE: Optional[str] = None  # JSON lines (as from /api/v1/items/export) loaded when DB_TYPE=memory
+    DB_SLOW_QUERY_THRESHOLD: float = 0.5  # Log statements slower than this (seconds); 0 disables
+    DB_QUERY_LOG_TOP_N: int = 20  # Slowest executions kept for /debug/queries
+    DB_QUERY_MAX_SHAPES: int = 200  # Distinct statement shapes tracked; the rest share one
+    
+    # Batch endpoints
+    BATCH_MAX_ITEMS: int = 1000
     
     # Cache
     CACHE_TYPE: str = "{{ cookiecutter.cache_type }}"
     CACHE_HOST: str = "localhost"
     CACHE_PORT: int = 6379
     CACHE_PASSWORD: Optional[str] = None
+    CACHE_DB: int = 0
+    CACHE_NODES: Optional[str] = None  # Comma-separated "host:port" list (memcached)
+    CACHE_MAX_CONNECTIONS: int = 50
+    CACHE_POOL_TIMEOUT: float = 5.0
+    CACHE_SOCKET_TIMEOUT: float = 2.0
+    
+    # Read-through caching in the service layer (seconds)
+    CACHE_ITEM_TTL: int = 300
+    CACHE_LIST_TTL: int = 60
+    CACHE_NEGATIVE_TTL: int = 30
+    
+    # In-process L1 cache in front of the shared cache
+    CACHE_LOCAL_ENABLED: bool = False
+    CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_LOCAL_TTL: int = 30
+    CACHE_INVALIDATION_CHANNEL: str = "{{ cookiecutter.project_slug }}:cache-invalidation"
+    
+    # Metrics (histogram bucket upper bounds, in seconds)
+    METRICS_LATENCY_BUCKETS: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+    METRICS_BACKEND_BUCKETS: List[float] = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+    WORKER_METRICS_PORT: Optional[int] = None  # Serve src.worker metrics on their own port
+    
+    # Event loop lag monitor (seconds)
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.25  # How often lag is measured
+    LOOP_STALL_THRESHOLD: float = 0.1  # Log the blocking stack once the loop is this far behind
+    
+    # Background dependency checks served by /ready and /healthz (seconds)
+    HEALTH_CHECK_INTERVAL: float = 5.0
+    HEALTH_CHECK_TIMEOUT: float = 2.0  # A check slower than this counts as unhealthy
+    HEALTH_MAX_STALENESS: float = 15.0  # Probes fail once the last check is older than this
+    
+    # Profiling and debug endpoints (off by default)
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"  # Profile a request carrying this header
+    PROFILING_TOKEN: Optional[str] = None  # Required header value; set it in production
+    PROFILING_SAMPLE_RATE: float = 0.0  # Fraction of requests and jobs profiled without the header
+    PROFILING_INTERVAL: float = 0.005  # Seconds between stack samples
+    PROFILING_BUFFER_SIZE: int = 20  # Most recent profiles kept in memory
+    PROFILING_DUMP_DIR: str = "/tmp/{{ cookiecutter.project_slug }}-profiles"  # Where src.worker writes profiles on SIGUSR1
+    DEBUG_QUERIES_ENABLED: bool = False  # Serve /debug/queries (needs the profiling header too)
+    
+    # Tracing
+    TRACING_EXPORTER: str = "otlp"  # otlp, file, console or none
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"  # OTLP/HTTP, e.g. a local collector
+    TRACING_FILE_PATH: str = "traces.jsonl"  # Used by the file exporter
+    TRACING_SAMPLE_RATE: float = 0.1  # Fraction of new traces sampled up front
+    TRACING_TAIL_KEEP: bool = True  # Also export unsampled traces that were slow or failed
+    TRACING_SLOW_THRESHOLD: float = 1.0  # Seconds
+    TRACING_MAX_PENDING_TRACES: int = 2048  # Unsampled traces held until their root span ends
+    TRACING_BATCH_SIZE: int = 512
+    TRACING_QUEUE_SIZE: int = 2048
+    TRACING_EXPORT_INTERVAL: float = 5.0  # Seconds between batch exports
     
     # Queue
     QUEUE_TYPE: str = "{{ cookiecutter.queue_type }}"
     QUEUE_HOST: str = "localhost"
     QUEUE_PORT: int = 9092
     QUEUE_USER: Optional[str] = None
-    QUEUE_PASSWORD: Optional[str] = None
+    QUEUE_PASSWORD: Optional[str] = None  # With QUEUE_USER: SASL for Kafka, AWS access key for SQS
+    QUEUE_NAME: str = "{{ cookiecutter.project_slug }}-queue"  # Topic (Kafka) or queue name
+    QUEUE_REGION: str = "us-east-1"  # SQS only
+    QUEUE_ENDPOINT_URL: Optional[str] = None  # SQS only, e.g. a local ElasticMQ or LocalStack
+    
+    # Queue consumer (src.worker)
+    CONSUMER_CONCURRENCY: int = 32  # Messages handled at once
+    CONSUMER_BATCH_SIZE: int = 100  # Most messages fetched at once, and held waiting for a handler
+    CONSUMER_COMMIT_INTERVAL: float = 1.0  # Seconds between offset commits / acks
+    CONSUMER_COMMIT_BATCH: int = 100  # Commit sooner once this many messages have finished
     
     class Config:
         env_file = ".env"
@@ -6,34 +6,46 @@ from flask import current_app
 from fastapi import Depends, Request
 {% endif -%}
 
+from src.classes.repositories.base_repository import BaseRepository
 from src.classes.repositories.item_repository import ItemRepository
+from src.classes.repositories.memory_repository import MemoryItemRepository
 from src.classes.services.item_service import ItemService
+from src.utils.memory_database import MemoryDatabaseManager
+
+
+def create_item_repository(db_manager) -> BaseRepository:
+    """Get the item repository for the database manager in use."""
+    if isinstance(db_manager, MemoryDatabaseManager):
+        return MemoryItemRepository(db_manager)
+    return ItemRepository(db_manager)
 
 
 {% if cookiecutter.web_framework == 'fastapi' -%}
 # FastAPI dependencies
-async def get_item_repository(request: Request) -> ItemRepository:
+async def get_item_repository(request: Request) -> BaseRepository:
     """Get item repository instance."""
     db_manager = getattr(request.app.state, 'db_manager', None)
-    return ItemRepository(db_manager)
+    return create_item_repository(db_manager)
 
 
 async def get_item_service(
-    repository: ItemRepository = Depends(get_item_repository)
+    request: Request,
+    repository: BaseRepository = Depends(get_item_repository)
 ) -> ItemService:
     """Get item service instance."""
-    return ItemService(repository)
+    cache_manager = getattr(request.app.state, 'cache_manager', None)
+    return ItemService(repository, cache_manager)
 {% endif -%}
 
 {% if cookiecutter.web_framework == 'flask' -%}
 # Flask dependencies
-async def get_item_repository_flask() -> ItemRepository:
+async def get_item_repository_flask() -> BaseRepository:
     """Get item repository instance for Flask."""
-    return ItemRepository(current_app.db_manager)
+    return create_item_repository(current_app.db_manager)
 
 
 async def get_item_service_flask() -> ItemService:
     """Get item service instance for Flask."""
     repository = await get_item_repository_flask()
-    return ItemService(repository)
+    return ItemService(repository, current_app.cache_manager)
 {% endif -%}
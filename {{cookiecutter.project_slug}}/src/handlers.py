@@ -0,0 +1,19 @@
+"""Message handlers run by src.worker.
+
+Register an async function per message type with @handler("type");
+messages with no type, or a type without a handler, go to the "default"
+handler. Handlers run concurrently (up to CONSUMER_CONCURRENCY), so keep
+them non-blocking. A message is committed once its handler returns; an
+exception marks it failed.
+"""
+import logging
+
+from src.utils.consumer import QueueMessage, handler
+
+logger = logging.getLogger(__name__)
+
+
+@handler()
+async def handle_default(message: QueueMessage) -> None:
+    """Example handler: log the message. Replace with the service's own work."""
+    logger.debug(f"Received {message.type} message: {message.body[:200]!r}")
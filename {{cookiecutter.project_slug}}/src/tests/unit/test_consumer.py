@@ -0,0 +1,118 @@
+"""Tests for the queue consumer's ack tracking and commits."""
+import asyncio
+
+from src.utils.consumer import AckTracker, Consumer, QueueMessage
+
+
+def test_ready_takes_only_the_finished_head():
+    tracker = AckTracker()
+    for seq in range(4):
+        tracker.track("p0", seq, f"item-{seq}")
+
+    tracker.done("p0", 1)
+    tracker.done("p0", 3)
+    assert tracker.ready() == {}
+
+    tracker.done("p0", 0)
+    assert tracker.ready() == {"p0": [(0, "item-0"), (1, "item-1")]}
+    assert tracker.ready() == {}
+
+    tracker.done("p0", 2)
+    assert tracker.ready() == {"p0": [(2, "item-2"), (3, "item-3")]}
+
+
+def test_partitions_are_committed_independently():
+    tracker = AckTracker()
+    tracker.track("p0", 10)
+    tracker.track("p0", 11)
+    tracker.track("p1", 5)
+
+    tracker.done("p0", 11)
+    tracker.done("p1", 5)
+    assert tracker.ready() == {"p1": [(5, None)]}
+
+    tracker.done("p0", 10)
+    assert tracker.ready() == {"p0": [(10, None), (11, None)]}
+
+
+def test_done_for_a_forgotten_partition_is_ignored():
+    tracker = AckTracker()
+    generation = tracker.track("p0", 7)
+    tracker.forget(["p0"])
+
+    tracker.done("p0", 7, generation)
+    assert tracker.ready() == {}
+
+
+def test_stale_done_does_not_commit_a_redelivered_message():
+    tracker = AckTracker()
+    old = tracker.track("p0", 7)
+    tracker.forget(["p0"])
+
+    # The partition comes back and the same record is fetched again
+    new = tracker.track("p0", 7)
+    assert new != old
+
+    # The handler for the first copy finishes while the second is in flight
+    tracker.done("p0", 7, old)
+    assert tracker.ready() == {}
+
+    tracker.done("p0", 7, new)
+    assert tracker.ready() == {"p0": [(7, None)]}
+
+
+class FakeSource:
+    """Source handing out a fixed set of messages and recording commits."""
+
+    def __init__(self, count):
+        self.tracker = AckTracker()
+        self.messages = [QueueMessage(b"body", partition="p0", seq=seq) for seq in range(count)]
+        self.committed = []
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def fetch(self, max_messages):
+        batch, self.messages = self.messages[:max_messages], self.messages[max_messages:]
+        for message in batch:
+            message.generation = self.tracker.track(message.partition, message.seq)
+        if not batch:
+            await asyncio.sleep(0.01)
+        return batch
+
+    async def done(self, message, ok):
+        self.tracker.done(message.partition, message.seq, message.generation)
+
+    async def commit(self):
+        for finished in self.tracker.ready().values():
+            self.committed.extend(seq for seq, _ in finished)
+
+
+def test_consumer_commits_every_message_in_order():
+    source = FakeSource(50)
+    failing = {3, 17}
+
+    async def handle(message):
+        # Finish out of order
+        await asyncio.sleep((50 - message.seq) / 10000)
+        if message.seq in failing:
+            raise ValueError("boom")
+
+    async def main():
+        consumer = Consumer(source, handlers={"default": handle}, concurrency=8, batch_size=10, commit_interval=0.01)
+        stopping = asyncio.Event()
+        run = asyncio.ensure_future(consumer.run(stopping))
+        while source.messages:
+            await asyncio.sleep(0.01)
+        stopping.set()
+        await run
+        return consumer
+
+    consumer = asyncio.run(main())
+
+    assert source.committed == list(range(50))
+    assert consumer.processed == 50
+    assert consumer.failed == len(failing)
@@ -0,0 +1,154 @@
+"""Tests for item caching in ItemService."""
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+from src.classes.models.schemas import ItemCreate
+from src.classes.repositories.memory_repository import ItemStore, MemoryItemRepository
+from src.classes.services.item_service import LIST_GENERATION_KEY, ItemService
+
+
+class DictCache:
+    """Cache manager storing values in a dict, ignoring TTLs."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def get_many(self, keys):
+        return {key: self.data[key] for key in keys if key in self.data}
+
+    async def set(self, key, value, ttl=300):
+        self.data[key] = value
+        return True
+
+    async def fill(self, key, value, ttl=300):
+        self.data[key] = value
+        return True
+
+    async def add(self, key, value, ttl=300):
+        if key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    async def set_many(self, mapping, ttl=300):
+        self.data.update(mapping)
+        return True
+
+    async def delete(self, key):
+        return self.data.pop(key, None) is not None
+
+    async def delete_many(self, keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+class SlowRepository(MemoryItemRepository):
+    """Memory repository whose next find_by_id reads the row, then waits to return it."""
+
+    def __init__(self):
+        super().__init__(SimpleNamespace(store=ItemStore()))
+        self.release = None
+        self.loading = asyncio.Event()
+
+    def pause_next_load(self):
+        self.release = asyncio.Event()
+
+    async def find_by_id(self, id):
+        row = await super().find_by_id(id)
+        release, self.release = self.release, None
+        if release is not None:
+            self.loading.set()
+            await release.wait()
+        return row
+
+
+class RecordingRepository(MemoryItemRepository):
+    """Memory repository that keeps the data each update was given."""
+
+    def __init__(self):
+        super().__init__(SimpleNamespace(store=ItemStore()))
+        self.updates = []
+
+    async def update(self, id, data):
+        self.updates.append(data)
+        return await super().update(id, data)
+
+    async def update_many(self, updates):
+        self.updates.extend(data for _, data in updates)
+        return await super().update_many(updates)
+
+
+def test_updates_write_utc_aware_timestamps():
+    async def main():
+        repository = RecordingRepository()
+        service = ItemService(repository)
+        item = await service.create_item(ItemCreate(name="old", price=1.0))
+
+        updated = await service.update_item(item.id, ItemCreate(name="new", price=2.0))
+        [result] = await service.update_items([{"id": item.id, "name": "newer", "price": 3.0}])
+
+        # A naive value would be read as local time by timestamptz columns
+        assert [data["updated_at"].utcoffset() for data in repository.updates] == [timedelta(0)] * 2
+        assert updated.updated_at.utcoffset() == timedelta(0)
+        assert result.item.updated_at.utcoffset() == timedelta(0)
+        assert result.item.updated_at >= updated.updated_at >= item.created_at
+
+    asyncio.run(main())
+
+
+def test_load_that_races_an_update_is_not_served():
+    async def main():
+        repository = SlowRepository()
+        service = ItemService(repository, DictCache())
+        item = await service.create_item(ItemCreate(name="old", price=1.0))
+
+        repository.pause_next_load()
+        release = repository.release
+        slow_load = asyncio.ensure_future(service.get_item(item.id))
+        await repository.loading.wait()
+
+        await service.update_item(item.id, ItemCreate(name="new", price=2.0))
+        # Started after the write, so it must not join the slow load
+        assert (await asyncio.wait_for(service.get_item(item.id), 1.0)).name == "new"
+
+        release.set()
+        assert (await slow_load).name == "old"
+        assert (await service.get_item(item.id)).name == "new"
+
+    asyncio.run(main())
+
+
+def test_load_that_races_a_delete_is_not_served():
+    async def main():
+        repository = SlowRepository()
+        service = ItemService(repository, DictCache())
+        item = await service.create_item(ItemCreate(name="old", price=1.0))
+
+        repository.pause_next_load()
+        release = repository.release
+        slow_load = asyncio.ensure_future(service.get_item(item.id))
+        await repository.loading.wait()
+
+        await service.delete_item(item.id)
+        release.set()
+        assert (await slow_load).name == "old"
+        assert await service.get_item(item.id) is None
+
+    asyncio.run(main())
+
+
+def test_missing_list_generation_does_not_revive_old_pages():
+    async def main():
+        cache = DictCache()
+        service = ItemService(SlowRepository(), cache)
+        assert (await service.list_items(limit=10)).items == []
+
+        await service.create_item(ItemCreate(name="new", price=1.0))
+        # As if the cache evicted it
+        await cache.delete(LIST_GENERATION_KEY)
+        assert [item.name for item in (await service.list_items(limit=10)).items] == ["new"]
+
+    asyncio.run(main())
@@ -1,54 +1,408 @@
 """Cache manager."""
-{% if cookiecutter.cache_type != 'none' %}
-from typing import Optional, Any
+{%- if cookiecutter.cache_type == 'redis' %}
+from typing import Any, Dict, Iterable, Mapping, Optional
+import json
 import logging
 
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+{%- elif cookiecutter.cache_type == 'memcached' %}
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+
+import aiomcache
+from aiomcache.exceptions import ClientException
+{%- endif %}
+{%- if cookiecutter.cache_type != 'none' %}
+{% endif %}
+from src.utils.local_cache import TwoTierCache
+{%- if cookiecutter.enable_metrics == 'yes' and cookiecutter.cache_type != 'none' %}
+from src.utils.metrics import InstrumentedCache, get_metrics
+{%- endif %}
+{%- if cookiecutter.enable_tracing == 'yes' and cookiecutter.cache_type != 'none' %}
+from src.utils.tracing import TracedCache
+{%- endif %}
+{%- if cookiecutter.cache_type == 'redis' %}
+
 logger = logging.getLogger(__name__)
 
 
 class CacheManager:
-    """Cache connection manager."""
+    """Redis cache manager backed by a shared connection pool."""
     
     def __init__(self, settings, infra_config):
         """Initialize cache manager."""
         self.settings = settings
         self.infra_config = infra_config
-        self._client = None
+        self._pool: Optional[aioredis.BlockingConnectionPool] = None
+        self._client: Optional[aioredis.Redis] = None
+    
+    @property
+    def client(self) -> Optional[aioredis.Redis]:
+        """Get the Redis client (all clients share one pool)."""
+        return self._client
+    
+    def _pool_settings(self) -> Dict[str, Any]:
+        """Get pool settings, preferring infrastructure.yaml over environment."""
+        cache_config = getattr(self.infra_config, "cache", None) or {}
+        overrides = cache_config.get("settings") or {}
+        return {
+            "max_connections": overrides.get("max_connections", self.settings.CACHE_MAX_CONNECTIONS),
+            "timeout": overrides.get("pool_timeout", self.settings.CACHE_POOL_TIMEOUT),
+            "socket_timeout": overrides.get("socket_timeout", self.settings.CACHE_SOCKET_TIMEOUT),
+            "socket_connect_timeout": overrides.get("socket_timeout", self.settings.CACHE_SOCKET_TIMEOUT),
+            "decode_responses": overrides.get("decode_responses", True),
+        }
     
     async def initialize(self) -> None:
-        """Initialize cache connection."""
-        logger.info(f"Initializing {self.settings.CACHE_TYPE} cache")
-        # Implementation depends on cache type
-        pass
+        """Initialize cache connection pool."""
+        pool_settings = self._pool_settings()
+        logger.info(
+            f"Initializing redis cache at {self.settings.CACHE_HOST}:{self.settings.CACHE_PORT} "
+            f"(max_connections={pool_settings['max_connections']})"
+        )
+        # A blocking pool makes callers wait for a free connection instead of
+        # failing with "Too many connections" when the pool is exhausted.
+        self._pool = aioredis.BlockingConnectionPool(
+            host=self.settings.CACHE_HOST,
+            port=self.settings.CACHE_PORT,
+            db=self.settings.CACHE_DB,
+            password=self.settings.CACHE_PASSWORD or None,
+            **pool_settings,
+        )
+        self._client = aioredis.Redis(connection_pool=self._pool)
     
     async def close(self) -> None:
-        """Close cache connection."""
+        """Close cache connection pool."""
         logger.info("Closing cache connection")
         if self._client:
-            # Close connection based on type
-            pass
+            await self._client.aclose()
+            await self._pool.disconnect()
+            self._client = None
+            self._pool = None
+    
+    @staticmethod
+    def _dumps(value: Any) -> str:
+        """Serialize a value for storage."""
+        return json.dumps(value, default=str)
+    
+    @staticmethod
+    def _loads(raw: Any) -> Any:
+        """Deserialize a stored value."""
+        return json.loads(raw)
     
     async def get(self, key: str) -> Optional[Any]:
         """Get value from cache."""
-        pass
+        if self._client is None:
+            return None
+        try:
+            raw = await self._client.get(key)
+        except RedisError as e:
+            logger.warning(f"Cache get failed for {key}: {e}")
+            return None
+        return self._loads(raw) if raw is not None else None
     
     async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
-        """Set value in cache."""
-        pass
+        """Set value in cache. A ttl of 0 or less stores without expiry."""
+        if self._client is None:
+            return False
+        try:
+            return bool(await self._client.set(key, self._dumps(value), ex=ttl if ttl > 0 else None))
+        except RedisError as e:
+            logger.warning(f"Cache set failed for {key}: {e}")
+            return False
+    
+    async def fill(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Store a value just loaded from the source of truth (same as set here)."""
+        return await self.set(key, value, ttl)
+    
+    async def add(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value only if the key is missing (SET NX). Returns whether it was stored."""
+        if self._client is None:
+            return False
+        try:
+            return bool(await self._client.set(key, self._dumps(value), ex=ttl if ttl > 0 else None, nx=True))
+        except RedisError as e:
+            logger.warning(f"Cache add failed for {key}: {e}")
+            return False
     
     async def delete(self, key: str) -> bool:
         """Delete value from cache."""
-        pass
+        if self._client is None:
+            return False
+        try:
+            return await self._client.delete(key) > 0
+        except RedisError as e:
+            logger.warning(f"Cache delete failed for {key}: {e}")
+            return False
+    
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values in one round trip. Missing keys are omitted."""
+        keys = list(keys)
+        if self._client is None or not keys:
+            return {}
+        try:
+            values = await self._client.mget(keys)
+        except RedisError as e:
+            logger.warning(f"Cache get_many failed for {len(keys)} keys: {e}")
+            return {}
+        return {key: self._loads(raw) for key, raw in zip(keys, values) if raw is not None}
+    
+    async def set_many(self, mapping: Mapping[str, Any], ttl: int = 300) -> bool:
+        """Set several values in one pipelined round trip."""
+        if self._client is None or not mapping:
+            return False
+        try:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(key, self._dumps(value), ex=ttl if ttl > 0 else None)
+                results = await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Cache set_many failed for {len(mapping)} keys: {e}")
+            return False
+        return all(results)
+    
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several values in one round trip. Returns the number deleted."""
+        keys = list(keys)
+        if self._client is None or not keys:
+            return 0
+        try:
+            return await self._client.delete(*keys)
+        except RedisError as e:
+            logger.warning(f"Cache delete_many failed for {len(keys)} keys: {e}")
+            return 0
     
     async def health_check(self) -> bool:
         """Check cache health."""
+        if self._client is None:
+            return False
         try:
-            # Perform health check based on cache type
+            return bool(await self._client.ping())
+        except Exception as e:
+            logger.error(f"Cache health check failed: {e}")
+            return False
+{%- elif cookiecutter.cache_type == 'memcached' %}
+
+logger = logging.getLogger(__name__)
+
+CACHE_ERRORS = (ClientException, OSError, asyncio.TimeoutError)
+
+# Memcached keys must be at most 250 bytes with no whitespace or control characters
+MAX_KEY_LENGTH = 250
+
+
+class ConsistentHashRing:
+    """Consistent-hash ring mapping keys to cache nodes.
+    
+    Each node is placed on the ring at many virtual points so keys spread
+    evenly, and adding or removing a node only remaps that node's share.
+    """
+    
+    def __init__(self, nodes: Iterable[str], virtual_nodes: int = 160):
+        """Build the ring for the given nodes."""
+        points = sorted(
+            (self._hash(f"{node}#{replica}"), node)
+            for node in nodes
+            for replica in range(virtual_nodes)
+        )
+        if not points:
+            raise ValueError("ConsistentHashRing requires at least one node")
+        self._hashes: List[int] = [point for point, _ in points]
+        self._nodes: List[str] = [node for _, node in points]
+    
+    @staticmethod
+    def _hash(value: str) -> int:
+        """Hash a value to a position on the ring."""
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+    
+    def get_node(self, key: str) -> str:
+        """Get the node owning a key."""
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class CacheManager:
+    """Memcached cache manager sharding keys over a consistent-hash ring."""
+    
+    def __init__(self, settings, infra_config):
+        """Initialize cache manager."""
+        self.settings = settings
+        self.infra_config = infra_config
+        self._ring: Optional[ConsistentHashRing] = None
+        self._clients: Dict[str, aiomcache.Client] = {}
+    
+    @property
+    def clients(self) -> Dict[str, aiomcache.Client]:
+        """Get the per-node clients keyed by "host:port"."""
+        return self._clients
+    
+    def _cache_settings(self) -> Dict[str, Any]:
+        """Get cache settings from infrastructure.yaml."""
+        cache_config = getattr(self.infra_config, "cache", None) or {}
+        return cache_config.get("settings") or {}
+    
+    def _nodes(self) -> List[str]:
+        """Get the memcached nodes, preferring infrastructure.yaml over environment."""
+        nodes = self._cache_settings().get("nodes")
+        if not nodes and self.settings.CACHE_NODES:
+            nodes = self.settings.CACHE_NODES.split(",")
+        if not nodes:
+            nodes = [f"{self.settings.CACHE_HOST}:{self.settings.CACHE_PORT}"]
+        return [node.strip() for node in nodes if node.strip()]
+    
+    @staticmethod
+    def _parse_node(node: str) -> Tuple[str, int]:
+        """Split "host:port" into its parts."""
+        host, _, port = node.rpartition(":")
+        return (host, int(port)) if host else (node, 11211)
+    
+    async def initialize(self) -> None:
+        """Initialize one connection pool per memcached node."""
+        cache_settings = self._cache_settings()
+        nodes = self._nodes()
+        pool_size = cache_settings.get("pool_size", self.settings.CACHE_MAX_CONNECTIONS)
+        logger.info(f"Initializing memcached cache on {len(nodes)} node(s) (pool_size={pool_size})")
+        self._clients = {}
+        for node in nodes:
+            host, port = self._parse_node(node)
+            self._clients[node] = aiomcache.Client(host, port, pool_size=pool_size)
+        self._ring = ConsistentHashRing(nodes, cache_settings.get("virtual_nodes", 160))
+    
+    async def close(self) -> None:
+        """Close all node connection pools."""
+        logger.info("Closing cache connection")
+        clients, self._clients, self._ring = self._clients, {}, None
+        for client in clients.values():
+            await client.close()
+    
+    @staticmethod
+    def _encode_key(key: str) -> bytes:
+        """Encode a key, hashing it when it is not a valid memcached key."""
+        encoded = key.encode()
+        if len(encoded) > MAX_KEY_LENGTH or any(b <= 32 or b == 127 for b in encoded):
+            encoded = hashlib.sha1(encoded).hexdigest().encode()
+        return encoded
+    
+    def _group_by_node(self, keys: Iterable[str]) -> Dict[str, List[str]]:
+        """Group keys by the node that owns them."""
+        groups: Dict[str, List[str]] = {}
+        for key in keys:
+            groups.setdefault(self._ring.get_node(key), []).append(key)
+        return groups
+    
+    @staticmethod
+    def _dumps(value: Any) -> bytes:
+        """Serialize a value for storage."""
+        return json.dumps(value, default=str).encode()
+    
+    @staticmethod
+    def _loads(raw: bytes) -> Any:
+        """Deserialize a stored value."""
+        return json.loads(raw)
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from cache."""
+        if self._ring is None:
+            return None
+        client = self._clients[self._ring.get_node(key)]
+        try:
+            raw = await client.get(self._encode_key(key))
+        except CACHE_ERRORS as e:
+            logger.warning(f"Cache get failed for {key}: {e}")
+            return None
+        return self._loads(raw) if raw is not None else None
+    
+    async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value in cache. A ttl of 0 or less stores without expiry."""
+        if self._ring is None:
+            return False
+        client = self._clients[self._ring.get_node(key)]
+        try:
+            return await client.set(self._encode_key(key), self._dumps(value), exptime=max(ttl, 0))
+        except CACHE_ERRORS as e:
+            logger.warning(f"Cache set failed for {key}: {e}")
+            return False
+    
+    async def fill(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Store a value just loaded from the source of truth (same as set here)."""
+        return await self.set(key, value, ttl)
+    
+    async def add(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value only if the key is missing. Returns whether it was stored."""
+        if self._ring is None:
+            return False
+        client = self._clients[self._ring.get_node(key)]
+        try:
+            return await client.add(self._encode_key(key), self._dumps(value), exptime=max(ttl, 0))
+        except CACHE_ERRORS as e:
+            logger.warning(f"Cache add failed for {key}: {e}")
+            return False
+    
+    async def delete(self, key: str) -> bool:
+        """Delete value from cache."""
+        if self._ring is None:
+            return False
+        client = self._clients[self._ring.get_node(key)]
+        try:
+            return await client.delete(self._encode_key(key))
+        except CACHE_ERRORS as e:
+            logger.warning(f"Cache delete failed for {key}: {e}")
+            return False
+    
+    async def _get_from_node(self, node: str, keys: List[str]) -> Dict[str, Any]:
+        """Fetch keys owned by one node with a single multi-get."""
+        try:
+            values = await self._clients[node].multi_get(*(self._encode_key(key) for key in keys))
+        except CACHE_ERRORS as e:
+            logger.warning(f"Cache get_many failed on {node} for {len(keys)} keys: {e}")
+            return {}
+        return {key: self._loads(raw) for key, raw in zip(keys, values) if raw is not None}
+    
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values with one multi-get per node, run concurrently."""
+        keys = list(dict.fromkeys(keys))
+        if self._ring is None or not keys:
+            return {}
+        results: Dict[str, Any] = {}
+        for found in await asyncio.gather(
+            *(self._get_from_node(node, node_keys) for node, node_keys in self._group_by_node(keys).items())
+        ):
+            results.update(found)
+        return results
+    
+    async def set_many(self, mapping: Mapping[str, Any], ttl: int = 300) -> bool:
+        """Set several values, writing to all nodes concurrently."""
+        if self._ring is None or not mapping:
+            return False
+        results = await asyncio.gather(*(self.set(key, value, ttl) for key, value in mapping.items()))
+        return all(results)
+    
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several values concurrently. Returns the number deleted."""
+        keys = list(dict.fromkeys(keys))
+        if self._ring is None or not keys:
+            return 0
+        results = await asyncio.gather(*(self.delete(key) for key in keys))
+        return sum(results)
+    
+    async def health_check(self) -> bool:
+        """Check that every node answers."""
+        if not self._clients:
+            return False
+        try:
+            await asyncio.gather(*(client.version() for client in self._clients.values()))
             return True
         except Exception as e:
             logger.error(f"Cache health check failed: {e}")
             return False
-{% else %}
+{%- else %}
+
+
 class CacheManager:
     """Dummy cache manager when no cache is configured."""
     
@@ -67,9 +421,39 @@ class CacheManager:
     async def set(self, key: str, value: str, ttl: int = 3600) -> None:
         pass
     
+    async def fill(self, key: str, value: str, ttl: int = 3600) -> None:
+        pass
+    
+    async def add(self, key: str, value: str, ttl: int = 3600) -> bool:
+        return False
+    
     async def delete(self, key: str) -> None:
         pass
     
+    async def get_many(self, keys) -> dict:
+        return {}
+    
+    async def set_many(self, mapping, ttl: int = 3600) -> None:
+        pass
+    
+    async def delete_many(self, keys) -> int:
+        return 0
+    
     async def health_check(self) -> bool:
         return True
-{% endif %}
+{%- endif %}
+
+
+def create_cache_manager(settings, infra_config):
+    """Create the cache manager, with an in-process L1 in front when enabled."""
+    cache_manager = CacheManager(settings, infra_config)
+    if settings.CACHE_LOCAL_ENABLED:
+        cache_manager = TwoTierCache(cache_manager, settings)
+    {%- if cookiecutter.enable_metrics == 'yes' and cookiecutter.cache_type != 'none' %}
+    # Outermost, so L1 hits are counted as hits too
+    cache_manager = InstrumentedCache(cache_manager, get_metrics())
+    {%- endif %}
+    {%- if cookiecutter.enable_tracing == 'yes' and cookiecutter.cache_type != 'none' %}
+    cache_manager = TracedCache(cache_manager)
+    {%- endif %}
+    return cache_manager
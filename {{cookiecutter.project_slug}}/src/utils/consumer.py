@@ -0,0 +1,504 @@
+"""Queue consumer: batched fetches, bounded concurrency, batched commits.
+
+Messages are fetched in batches, handed to the async handler registered
+for their type, and run concurrently up to a limit. Once every slot is
+busy and a batch is waiting, nothing more is fetched, so a slow handler
+slows consumption instead of filling memory. Finished messages are committed (Kafka
+offsets, RabbitMQ acks, SQS deletes) in batches, every commit interval
+or sooner once enough have finished.
+
+Delivery is at least once: messages still in flight when the worker
+stops, or not yet committed when it crashes, are delivered again.
+"""
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple, Union
+import asyncio
+import logging
+{%- if cookiecutter.queue_type == 'kafka' %}
+
+from aiokafka import AIOKafkaConsumer, ConsumerRebalanceListener
+{%- elif cookiecutter.queue_type == 'rabbitmq' %}
+
+import aio_pika
+{%- endif %}
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TYPE = "default"
+
+
+class QueueMessage:
+    """One message fetched from the queue (the body is bytes, or str from SQS)."""
+
+    __slots__ = ("body", "type", "key", "attributes", "partition", "seq", "generation", "raw")
+
+    def __init__(
+        self,
+        body: Union[bytes, str],
+        type: Optional[str] = None,
+        key: Optional[Any] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        partition: Any = None,
+        seq: int = 0,
+        generation: int = 0,
+        raw: Any = None,
+    ):
+        """Initialize message; partition, seq, generation and raw are for the source that fetched it."""
+        self.body = body
+        self.type = type or DEFAULT_TYPE
+        self.key = key
+        self.attributes = attributes or {}
+        self.partition = partition
+        self.seq = seq
+        self.generation = generation
+        self.raw = raw
+
+
+Handler = Callable[[QueueMessage], Awaitable[Any]]
+
+HANDLERS: Dict[str, Handler] = {}
+
+
+def handler(message_type: str = DEFAULT_TYPE) -> Callable[[Handler], Handler]:
+    """Register an async handler for messages of a type.
+
+    The type comes from the Kafka "type" header, the AMQP type property or
+    the SQS "type" message attribute; messages without one, or of a type
+    with no handler, go to the "default" handler.
+    """
+    def decorator(func: Handler) -> Handler:
+        HANDLERS[message_type] = func
+        return func
+    return decorator
+
+
+class AckTracker:
+    """Find how far each partition can be committed while messages finish out of order.
+
+    Messages are tracked in fetch order per partition (a Kafka partition,
+    or a RabbitMQ channel). Only the run of finished messages at the head
+    of a partition can be committed: committing past a message still in
+    flight would lose it if the worker stopped.
+
+    Forgetting a partition starts a new generation of it. Handlers still
+    running for the old generation report to a partition that may since
+    have been assigned back and its records fetched again, so done() for
+    an older generation is ignored; otherwise it could mark the new copy
+    of a record finished while that copy is still in flight.
+    """
+
+    def __init__(self):
+        """Initialize tracker."""
+        self._pending: Dict[Any, Deque[Tuple[int, Any]]] = {}
+        self._done: Dict[Any, Set[int]] = {}
+        self._generations: Dict[Any, int] = {}
+
+    def track(self, partition: Any, seq: int, item: Any = None) -> int:
+        """Start tracking a fetched message; returns the generation to pass to done()."""
+        self._pending.setdefault(partition, deque()).append((seq, item))
+        self._done.setdefault(partition, set())
+        return self._generations.get(partition, 0)
+
+    def done(self, partition: Any, seq: int, generation: int = 0) -> None:
+        """Mark a message finished."""
+        done = self._done.get(partition)
+        if done is not None and generation == self._generations.get(partition, 0):
+            done.add(seq)
+
+    def forget(self, partitions: Iterable[Any]) -> None:
+        """Stop tracking partitions, e.g. after they were reassigned."""
+        for partition in partitions:
+            self._pending.pop(partition, None)
+            self._done.pop(partition, None)
+            self._generations[partition] = self._generations.get(partition, 0) + 1
+
+    def ready(self) -> Dict[Any, List[Any]]:
+        """Take the finished head of each partition, in order, as (seq, item) pairs."""
+        ready = {}
+        for partition, pending in self._pending.items():
+            done = self._done[partition]
+            finished = []
+            while pending and pending[0][0] in done:
+                entry = pending.popleft()
+                done.discard(entry[0])
+                finished.append(entry)
+            if finished:
+                ready[partition] = finished
+        return ready
+{%- if cookiecutter.queue_type == 'kafka' %}
+
+
+class _CommitOnRevoke(ConsumerRebalanceListener):
+    """Commit finished offsets before partitions move to another consumer."""
+
+    def __init__(self, source: "MessageSource"):
+        self.source = source
+
+    async def on_partitions_revoked(self, revoked) -> None:
+        await self.source.commit()
+        self.source.tracker.forget(revoked)
+
+    async def on_partitions_assigned(self, assigned) -> None:
+        pass
+
+
+class MessageSource:
+    """Fetch Kafka records with getmany and commit offsets per partition.
+
+    Auto-commit is off: an offset is committed once every record before
+    it has been handled. A failed message is logged and committed past,
+    so one bad record does not stop its partition.
+    """
+
+    def __init__(self, queue_manager, settings):
+        """Initialize source."""
+        self.queue_manager = queue_manager
+        self.settings = settings
+        self.tracker = AckTracker()
+        self._consumer: Optional[AIOKafkaConsumer] = None
+
+    async def start(self) -> None:
+        queue_config = getattr(self.queue_manager.infra_config, "queue", None) or {}
+        overrides = queue_config.get("settings") or {}
+        self._consumer = AIOKafkaConsumer(
+            group_id=overrides.get("group_id", f"{self.settings.APP_NAME}-consumer"),
+            auto_offset_reset=overrides.get("auto_offset_reset", "earliest"),
+            enable_auto_commit=False,
+            **self.queue_manager.client_settings(),
+        )
+        self._consumer.subscribe([self.queue_manager.queue_name], listener=_CommitOnRevoke(self))
+        await self._consumer.start()
+        logger.info(f"Consuming kafka topic {self.queue_manager.queue_name}")
+
+    async def stop(self) -> None:
+        if self._consumer:
+            await self._consumer.stop()
+            self._consumer = None
+
+    async def fetch(self, max_messages: int) -> List[QueueMessage]:
+        batches = await self._consumer.getmany(timeout_ms=1000, max_records=max_messages)
+        messages = []
+        for partition, records in batches.items():
+            for record in records:
+                headers = dict(record.headers or ())
+                message_type = headers.get("type")
+                messages.append(QueueMessage(
+                    record.value,
+                    type=message_type.decode() if message_type else None,
+                    key=record.key,
+                    attributes=headers,
+                    partition=partition,
+                    seq=record.offset,
+                    generation=self.tracker.track(partition, record.offset),
+                ))
+        return messages
+
+    async def done(self, message: QueueMessage, ok: bool) -> None:
+        self.tracker.done(message.partition, message.seq, message.generation)
+
+    async def commit(self) -> None:
+        ready = self.tracker.ready()
+        if ready and self._consumer:
+            # The committed offset is the next one to read
+            await self._consumer.commit({partition: finished[-1][0] + 1 for partition, finished in ready.items()})
+{%- elif cookiecutter.queue_type == 'rabbitmq' %}
+
+
+class MessageSource:
+    """Consume a RabbitMQ queue on its own channel and ack in batches.
+
+    The prefetch count bounds how many unacked messages the broker pushes,
+    and finished messages are acked together with one multiple-ack per
+    channel. A failed message is rejected at once, without requeueing;
+    give the queue a dead-letter exchange to keep those.
+    """
+
+    def __init__(self, queue_manager, settings):
+        """Initialize source."""
+        self.queue_manager = queue_manager
+        self.settings = settings
+        self.tracker = AckTracker()
+        self._channel: Optional[aio_pika.abc.AbstractChannel] = None
+        self._deliveries: "asyncio.Queue[aio_pika.abc.AbstractIncomingMessage]" = asyncio.Queue()
+        self._failed: Set[Tuple[Any, int]] = set()
+
+    @property
+    def prefetch_count(self) -> int:
+        """Get the prefetch count, preferring infrastructure.yaml over environment."""
+        queue_config = getattr(self.queue_manager.infra_config, "queue", None) or {}
+        return (queue_config.get("settings") or {}).get("prefetch_count", self.settings.CONSUMER_BATCH_SIZE)
+
+    async def start(self) -> None:
+        connection = await self.queue_manager.get_connection()
+        self._channel = await connection.channel()
+        await self._channel.set_qos(prefetch_count=self.prefetch_count)
+        queue = await self._channel.declare_queue(self.queue_manager.queue_name, durable=True)
+        await queue.consume(self._deliveries.put)
+        logger.info(f"Consuming rabbitmq queue {queue.name} (prefetch {self.prefetch_count})")
+
+    async def stop(self) -> None:
+        if self._channel:
+            await self._channel.close()
+            self._channel = None
+
+    async def fetch(self, max_messages: int) -> List[QueueMessage]:
+        try:
+            deliveries = [await asyncio.wait_for(self._deliveries.get(), 1.0)]
+        except asyncio.TimeoutError:
+            return []
+        while len(deliveries) < max_messages and not self._deliveries.empty():
+            deliveries.append(self._deliveries.get_nowait())
+        messages = []
+        for delivery in deliveries:
+            # Delivery tags count up per channel, and restart when the
+            # connection does, so the underlying channel is the partition
+            try:
+                channel = delivery.channel
+            except aio_pika.exceptions.ChannelInvalidStateError:
+                # Its channel closed while it waited; the broker delivers it again
+                continue
+            messages.append(QueueMessage(
+                delivery.body,
+                type=delivery.type,
+                key=delivery.message_id,
+                attributes=dict(delivery.headers or {}),
+                partition=channel,
+                seq=delivery.delivery_tag,
+                generation=self.tracker.track(channel, delivery.delivery_tag, delivery),
+                raw=delivery,
+            ))
+        return messages
+
+    async def done(self, message: QueueMessage, ok: bool) -> None:
+        if not ok:
+            self._failed.add((message.partition, message.seq))
+            try:
+                await message.raw.reject(requeue=False)
+            except Exception as e:
+                logger.warning(f"Could not reject message {message.seq}: {e}")
+        self.tracker.done(message.partition, message.seq, message.generation)
+
+    async def commit(self) -> None:
+        for partition, finished in self.tracker.ready().items():
+            # A multiple-ack covers every earlier delivery, so send it for
+            # the last message that was not already rejected
+            last = None
+            for seq, delivery in finished:
+                if (partition, seq) in self._failed:
+                    self._failed.discard((partition, seq))
+                else:
+                    last = delivery
+            if last is None:
+                continue
+            try:
+                await last.ack(multiple=True)
+            except Exception as e:
+                # The channel closed; the broker redelivers these
+                logger.warning(f"Could not ack up to message {last.delivery_tag}: {e}")
+{%- elif cookiecutter.queue_type == 'sqs' %}
+
+
+class MessageSource:
+    """Receive SQS messages 10 at a time and delete finished ones in batches.
+
+    A batch larger than 10 is filled with several concurrent long-polling
+    receives. A failed message is not deleted, so SQS delivers it again
+    once its visibility timeout expires (and moves it to the dead-letter
+    queue, if one is configured, after its redrive limit).
+    """
+
+    def __init__(self, queue_manager, settings):
+        """Initialize source."""
+        self.queue_manager = queue_manager
+        self.settings = settings
+        queue_config = getattr(queue_manager.infra_config, "queue", None) or {}
+        overrides = queue_config.get("settings") or {}
+        self.max_messages = min(overrides.get("max_messages", 10), 10)
+        self.wait_time = overrides.get("wait_time", 20)
+        self._finished: List[str] = []
+
+    async def start(self) -> None:
+        self._queue_url = await self.queue_manager.get_queue_url()
+        logger.info(f"Consuming sqs queue {self._queue_url}")
+
+    async def stop(self) -> None:
+        pass
+
+    async def _receive(self, count: int) -> List[Dict[str, Any]]:
+        response = await self.queue_manager.client.receive_message(
+            QueueUrl=self._queue_url,
+            MaxNumberOfMessages=count,
+            WaitTimeSeconds=self.wait_time,
+            MessageAttributeNames=["All"],
+        )
+        return response.get("Messages", [])
+
+    async def fetch(self, max_messages: int) -> List[QueueMessage]:
+        counts = [self.max_messages] * (max_messages // self.max_messages)
+        if max_messages % self.max_messages:
+            counts.append(max_messages % self.max_messages)
+        received = await asyncio.gather(*(self._receive(count) for count in counts))
+        messages = []
+        for batch in received:
+            for raw in batch:
+                attributes = {name: value.get("StringValue") for name, value in raw.get("MessageAttributes", {}).items()}
+                messages.append(QueueMessage(
+                    raw["Body"],
+                    type=attributes.get("type"),
+                    key=raw["MessageId"],
+                    attributes=attributes,
+                    raw=raw,
+                ))
+        return messages
+
+    async def done(self, message: QueueMessage, ok: bool) -> None:
+        if ok:
+            self._finished.append(message.raw["ReceiptHandle"])
+
+    async def commit(self) -> None:
+        finished, self._finished = self._finished, []
+        chunks = [finished[start:start + 10] for start in range(0, len(finished), 10)]
+        responses = await asyncio.gather(*(
+            self.queue_manager.client.delete_message_batch(
+                QueueUrl=self._queue_url,
+                Entries=[{"Id": str(index), "ReceiptHandle": receipt} for index, receipt in enumerate(chunk)],
+            )
+            for chunk in chunks
+        ))
+        for response in responses:
+            for failure in response.get("Failed", []):
+                logger.warning(f"Could not delete message: {failure.get('Message')}")
+{%- endif %}
+
+
+class Consumer:
+    """Run registered handlers over messages from a source.
+
+    At most concurrency handlers run at once. Up to batch_size more
+    fetched messages wait for a slot, so handlers never wait on a fetch;
+    once they are all waiting, nothing more is fetched until half a batch
+    has started. The source fetches, acknowledges and commits; see
+    MessageSource for what each queue type does with a failed message.
+    """
+
+    def __init__(
+        self,
+        source,
+        handlers: Optional[Dict[str, Handler]] = None,
+        concurrency: int = 32,
+        batch_size: int = 100,
+        commit_interval: float = 1.0,
+        commit_batch: int = 100,
+        run_job: Optional[Callable[[str, Awaitable[Any]], Awaitable[Any]]] = None,
+    ):
+        """Initialize consumer; run_job wraps each handler call (e.g. Worker.run_job for spans)."""
+        self.source = source
+        self.handlers = HANDLERS if handlers is None else handlers
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.commit_batch = commit_batch
+        self.run_job = run_job
+        self._refill_at = max(1, batch_size // 2)
+        self._slots = asyncio.Semaphore(concurrency)
+        self.processed = 0
+        self.failed = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._uncommitted = 0
+        self._commit_due = asyncio.Event()
+
+    async def run(self, stopping: asyncio.Event) -> None:
+        """Consume until stopping is set, then finish in-flight messages and commit them."""
+        await self.source.start()
+        loop = asyncio.get_running_loop()
+        committer = loop.create_task(self._commit_periodically())
+        try:
+            while not stopping.is_set():
+                room = self.concurrency + self.batch_size - len(self._tasks)
+                if room < self._refill_at:
+                    # Every slot is busy and a batch is waiting: fetch nothing
+                    # more until there is room for a batch worth fetching
+                    await asyncio.wait(set(self._tasks), return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                messages = await self._fetch(min(self.batch_size, room), stopping)
+                for message in messages:
+                    task = loop.create_task(self._handle(message))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+        finally:
+            if self._tasks:
+                logger.info(f"Waiting for {len(self._tasks)} in-flight messages")
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            committer.cancel()
+            await asyncio.gather(committer, return_exceptions=True)
+            await self._commit()
+            await self.source.stop()
+            logger.info(f"Consumer stopped after {self.processed} messages ({self.failed} failed)")
+
+    async def _fetch(self, max_messages: int, stopping: asyncio.Event) -> List[QueueMessage]:
+        """Fetch a batch, giving up (and leaving it to be redelivered) if stopping first."""
+        fetch = asyncio.ensure_future(self.source.fetch(max_messages))
+        stop = asyncio.ensure_future(stopping.wait())
+        await asyncio.wait({fetch, stop}, return_when=asyncio.FIRST_COMPLETED)
+        stop.cancel()
+        if not fetch.done():
+            fetch.cancel()
+            await asyncio.gather(fetch, return_exceptions=True)
+            return []
+        try:
+            return fetch.result()
+        except Exception:
+            logger.exception("Fetching messages failed")
+            await asyncio.sleep(1.0)
+            return []
+
+    async def _handle(self, message: QueueMessage) -> None:
+        ok = False
+        func = self.handlers.get(message.type) or self.handlers.get(DEFAULT_TYPE)
+        async with self._slots:
+            try:
+                if func is None:
+                    logger.error(f"No handler for message type {message.type}")
+                elif self.run_job:
+                    await self.run_job(f"handle {message.type}", func(message))
+                    ok = True
+                else:
+                    await func(message)
+                    ok = True
+            except Exception:
+                logger.exception(f"Handler for message type {message.type} failed")
+        self.processed += 1
+        if not ok:
+            self.failed += 1
+        await self.source.done(message, ok)
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_batch:
+            self._commit_due.set()
+
+    async def _commit_periodically(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._commit_due.wait(), self.commit_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self._commit()
+
+    async def _commit(self) -> None:
+        self._commit_due.clear()
+        self._uncommitted = 0
+        try:
+            await self.source.commit()
+        except Exception:
+            logger.exception("Committing finished messages failed")
+
+
+def create_consumer(queue_manager, settings, run_job=None) -> Consumer:
+    """Create a consumer for the configured queue, using the registered handlers."""
+    return Consumer(
+        MessageSource(queue_manager, settings),
+        concurrency=settings.CONSUMER_CONCURRENCY,
+        batch_size=settings.CONSUMER_BATCH_SIZE,
+        commit_interval=settings.CONSUMER_COMMIT_INTERVAL,
+        commit_batch=settings.CONSUMER_COMMIT_BATCH,
+        run_job=run_job,
+    )
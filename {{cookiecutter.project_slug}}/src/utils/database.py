@@ -1,46 +1,299 @@
 """Database manager."""
-{% if cookiecutter.database_type != 'none' %}
-from typing import Optional, Any
+{% if cookiecutter.database_type in ['postgresql', 'mysql'] %}
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
 import logging
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from src.classes.models.entities import Base
+from src.utils.query_log import get_query_log, statement_shape
 
 logger = logging.getLogger(__name__)
 
+{% if cookiecutter.database_type == 'postgresql' -%}
+DRIVER_NAME = "postgresql+asyncpg"
+{%- else -%}
+DRIVER_NAME = "mysql+aiomysql"
+{%- endif %}
+
+# Statement keywords reported as their own query_type label; the rest are OTHER
+QUERY_TYPES = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE"})
+
+
+def _query_type(statement: str) -> str:
+    """Get a statement's leading keyword as a bounded metric label."""
+    keyword = statement.lstrip()[:6].upper()
+    return keyword if keyword in QUERY_TYPES else "OTHER"
+
+
+def _instrument_engine(engine: AsyncEngine) -> None:
+    """Time every statement the engine executes and record it in the query log."""
+    query_log = get_query_log()
+    
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_start_time = time.perf_counter()
+    
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context.query_start_time
+        query_log.record(_query_type(statement), statement_shape(statement), duration, parameters)
+
 
 class DatabaseManager:
-    """Database connection manager."""
+    """Database connection manager owning a pooled async engine."""
     
     def __init__(self, settings, infra_config):
         """Initialize database manager."""
         self.settings = settings
         self.infra_config = infra_config
-        self._connection = None
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+        self._autocommit_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+    
+    @property
+    def engine(self) -> Optional[AsyncEngine]:
+        """Get the async engine (shared by all sessions)."""
+        return self._engine
+    
+    def _url(self) -> URL:
+        """Get the database URL, preferring DB_URL when set."""
+        if self.settings.DB_URL:
+            return make_url(self.settings.DB_URL)
+        return URL.create(
+            drivername=DRIVER_NAME,
+            username=self.settings.DB_USER,
+            password=self.settings.DB_PASSWORD,
+            host=self.settings.DB_HOST,
+            port=self.settings.DB_PORT,
+            database=self.settings.DB_NAME,
+        )
+    
+    def _pool_settings(self) -> Dict[str, Any]:
+        """Get pool settings, preferring infrastructure.yaml over environment."""
+        db_config = getattr(self.infra_config, "database", None) or {}
+        overrides = db_config.get("settings") or {}
+        return {
+            "pool_size": overrides.get("pool_size", self.settings.DB_POOL_SIZE),
+            "max_overflow": overrides.get("max_overflow", self.settings.DB_MAX_OVERFLOW),
+            "pool_timeout": overrides.get("pool_timeout", self.settings.DB_POOL_TIMEOUT),
+            "pool_recycle": overrides.get("pool_recycle", self.settings.DB_POOL_RECYCLE),
+            "pool_pre_ping": overrides.get("pool_pre_ping", self.settings.DB_POOL_PRE_PING),
+        }
     
     async def initialize(self) -> None:
-        """Initialize database connection."""
-        logger.info(f"Initializing {self.settings.DB_TYPE} database")
-        # Implementation depends on database type
-        pass
+        """Create the engine and its connection pool."""
+        url = self._url()
+        # SQLite (used for local runs) has its own pool without sizing options
+        pool_settings = {} if url.get_backend_name() == "sqlite" else self._pool_settings()
+        logger.info(f"Initializing {url.get_backend_name()} database ({pool_settings})")
+        self._engine = create_async_engine(url, **pool_settings)
+        _instrument_engine(self._engine)
+        self._session_factory = async_sessionmaker(self._engine, expire_on_commit=False)
+        {%- if cookiecutter.database_type == 'postgresql' %}
+        # asyncpg switches a connection to autocommit without a round trip, so
+        # single-statement work can skip the BEGIN/COMMIT round trips entirely
+        autocommit_engine = self._engine.execution_options(isolation_level="AUTOCOMMIT")
+        {%- else %}
+        # Switching a MySQL connection to autocommit and back costs a round trip
+        # each way, which is no cheaper than BEGIN/COMMIT, so keep transactions
+        autocommit_engine = self._engine
+        {%- endif %}
+        self._autocommit_session_factory = async_sessionmaker(autocommit_engine, expire_on_commit=False)
+        
+        if self.settings.DB_CREATE_TABLES:
+            async with self._engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
     
     async def close(self) -> None:
-        """Close database connection."""
+        """Dispose of the engine and close pooled connections."""
         logger.info("Closing database connection")
-        if self._connection:
-            # Close connection based on type
-            pass
+        if self._engine:
+            await self._engine.dispose()
+            self._engine = None
+            self._session_factory = None
+            self._autocommit_session_factory = None
+    
+    @asynccontextmanager
+    async def session(self, autocommit: bool = False) -> AsyncIterator[AsyncSession]:
+        """Open a session for one unit of work.
+        
+        The transaction commits when the block exits normally and rolls back
+        on error; the connection goes back to the pool either way. Pass
+        autocommit=True for work that is a single statement, which is atomic
+        on its own and then needs no separate BEGIN and COMMIT.
+        """
+        factory = self._autocommit_session_factory if autocommit else self._session_factory
+        async with factory.begin() as session:
+            yield session
     
-    async def get_connection(self) -> Any:
-        """Get database connection."""
-        return self._connection
+    async def execute_query(self, query: str) -> Any:
+        """Execute a raw SQL statement on a pooled connection."""
+        async with self._engine.connect() as connection:
+            result = await connection.execute(text(query))
+            return result.fetchall() if result.returns_rows else None
     
     async def health_check(self) -> bool:
         """Check database health."""
+        if self._engine is None:
+            return False
         try:
-            # Perform health check based on database type
+            await self.execute_query("SELECT 1")
+            return True
+        except Exception as e:
+            logger.error(f"Database health check failed: {e}")
+            return False
+{% elif cookiecutter.database_type == 'mongodb' %}
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+
+from src.utils.query_log import get_query_log, redact
+
+logger = logging.getLogger(__name__)
+
+# Commands reported as their own query_type label; the rest are "other"
+QUERY_TYPES = frozenset({
+    "find", "getMore", "insert", "update", "delete", "findAndModify",
+    "aggregate", "count", "distinct", "createIndexes", "ping",
+})
+
+# Command fields holding the query, whose keys (not values) form the shape
+_QUERY_FIELDS = ("filter", "query", "pipeline", "updates", "deletes")
+
+
+def _command_shape(command_name: str, command: Dict[str, Any]) -> Tuple[str, Any]:
+    """Get a command's shape (name, collection, queried fields) and its redacted query."""
+    collection = command.get(command_name)
+    for field in _QUERY_FIELDS:
+        query = command.get(field)
+        if query is None:
+            continue
+        if field in ("updates", "deletes") and query:
+            query = query[0].get("q", {})
+        keys = sorted(query) if isinstance(query, dict) else []
+        shape = f"{command_name} {collection} {field}=[{', '.join(keys)}]"
+        return shape, redact(query)
+    return f"{command_name} {collection}" if isinstance(collection, str) else command_name, None
+
+
+class CommandTimingListener(monitoring.CommandListener):
+    """Record the duration of every command the client sends in the query log."""
+    
+    def __init__(self):
+        """Initialize listener."""
+        self.query_log = get_query_log()
+        # Shapes of in-flight commands, since completion events omit the command
+        self._pending: Dict[Any, Tuple[str, Any]] = {}
+    
+    def _track(self, event) -> None:
+        shape, parameters = self._pending.pop((event.connection_id, event.request_id), (event.command_name, None))
+        query_type = event.command_name if event.command_name in QUERY_TYPES else "other"
+        self.query_log.record(query_type, shape, event.duration_micros / 1_000_000, parameters)
+    
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self._pending[(event.connection_id, event.request_id)] = _command_shape(event.command_name, event.command)
+    
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._track(event)
+    
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._track(event)
+
+
+class DatabaseManager:
+    """Database connection manager owning a pooled Motor client."""
+    
+    def __init__(self, settings, infra_config):
+        """Initialize database manager."""
+        self.settings = settings
+        self.infra_config = infra_config
+        self._client: Optional[AsyncIOMotorClient] = None
+        self._db: Optional[AsyncIOMotorDatabase] = None
+    
+    @property
+    def client(self) -> Optional[AsyncIOMotorClient]:
+        """Get the Motor client (shared by all requests)."""
+        return self._client
+    
+    @property
+    def db(self) -> Optional[AsyncIOMotorDatabase]:
+        """Get the application database."""
+        return self._db
+    
+    def _pool_settings(self) -> Dict[str, Any]:
+        """Get pool settings, preferring infrastructure.yaml over environment."""
+        db_config = getattr(self.infra_config, "database", None) or {}
+        overrides = db_config.get("settings") or {}
+        return {
+            "maxPoolSize": overrides.get("max_pool_size", self.settings.DB_POOL_SIZE),
+            "minPoolSize": overrides.get("min_pool_size", 0),
+            "waitQueueTimeoutMS": int(overrides.get("pool_timeout", self.settings.DB_POOL_TIMEOUT) * 1000),
+            "maxIdleTimeMS": int(overrides.get("max_idle_time", self.settings.DB_MAX_IDLE_TIME) * 1000),
+        }
+    
+    def _client_options(self) -> Dict[str, Any]:
+        """Get client options: pool settings plus any command listeners."""
+        options = self._pool_settings()
+        options["event_listeners"] = [CommandTimingListener()]
+        return options
+    
+    async def initialize(self) -> None:
+        """Create the client and its connection pool."""
+        pool_settings = self._pool_settings()
+        logger.info(f"Initializing mongodb database ({pool_settings})")
+        client_options = self._client_options()
+        if self.settings.DB_URL:
+            self._client = AsyncIOMotorClient(self.settings.DB_URL, **client_options)
+        else:
+            self._client = AsyncIOMotorClient(
+                host=self.settings.DB_HOST,
+                port=self.settings.DB_PORT,
+                username=self.settings.DB_USER,
+                password=self.settings.DB_PASSWORD,
+                **client_options,
+            )
+        self._db = self._client[self.settings.DB_NAME]
+    
+    async def close(self) -> None:
+        """Close the client and its pooled connections."""
+        logger.info("Closing database connection")
+        if self._client:
+            self._client.close()
+            self._client = None
+            self._db = None
+    
+    async def get_connection(self) -> Optional[AsyncIOMotorDatabase]:
+        """Get the application database (safe to share between requests)."""
+        return self._db
+    
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Any]:
+        """Open a client session for one unit of work."""
+        async with await self._client.start_session() as session:
+            yield session
+    
+    async def health_check(self) -> bool:
+        """Check database health."""
+        if self._db is None:
+            return False
+        try:
+            await self._db.command("ping")
             return True
         except Exception as e:
             logger.error(f"Database health check failed: {e}")
             return False
 {% else %}
+from contextlib import asynccontextmanager
+
+
 class DatabaseManager:
     """Dummy database manager when no database is configured."""
     
@@ -56,6 +309,18 @@ class DatabaseManager:
     async def get_connection(self) -> None:
         return None
     
+    @asynccontextmanager
+    async def session(self):
+        yield None
+    
     async def health_check(self) -> bool:
         return True
 {% endif %}
+
+
+def create_database_manager(settings, infra_config):
+    """Create the database manager, or the in-memory store's when DB_TYPE is memory."""
+    if settings.DB_TYPE == "memory":
+        from src.utils.memory_database import MemoryDatabaseManager
+        return MemoryDatabaseManager(settings, infra_config)
+    return DatabaseManager(settings, infra_config)
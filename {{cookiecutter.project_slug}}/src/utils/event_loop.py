@@ -0,0 +1,128 @@
+"""Long-lived background event loop for running async code from sync code."""
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+import asyncio
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundEventLoop:
+    """Event loop running forever in a daemon thread.
+
+    Async connection pools are bound to the loop they were created on, so
+    every coroutine that uses them must be submitted here. Coroutines run
+    in a copy of the caller's context, so Flask's request and app contexts
+    stay available to them. The thread starts on first use and is restarted
+    after a fork, since a forked child inherits the loop but not its thread.
+    """
+
+    def __init__(self, name: str = "event-loop"):
+        """Initialize without starting the thread."""
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Get the running loop, starting it if needed."""
+        self.start()
+        return self._loop
+
+    @property
+    def thread_id(self) -> int:
+        """Get the loop thread's ident, starting it if needed."""
+        self.start()
+        return self._thread.ident
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the loop thread is alive in this process."""
+        return self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the loop thread if it is not already running."""
+        if self.is_running:
+            return
+        with self._lock:
+            if self.is_running:
+                return
+            started = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run, args=(started,), name=self.name, daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+            started.wait()
+            logger.info(f"Started background event loop in thread {self.name}")
+
+    def _run(self, started: threading.Event) -> None:
+        """Run the loop until stopped, then cancel leftover tasks and close it."""
+        loop = self._loop
+        asyncio.set_event_loop(loop)
+        loop.call_soon(started.set)
+        try:
+            loop.run_forever()
+        finally:
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the loop and wait for its thread to exit."""
+        with self._lock:
+            if not self.is_running:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+            self._loop = None
+            logger.info(f"Stopped background event loop in thread {self.name}")
+
+    def submit(self, coro: Awaitable[Any]) -> Future:
+        """Schedule a coroutine on the loop and return a concurrent Future for its result."""
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Cannot block on the background event loop from its own thread")
+        # The task is created from a callback that runs in a copy of this
+        # thread's context, so context variables carry over to the coroutine
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block until it finishes."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def iterate(self, agen: AsyncIterator[Any]) -> Iterator[Any]:
+        """Drive an async generator on the loop from a sync generator."""
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            self.run(agen.aclose())
+
+
+# One loop per process, shared by every Flask view and the managers they use
+background_loop = BackgroundEventLoop()
+
+
+def async_route(f: Callable[..., Awaitable[Any]]) -> Callable[..., Any]:
+    """Decorator to run an async Flask view on the background event loop."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return background_loop.run(f(*args, **kwargs))
+    return wrapper
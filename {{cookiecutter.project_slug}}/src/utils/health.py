@@ -1,39 +1,50 @@
 """Health check utilities for infrastructure dependencies."""
+import asyncio
+import logging
 import time
-from typing import Dict, Any
+from typing import Any, Awaitable, Dict, Optional, Tuple
 from src.config import Settings, InfrastructureConfig
 
+logger = logging.getLogger(__name__)
+
 
 class HealthChecker:
     """Check health of all infrastructure dependencies."""
     
-    def __init__(self, settings: Settings, infra_config: InfrastructureConfig):
+    def __init__(self, settings: Settings, infra_config: InfrastructureConfig, timeout: float = 2.0):
         self.settings = settings
         self.infra_config = infra_config
+        self.timeout = timeout
     
     async def check_database(self, db_manager) -> Dict[str, Any]:
         """Check database connection."""
         start = time.time()
         try:
-            {% if cookiecutter.database_type == 'postgresql' %}
-            # PostgreSQL check
-            await db_manager.execute_query("SELECT 1")
-            {% elif cookiecutter.database_type == 'mysql' %}
-            # MySQL check
-            await db_manager.execute_query("SELECT 1")
-            {% elif cookiecutter.database_type == 'mongodb' %}
-            # MongoDB check
-            await db_manager.db.command('ping')
-            {% endif %}
+            if self.settings.DB_TYPE == "memory":
+                # The in-memory store lives in this process; there is nothing to reach
+                pass
+            {%- if cookiecutter.database_type == 'postgresql' %}
+            else:
+                # PostgreSQL check
+                await db_manager.execute_query("SELECT 1")
+            {%- elif cookiecutter.database_type == 'mysql' %}
+            else:
+                # MySQL check
+                await db_manager.execute_query("SELECT 1")
+            {%- elif cookiecutter.database_type == 'mongodb' %}
+            else:
+                # MongoDB check
+                await db_manager.db.command('ping')
+            {%- endif %}
             return {
                 "status": "healthy",
-                "type": "{{ cookiecutter.database_type }}",
+                "type": self.settings.DB_TYPE,
                 "response_time_ms": round((time.time() - start) * 1000, 2)
             }
         except Exception as e:
             return {
                 "status": "unhealthy",
-                "type": "{{ cookiecutter.database_type }}",
+                "type": self.settings.DB_TYPE,
                 "error": str(e),
                 "response_time_ms": round((time.time() - start) * 1000, 2)
             }
@@ -46,9 +57,11 @@ class HealthChecker:
             # Redis check
             await cache_manager.client.ping()
             {% elif cookiecutter.cache_type == 'memcached' %}
-            # Memcached check
-            await cache_manager.client.set('health_check', '1', expire=1)
-            await cache_manager.client.get('health_check')
+            # Memcached check (every node in the ring)
+            if not cache_manager.clients:
+                # Gathering over no nodes would pass without checking anything
+                raise RuntimeError("No memcached nodes are connected")
+            await asyncio.gather(*(client.version() for client in cache_manager.clients.values()))
             {% endif %}
             return {
                 "status": "healthy",
@@ -63,62 +76,17 @@ class HealthChecker:
                 "response_time_ms": round((time.time() - start) * 1000, 2)
             }
     
-    async def check_queue(self) -> Dict[str, Any]:
-        """Check message queue connection."""
+    async def check_queue(self, queue_manager) -> Dict[str, Any]:
+        """Check message queue connection with one metadata call on the manager's client."""
         start = time.time()
         try:
-            {% if cookiecutter.queue_type == 'kafka' %}
-            # Kafka check
-            from kafka import KafkaAdminClient
-            from kafka.errors import KafkaError
-            
-            admin_client = KafkaAdminClient(
-                bootstrap_servers=self.settings.QUEUE_HOST,
-                client_id='health_check'
-            )
-            # List topics to verify connection
-            topics = admin_client.list_topics()
-            admin_client.close()
-            
-            return {
-                "status": "healthy",
-                "type": "kafka",
-                "topics_count": len(topics),
-                "response_time_ms": round((time.time() - start) * 1000, 2)
-            }
-            {% elif cookiecutter.queue_type == 'rabbitmq' %}
-            # RabbitMQ check
-            import aio_pika
-            
-            connection = await aio_pika.connect_robust(
-                f"amqp://{self.settings.QUEUE_HOST}"
-            )
-            await connection.close()
-            
-            return {
-                "status": "healthy",
-                "type": "rabbitmq",
-                "response_time_ms": round((time.time() - start) * 1000, 2)
-            }
-            {% elif cookiecutter.queue_type == 'sqs' %}
-            # SQS check
-            import boto3
-            
-            sqs = boto3.client('sqs', region_name=self.settings.AWS_REGION)
-            response = sqs.list_queues()
-            
+            details = await queue_manager.describe()
             return {
                 "status": "healthy",
-                "type": "sqs",
-                "queues_count": len(response.get('QueueUrls', [])),
+                "type": "{{ cookiecutter.queue_type }}",
+                **details,
                 "response_time_ms": round((time.time() - start) * 1000, 2)
             }
-            {% else %}
-            return {
-                "status": "not_configured",
-                "type": "none"
-            }
-            {% endif %}
         except Exception as e:
             return {
                 "status": "unhealthy",
@@ -127,42 +95,152 @@ class HealthChecker:
                 "response_time_ms": round((time.time() - start) * 1000, 2)
             }
     
-    async def check_all(self, db_manager=None, cache_manager=None) -> Dict[str, Any]:
-        """Run all health checks."""
+    async def _with_timeout(self, name: str, check: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run one check, reporting it unhealthy if it takes longer than the timeout."""
+        start = time.time()
+        try:
+            return await asyncio.wait_for(check, self.timeout)
+        except asyncio.TimeoutError:
+            return {
+                "status": "unhealthy",
+                "error": f"{name} check timed out after {self.timeout}s",
+                "response_time_ms": round((time.time() - start) * 1000, 2)
+            }
+    
+    async def check_all(self, db_manager=None, cache_manager=None, queue_manager=None) -> Dict[str, Any]:
+        """Run all health checks concurrently, each bounded by the timeout."""
         start_time = time.time()
-        
-        checks = {
-            "status": "healthy",
-            "timestamp": time.time(),
-            "checks": {}
-        }
+        pending: Dict[str, Awaitable[Dict[str, Any]]] = {}
         
         # Check database
-        {% if cookiecutter.database_type != 'none' %}
+        {%- if cookiecutter.database_type != 'none' %}
         if db_manager:
-            db_health = await self.check_database(db_manager)
-            checks["checks"]["database"] = db_health
-            if db_health["status"] != "healthy":
-                checks["status"] = "degraded"
-        {% endif %}
+            pending["database"] = self.check_database(db_manager)
+        {%- endif %}
         
         # Check cache
-        {% if cookiecutter.cache_type != 'none' %}
+        {%- if cookiecutter.cache_type != 'none' %}
         if cache_manager:
-            cache_health = await self.check_cache(cache_manager)
-            checks["checks"]["cache"] = cache_health
-            if cache_health["status"] != "healthy":
-                checks["status"] = "degraded"
-        {% endif %}
+            pending["cache"] = self.check_cache(cache_manager)
+        {%- endif %}
         
         # Check queue
-        {% if cookiecutter.queue_type != 'none' %}
-        queue_health = await self.check_queue()
-        checks["checks"]["queue"] = queue_health
-        if queue_health["status"] != "healthy":
-            checks["status"] = "degraded"
-        {% endif %}
+        {%- if cookiecutter.queue_type != 'none' %}
+        if queue_manager:
+            pending["queue"] = self.check_queue(queue_manager)
+        {%- endif %}
+        
+        results = await asyncio.gather(*(self._with_timeout(name, check) for name, check in pending.items()))
+        checks = dict(zip(pending, results))
+        healthy = all(check["status"] == "healthy" for check in checks.values())
+        return {
+            "status": "healthy" if healthy else "degraded",
+            "timestamp": time.time(),
+            "checks": checks,
+            "total_response_time_ms": round((time.time() - start_time) * 1000, 2),
+        }
+
+
+class HealthProber:
+    """Run HealthChecker.check_all in the background and keep the latest result.
+    
+    Probes read the stored snapshot instead of checking dependencies
+    themselves, so they answer immediately however slow a dependency is,
+    and dependency load no longer grows with probe frequency. A snapshot
+    older than max_staleness means the prober has stopped (usually a
+    blocked event loop or a crashed task), and is reported as unhealthy.
+    """
+    
+    def __init__(
+        self,
+        checker: HealthChecker,
+        db_manager=None,
+        cache_manager=None,
+        queue_manager=None,
+        interval: float = 5.0,
+        max_staleness: float = 15.0,
+    ):
+        """Initialize prober."""
+        self.checker = checker
+        self.db_manager = db_manager
+        self.cache_manager = cache_manager
+        self.queue_manager = queue_manager
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start(self) -> None:
+        """Take a first snapshot, then keep refreshing it; call from a coroutine on the serving loop."""
+        if self._task is not None:
+            return
+        await self.probe()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"Checking dependencies every {self.interval}s in the background")
+    
+    async def stop(self) -> None:
+        """Stop refreshing the snapshot."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+    
+    async def probe(self) -> Dict[str, Any]:
+        """Check every dependency now and store the result."""
+        snapshot = await self.checker.check_all(self.db_manager, self.cache_manager, self.queue_manager)
+        for name, check in snapshot["checks"].items():
+            previous = (self._snapshot or {}).get("checks", {}).get(name, {})
+            if check["status"] != previous.get("status", "healthy"):
+                logger.warning(f"Dependency {name} is now {check['status']}: {check.get('error', '')}")
+        self._snapshot = snapshot
+        self._checked_at = time.monotonic()
+        return snapshot
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.probe()
+            except Exception:
+                logger.exception("Background health check failed")
+    
+    @property
+    def age(self) -> float:
+        """Seconds since the last snapshot was taken."""
+        return time.monotonic() - self._checked_at
+    
+    @property
+    def stale(self) -> bool:
+        """Whether the last snapshot is too old to trust."""
+        return self._snapshot is None or self.age > self.max_staleness
+    
+    def readiness(self) -> Tuple[Dict[str, Any], int]:
+        """Get the /ready response body and status code from the latest snapshot.
         
-        checks["total_response_time_ms"] = round((time.time() - start_time) * 1000, 2)
+        Only each check's status is included: error text can name hosts and
+        credentials, so it goes to the log (see probe) instead.
+        """
+        snapshot = self._snapshot or {"checks": {}}
+        checks = {name: check["status"] for name, check in snapshot["checks"].items()}
+        ready = not self.stale and all(status == "healthy" for status in checks.values())
+        body = {
+            "status": "ready" if ready else "not_ready",
+            "checks": checks,
+            "checked_at": snapshot.get("timestamp"),
+            "age_seconds": round(self.age, 3) if self._snapshot else None,
+            "stale": self.stale,
+        }
+        return body, 200 if ready else 503
+    
+    def liveness(self) -> Tuple[Dict[str, Any], int]:
+        """Get the /healthz response body and status code.
         
-        return checks
+        Unhealthy dependencies do not fail liveness (restarting would not
+        fix them); only a stale snapshot does, since the serving loop or the
+        prober itself is then stuck.
+        """
+        if self.stale:
+            return {"status": "stale", "age_seconds": round(self.age, 3) if self._snapshot else None}, 503
+        return {"status": "healthy", "dependencies": self._snapshot["status"]}, 200
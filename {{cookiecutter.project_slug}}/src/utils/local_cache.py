@@ -0,0 +1,312 @@
+"""In-process L1 cache layered in front of CacheManager."""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+{%- if cookiecutter.cache_type == 'redis' %}
+import asyncio
+{%- endif %}
+import json
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+InvalidationCallback = Callable[[List[str]], None]
+
+
+class LocalCache:
+    """Bounded LRU cache with per-entry TTL, capped by entry count and bytes.
+
+    Values are returned by reference, so callers must treat them as immutable.
+    Sizes are estimated from the JSON encoding of each value when it is stored.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, ttl: int = 30):
+        """Initialize local cache."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """Get the estimated size of all stored values."""
+        return self._bytes
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get value, or None when missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store value, evicting least recently used entries to stay in bounds."""
+        ttl = self.ttl if ttl is None or ttl <= 0 else min(ttl, self.ttl)
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            self.delete(key)
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+        with self._lock:
+            self._pop(key)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        """Remove several keys."""
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _pop(self, key: str) -> None:
+        """Remove a key; caller must hold the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+
+class LocalInvalidationBus:
+    """In-process stand-in for cross-replica invalidation.
+
+    Delivers invalidations to every other subscriber in the same process, which
+    is enough for single-replica deployments and tests.
+    """
+
+    _subscribers: List[Tuple[str, InvalidationCallback]] = []
+
+    def __init__(self):
+        """Initialize bus."""
+        self.origin = uuid.uuid4().hex
+
+    async def start(self, callback: InvalidationCallback) -> None:
+        """Subscribe to invalidations from other caches."""
+        self._subscribers.append((self.origin, callback))
+
+    async def stop(self) -> None:
+        """Unsubscribe."""
+        self._subscribers[:] = [sub for sub in self._subscribers if sub[0] != self.origin]
+
+    async def publish(self, keys: List[str]) -> None:
+        """Tell other caches to evict keys."""
+        for origin, callback in list(self._subscribers):
+            if origin != self.origin:
+                callback(keys)
+{% if cookiecutter.cache_type == 'redis' %}
+
+class RedisInvalidationBus:
+    """Cross-replica invalidation over Redis pub/sub."""
+
+    def __init__(self, cache_manager, channel: str):
+        """Initialize bus on the cache manager's Redis client."""
+        self.cache_manager = cache_manager
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, callback: InvalidationCallback) -> None:
+        """Subscribe and start listening in the background."""
+        self._pubsub = self.cache_manager.client.pubsub(ignore_subscribe_messages=True)
+        self._task = asyncio.create_task(self._listen(callback))
+
+    async def stop(self) -> None:
+        """Stop listening and release the pub/sub connection."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    async def _listen(self, callback: InvalidationCallback) -> None:
+        """Apply invalidations published by other replicas."""
+        while True:
+            try:
+                await self._pubsub.subscribe(self.channel)
+                async for message in self._pubsub.listen():
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") != self.origin:
+                        callback(payload.get("keys") or [])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Invalidations may have been missed; the caller clears its L1
+                logger.warning(f"Cache invalidation listener error: {e}")
+                callback([])
+                await asyncio.sleep(1)
+
+    async def publish(self, keys: List[str]) -> None:
+        """Tell other replicas to evict keys."""
+        try:
+            await self.cache_manager.client.publish(
+                self.channel, json.dumps({"origin": self.origin, "keys": keys})
+            )
+        except Exception as e:
+            logger.warning(f"Cache invalidation publish failed for {len(keys)} keys: {e}")
+{% endif %}
+
+
+class TwoTierCache:
+    """CacheManager with an in-process L1 in front of the shared cache.
+
+    Reads check the L1 first. Writes and deletes go to both tiers and are
+    broadcast so other replicas evict their L1 copies; fills after a miss
+    go to both tiers without a broadcast. The L1 TTL bounds
+    staleness if an invalidation is ever lost.
+    """
+
+    def __init__(self, backend, settings):
+        """Wrap a CacheManager."""
+        self.backend = backend
+        self.settings = settings
+        self.local = LocalCache(
+            max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+            max_bytes=settings.CACHE_LOCAL_MAX_BYTES,
+            ttl=settings.CACHE_LOCAL_TTL,
+        )
+        {%- if cookiecutter.cache_type == 'redis' %}
+        self.bus = RedisInvalidationBus(backend, settings.CACHE_INVALIDATION_CHANNEL)
+        {%- else %}
+        self.bus = LocalInvalidationBus()
+        {%- endif %}
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose backend attributes such as the client used by health checks
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    async def initialize(self) -> None:
+        """Initialize the shared cache and subscribe to invalidations."""
+        await self.backend.initialize()
+        await self.bus.start(self._on_invalidate)
+        logger.info(
+            f"Local cache enabled (max_entries={self.local.max_entries}, "
+            f"max_bytes={self.local.max_bytes}, ttl={self.local.ttl}s)"
+        )
+
+    async def close(self) -> None:
+        """Stop invalidations and close the shared cache."""
+        await self.bus.stop()
+        self.local.clear()
+        await self.backend.close()
+
+    def _on_invalidate(self, keys: List[str]) -> None:
+        """Evict keys changed elsewhere; an empty list clears everything."""
+        if keys:
+            self.local.delete_many(keys)
+        else:
+            self.local.clear()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from the L1, falling back to the shared cache."""
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        value = await self.backend.get(key)
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value in both tiers and invalidate other replicas."""
+        result = await self.backend.set(key, value, ttl)
+        self.local.set(key, value, ttl)
+        await self.bus.publish([key])
+        return result
+
+    async def fill(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set a value just loaded from the source of truth in both tiers.
+
+        Unlike set, this is not broadcast: the value is not a change, so
+        other replicas' L1 copies are still valid and stay put.
+        """
+        result = await self.backend.fill(key, value, ttl)
+        self.local.set(key, value, ttl)
+        return result
+
+    async def add(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value in both tiers only if the shared cache does not have the key.
+
+        Not broadcast either: the key was missing from the shared cache, so
+        there is nothing newer for other replicas to evict.
+        """
+        result = await self.backend.add(key, value, ttl)
+        if result:
+            self.local.set(key, value, ttl)
+        return result
+
+    async def delete(self, key: str) -> bool:
+        """Delete value from both tiers and invalidate other replicas."""
+        self.local.delete(key)
+        result = await self.backend.delete(key)
+        await self.bus.publish([key])
+        return result
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values, fetching only L1 misses from the shared cache."""
+        results: Dict[str, Any] = {}
+        missing: List[str] = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                results[key] = value
+        if missing:
+            found = await self.backend.get_many(missing)
+            for key, value in found.items():
+                self.local.set(key, value)
+            results.update(found)
+        return results
+
+    async def set_many(self, mapping: Mapping[str, Any], ttl: int = 300) -> bool:
+        """Set several values in both tiers with one invalidation broadcast."""
+        result = await self.backend.set_many(mapping, ttl)
+        for key, value in mapping.items():
+            self.local.set(key, value, ttl)
+        if mapping:
+            await self.bus.publish(list(mapping))
+        return result
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several values from both tiers with one invalidation broadcast."""
+        keys = list(keys)
+        self.local.delete_many(keys)
+        result = await self.backend.delete_many(keys)
+        if keys:
+            await self.bus.publish(keys)
+        return result
+
+    async def health_check(self) -> bool:
+        """Check shared cache health."""
+        return await self.backend.health_check()
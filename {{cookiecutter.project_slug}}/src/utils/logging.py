@@ -1,9 +1,22 @@
 """Logging configuration."""
+import atexit
+import copy
 import logging
+import queue
+import random
 import sys
 import json
-from datetime import datetime
-from typing import Any, Dict
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+from typing import IO, Any, Dict, List, Optional
+
+from src.utils.metrics import get_metrics
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
 
 
 class JSONFormatter(logging.Formatter):
@@ -12,35 +25,203 @@ class JSONFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON."""
         log_data: Dict[str, Any] = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            # The time the record was created, which may be well before it is formatted
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
         
-        # Add exception info if present
+        # Add exception info if present (pre-rendered by AsyncQueueHandler)
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
         
         # Add extra fields
         if hasattr(record, "extra"):
             log_data.update(record.extra)
         
-        return json.dumps(log_data)
+        if orjson is not None:
+            return orjson.dumps(log_data, default=str).decode()
+        return json.dumps(log_data, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of low-severity records from noisy loggers.
+    
+    Rates map a logger name (and its children) to the fraction of records
+    below WARNING to keep. Warnings and errors are never sampled out.
+    """
+    
+    def __init__(self, rates: Dict[str, float]):
+        """Initialize with per-logger keep rates."""
+        super().__init__()
+        # Longest prefix first, so the most specific rule wins
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + "."):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class AsyncQueueHandler(QueueHandler):
+    """Hand records to a background listener without ever blocking the caller.
+    
+    When the queue is full the record is dropped and counted instead, so a
+    stalled stdout cannot stall request handling.
+    """
+    
+    def __init__(self, log_queue: "queue.Queue[Optional[logging.LogRecord]]"):
+        """Initialize handler on a bounded queue."""
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exception_formatter = logging.Formatter()
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Resolve the message and traceback now, since their inputs may change later."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            get_metrics().track_log_record_dropped()
+
+
+class BatchingQueueListener:
+    """Background thread that formats queued records and writes them in batches."""
+    
+    def __init__(
+        self,
+        log_queue: "queue.Queue[Optional[logging.LogRecord]]",
+        formatter: logging.Formatter,
+        stream: IO[str],
+        batch_size: int = 256,
+    ):
+        """Initialize listener."""
+        self.queue = log_queue
+        self.formatter = formatter
+        self.stream = stream
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start the writer thread."""
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write out everything queued so far, then stop the thread."""
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+    
+    def _run(self) -> None:
+        while True:
+            # Block for the first record, then take whatever else is already waiting
+            batch: List[logging.LogRecord] = []
+            record = self.queue.get()
+            stopping = record is None
+            while record is not None:
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                stopping = record is None
+            if batch:
+                self._write(batch)
+            if stopping:
+                return
+    
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                lines.append(f"Unformattable log record from {record.name}: {record.msg!r}")
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            pass
+
+
+_listener: Optional[BatchingQueueListener] = None
+_queue_handler: Optional[AsyncQueueHandler] = None
 
 
-def setup_logging(level: str = "INFO") -> None:
-    """Setup structured logging to stdout."""
+def setup_logging(level: str = "INFO", settings: Optional[Any] = None) -> None:
+    """Setup structured logging to stdout.
+    
+    Without settings, or with LOG_ASYNC off, records are written directly on
+    the calling thread. Otherwise they go through a bounded queue to a
+    background writer, with optional per-logger levels and sampling.
+    """
+    global _listener, _queue_handler
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
     
     # Remove existing handlers
     root_logger.handlers = []
+    if _listener is not None:
+        _listener.stop()
+        _listener = _queue_handler = None
+    
+    if settings is not None:
+        # Per-logger levels are the cheapest way to quiet a logger: records
+        # below the level are never created
+        for name, logger_level in settings.LOG_LEVELS.items():
+            logging.getLogger(name).setLevel(logger_level)
     
-    # Add console handler with JSON formatter
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(JSONFormatter())
-    root_logger.addHandler(console_handler)
+    if settings is None or not settings.LOG_ASYNC:
+        # Add console handler with JSON formatter
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(JSONFormatter())
+        if settings is not None and settings.LOG_SAMPLE_RATES:
+            console_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+        root_logger.addHandler(console_handler)
+        return
+    
+    log_queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = AsyncQueueHandler(log_queue)
+    if settings.LOG_SAMPLE_RATES:
+        _queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+    _listener = BatchingQueueListener(log_queue, JSONFormatter(), sys.stdout, batch_size=settings.LOG_BATCH_SIZE)
+    _listener.start()
+    root_logger.addHandler(_queue_handler)
+
+
+def dropped_log_records() -> int:
+    """Get the number of records dropped because the logging queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+@atexit.register
+def _flush_logs() -> None:
+    """Write out queued records before the process exits."""
+    if _listener is not None:
+        _listener.stop()
 
 
 def get_logger(name: str):
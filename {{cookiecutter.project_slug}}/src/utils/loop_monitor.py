@@ -0,0 +1,84 @@
+"""Event-loop lag monitor and blocking-call detector."""
+from typing import Optional
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from src.utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Measure event-loop scheduling lag and report stalls with their stack.
+
+    A task on the loop sleeps for ``interval`` and records how late it woke
+    up; that lag is exported as a histogram. A watchdog thread checks that
+    the task keeps waking up; once it is ``stall_threshold`` seconds
+    overdue, the loop is blocked, so the watchdog logs the loop thread's
+    current stack (the code doing the blocking) and counts a stall.
+    """
+
+    def __init__(self, interval: float = 0.25, stall_threshold: float = 0.1, stack_depth: int = 30):
+        """Initialize monitor."""
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.stack_depth = stack_depth
+        self.metrics = get_metrics()
+        self._heartbeat = 0.0
+        self._thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start monitoring the running loop; call from a coroutine on it."""
+        if self._task is not None:
+            return
+        self._thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Monitoring event loop lag every {self.interval}s (stall threshold {self.stall_threshold}s)")
+
+    async def stop(self) -> None:
+        """Stop the measuring task and the watchdog."""
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._watchdog.join(self.stall_threshold)
+        self._task = None
+        self._watchdog = None
+
+    async def _measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self._heartbeat = time.monotonic()
+            self.metrics.track_loop_lag(lag)
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(self.stall_threshold / 2):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat - self.interval
+            # Report each stall once, as soon as it crosses the threshold
+            if stalled_for < self.stall_threshold or heartbeat == reported:
+                continue
+            reported = heartbeat
+            frame = sys._current_frames().get(self._thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=self.stack_depth)) if frame else "unavailable"
+            self.metrics.track_loop_stall()
+            logger.warning(
+                f"Event loop blocked for over {stalled_for * 1000:.0f}ms",
+                extra={"extra": {"stalled_ms": round(stalled_for * 1000), "stack": stack}},
+            )
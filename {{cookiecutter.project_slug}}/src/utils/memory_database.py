@@ -0,0 +1,50 @@
+"""Database manager for the in-memory item store (DB_TYPE=memory)."""
+from contextlib import asynccontextmanager
+from pathlib import Path
+import logging
+
+from src.classes.models.schemas import ItemResponse
+from src.classes.repositories.memory_repository import ItemRecord, ItemStore
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryDatabaseManager:
+    """Database manager owning an in-process item store instead of a connection pool."""
+
+    def __init__(self, settings, infra_config=None):
+        """Initialize manager with an empty store."""
+        self.settings = settings
+        self.infra_config = infra_config
+        self.store = ItemStore()
+
+    async def initialize(self) -> None:
+        """Load DB_MEMORY_SEED_FILE into the store, if set."""
+        logger.info("Using the in-memory item store; data is per process and lost on exit")
+        if self.settings.DB_MEMORY_SEED_FILE:
+            count = self.load(self.settings.DB_MEMORY_SEED_FILE)
+            logger.info(f"Loaded {count} items from {self.settings.DB_MEMORY_SEED_FILE}")
+
+    def load(self, path: str) -> int:
+        """Load items from a JSON lines file, as written by GET /api/v1/items/export."""
+        records = []
+        with Path(path).open("rb") as f:
+            for line in f:
+                if line.strip():
+                    item = ItemResponse.model_validate_json(line)
+                    records.append(ItemRecord(**item.model_dump()))
+        self.store.insert(records)
+        return len(records)
+
+    async def close(self) -> None:
+        pass
+
+    async def get_connection(self) -> None:
+        return None
+
+    @asynccontextmanager
+    async def session(self, autocommit: bool = False):
+        yield None
+
+    async def health_check(self) -> bool:
+        return True
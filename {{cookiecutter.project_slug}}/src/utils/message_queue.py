@@ -0,0 +1,314 @@
+"""Message queue manager."""
+{%- if cookiecutter.queue_type == 'sqs' %}
+from contextlib import AsyncExitStack
+{%- endif %}
+{%- if cookiecutter.queue_type == 'none' %}
+from typing import Any, Dict
+{%- else %}
+from typing import Any, Dict, Optional
+import asyncio
+{%- endif %}
+import logging
+{%- if cookiecutter.queue_type == 'kafka' %}
+
+from aiokafka import AIOKafkaProducer
+{%- elif cookiecutter.queue_type == 'rabbitmq' %}
+
+import aio_pika
+{%- elif cookiecutter.queue_type == 'sqs' %}
+
+import aioboto3
+{%- endif %}
+
+logger = logging.getLogger(__name__)
+{%- if cookiecutter.queue_type == 'kafka' %}
+
+
+class QueueManager:
+    """Kafka manager owning one long-lived producer.
+
+    The producer keeps its broker connections open, so publishing and
+    health checks reuse them instead of bootstrapping a client each time.
+    """
+
+    def __init__(self, settings, infra_config):
+        """Initialize queue manager."""
+        self.settings = settings
+        self.infra_config = infra_config
+        self._producer: Optional[AIOKafkaProducer] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def producer(self) -> Optional[AIOKafkaProducer]:
+        """Get the producer, or None until connected."""
+        return self._producer
+
+    @property
+    def queue_name(self) -> str:
+        """Get the topic, preferring infrastructure.yaml over environment."""
+        queue_config = getattr(self.infra_config, "queue", None) or {}
+        return (queue_config.get("settings") or {}).get("queue_name", self.settings.QUEUE_NAME)
+
+    def client_settings(self) -> Dict[str, Any]:
+        """Get connection settings shared by producers and consumers."""
+        client_settings: Dict[str, Any] = {
+            "bootstrap_servers": f"{self.settings.QUEUE_HOST}:{self.settings.QUEUE_PORT}",
+            "client_id": self.settings.APP_NAME,
+        }
+        if self.settings.QUEUE_USER:
+            client_settings.update(
+                security_protocol="SASL_PLAINTEXT",
+                sasl_mechanism="PLAIN",
+                sasl_plain_username=self.settings.QUEUE_USER,
+                sasl_plain_password=self.settings.QUEUE_PASSWORD,
+            )
+        return client_settings
+
+    async def initialize(self) -> None:
+        """Connect to the brokers; a broker that is down is retried on the next check."""
+        logger.info(f"Initializing kafka client for {self.settings.QUEUE_HOST}:{self.settings.QUEUE_PORT}")
+        try:
+            await self._connect()
+        except Exception as e:
+            logger.error(f"Could not connect to kafka: {e}")
+
+    async def _connect(self) -> AIOKafkaProducer:
+        async with self._lock:
+            if self._producer is None:
+                producer = AIOKafkaProducer(**self.client_settings())
+                try:
+                    await producer.start()
+                except Exception:
+                    await producer.stop()
+                    raise
+                self._producer = producer
+            return self._producer
+
+    async def close(self) -> None:
+        """Flush pending messages and close the producer."""
+        logger.info("Closing queue connection")
+        if self._producer:
+            await self._producer.stop()
+            self._producer = None
+
+    async def publish(self, body: bytes, key: Optional[bytes] = None, topic: Optional[str] = None) -> None:
+        """Publish one message and wait for the broker to acknowledge it."""
+        producer = self._producer or await self._connect()
+        await producer.send_and_wait(topic or self.queue_name, body, key=key)
+
+    async def describe(self) -> Dict[str, Any]:
+        """Fetch cluster metadata over an existing broker connection."""
+        producer = self._producer or await self._connect()
+        metadata = await producer.client.fetch_all_metadata()
+        return {"brokers": len(metadata.brokers()), "topics_count": len(metadata.topics())}
+
+    async def health_check(self) -> bool:
+        """Check that the cluster answers a metadata request."""
+        try:
+            await self.describe()
+            return True
+        except Exception as e:
+            logger.error(f"Queue health check failed: {e}")
+            return False
+{%- elif cookiecutter.queue_type == 'rabbitmq' %}
+
+
+class QueueManager:
+    """RabbitMQ manager owning one robust connection and channel.
+
+    The connection reconnects by itself after a broker restart, so
+    publishing and health checks never open a connection of their own.
+    """
+
+    def __init__(self, settings, infra_config):
+        """Initialize queue manager."""
+        self.settings = settings
+        self.infra_config = infra_config
+        self._connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+        self._channel: Optional[aio_pika.abc.AbstractChannel] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def connection(self) -> Optional[aio_pika.abc.AbstractRobustConnection]:
+        """Get the connection, or None until connected."""
+        return self._connection
+
+    @property
+    def queue_name(self) -> str:
+        """Get the queue name, preferring infrastructure.yaml over environment."""
+        queue_config = getattr(self.infra_config, "queue", None) or {}
+        return (queue_config.get("settings") or {}).get("queue_name", self.settings.QUEUE_NAME)
+
+    async def initialize(self) -> None:
+        """Connect and declare the queue; a broker that is down is retried on the next check."""
+        logger.info(f"Initializing rabbitmq connection to {self.settings.QUEUE_HOST}:{self.settings.QUEUE_PORT}")
+        try:
+            await self._get_channel()
+        except Exception as e:
+            logger.error(f"Could not connect to rabbitmq: {e}")
+
+    async def get_connection(self) -> aio_pika.abc.AbstractRobustConnection:
+        """Get the connection, connecting on first use."""
+        if self._connection is None:
+            self._connection = await aio_pika.connect_robust(
+                host=self.settings.QUEUE_HOST,
+                port=self.settings.QUEUE_PORT,
+                login=self.settings.QUEUE_USER or "guest",
+                password=self.settings.QUEUE_PASSWORD or "guest",
+                client_properties={"connection_name": self.settings.APP_NAME},
+            )
+        return self._connection
+
+    async def _get_channel(self) -> aio_pika.abc.AbstractChannel:
+        async with self._lock:
+            connection = await self.get_connection()
+            if self._channel is None or self._channel.is_closed:
+                self._channel = await connection.channel()
+                # Declared by every user of the queue, so it exists whichever starts first
+                await self._channel.declare_queue(self.queue_name, durable=True)
+            return self._channel
+
+    async def close(self) -> None:
+        """Close the channel and connection."""
+        logger.info("Closing queue connection")
+        if self._connection:
+            await self._connection.close()
+            self._connection = None
+            self._channel = None
+
+    async def publish(self, body: bytes, routing_key: Optional[str] = None) -> None:
+        """Publish one persistent message to the queue."""
+        channel = await self._get_channel()
+        message = aio_pika.Message(body, delivery_mode=aio_pika.DeliveryMode.PERSISTENT)
+        await channel.default_exchange.publish(message, routing_key=routing_key or self.queue_name)
+
+    async def describe(self) -> Dict[str, Any]:
+        """Look up the queue with a passive declare on the open channel."""
+        channel = await self._get_channel()
+        queue = await channel.declare_queue(self.queue_name, passive=True)
+        return {
+            "queue": self.queue_name,
+            "messages": queue.declaration_result.message_count,
+            "consumers": queue.declaration_result.consumer_count,
+        }
+
+    async def health_check(self) -> bool:
+        """Check that the broker answers on the open channel."""
+        try:
+            await self.describe()
+            return True
+        except Exception as e:
+            logger.error(f"Queue health check failed: {e}")
+            return False
+{%- elif cookiecutter.queue_type == 'sqs' %}
+
+
+class QueueManager:
+    """SQS manager owning one long-lived client.
+
+    The client keeps its HTTP connection pool open and the queue URL is
+    looked up once, so a health check is a single GetQueueAttributes call.
+    """
+
+    def __init__(self, settings, infra_config):
+        """Initialize queue manager."""
+        self.settings = settings
+        self.infra_config = infra_config
+        self._stack: Optional[AsyncExitStack] = None
+        self._client: Any = None
+        self._queue_url: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def client(self) -> Any:
+        """Get the SQS client, or None until initialized."""
+        return self._client
+
+    @property
+    def queue_name(self) -> str:
+        """Get the queue name, preferring infrastructure.yaml over environment."""
+        queue_config = getattr(self.infra_config, "queue", None) or {}
+        return (queue_config.get("settings") or {}).get("queue_name", self.settings.QUEUE_NAME)
+
+    async def initialize(self) -> None:
+        """Create the client and look up the queue URL; failures are retried on the next check."""
+        logger.info(f"Initializing sqs client in {self.settings.QUEUE_REGION}")
+        session = aioboto3.Session(
+            aws_access_key_id=self.settings.QUEUE_USER or None,
+            aws_secret_access_key=self.settings.QUEUE_PASSWORD or None,
+            region_name=self.settings.QUEUE_REGION,
+        )
+        self._stack = AsyncExitStack()
+        self._client = await self._stack.enter_async_context(
+            session.client("sqs", endpoint_url=self.settings.QUEUE_ENDPOINT_URL or None)
+        )
+        try:
+            await self.get_queue_url()
+        except Exception as e:
+            logger.error(f"Could not find sqs queue {self.queue_name}: {e}")
+
+    async def get_queue_url(self) -> str:
+        """Get the queue URL, looking it up on first use."""
+        async with self._lock:
+            if self._queue_url is None:
+                response = await self._client.get_queue_url(QueueName=self.queue_name)
+                self._queue_url = response["QueueUrl"]
+            return self._queue_url
+
+    async def close(self) -> None:
+        """Close the client and its connection pool."""
+        logger.info("Closing queue connection")
+        if self._stack:
+            await self._stack.aclose()
+            self._stack = None
+            self._client = None
+
+    async def publish(self, body: str, **attributes: Any) -> None:
+        """Send one message to the queue."""
+        await self._client.send_message(QueueUrl=await self.get_queue_url(), MessageBody=body, **attributes)
+
+    async def describe(self) -> Dict[str, Any]:
+        """Read the queue depth with one call on the open client."""
+        response = await self._client.get_queue_attributes(
+            QueueUrl=await self.get_queue_url(),
+            AttributeNames=["ApproximateNumberOfMessages"],
+        )
+        return {
+            "queue": self.queue_name,
+            "messages": int(response["Attributes"]["ApproximateNumberOfMessages"]),
+        }
+
+    async def health_check(self) -> bool:
+        """Check that the queue answers."""
+        try:
+            await self.describe()
+            return True
+        except Exception as e:
+            logger.error(f"Queue health check failed: {e}")
+            return False
+{%- else %}
+
+
+class QueueManager:
+    """Dummy queue manager when no queue is configured."""
+
+    def __init__(self, settings=None, infra_config=None):
+        pass
+
+    async def initialize(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def describe(self) -> Dict[str, Any]:
+        return {}
+
+    async def health_check(self) -> bool:
+        return True
+{%- endif %}
+
+
+def create_queue_manager(settings, infra_config) -> QueueManager:
+    """Create the queue manager."""
+    return QueueManager(settings, infra_config)
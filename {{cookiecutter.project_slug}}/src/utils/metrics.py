@@ -1,42 +1,367 @@
 """Metrics collector."""
 {% if cookiecutter.enable_metrics == 'yes' %}
-from typing import Optional
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+import atexit
 import logging
+import os
+import threading
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
 
 logger = logging.getLogger(__name__)
 
+# When set (before prometheus_client is imported), every process writes its
+# samples to mmap'd files in this directory and scrapes aggregate them
+MULTIPROCESS_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Label used for requests that matched no route, so scanners probing random
+# paths cannot create new series
+UNMATCHED_ROUTE = "unmatched"
+
+KNOWN_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_BACKEND_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
 
 class MetricsCollector:
-    """Prometheus metrics collector."""
+    """Prometheus metrics collector.
     
-    def __init__(self):
+    Every label is drawn from a bounded set: routes are reported by their
+    template (``/api/v1/items/{item_id}``), never the raw path, and unknown
+    HTTP methods are folded into ``OTHER``.
+    """
+    
+    def __init__(
+        self,
+        latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+        backend_buckets: Sequence[float] = DEFAULT_BACKEND_BUCKETS,
+        registry: CollectorRegistry = REGISTRY,
+    ):
         """Initialize metrics collector."""
-        # Initialize Prometheus metrics here
-        pass
+        self.requests_total = Counter(
+            "http_requests_total",
+            "HTTP requests by method, route template and status code",
+            ["method", "route", "status"],
+            registry=registry,
+        )
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency by method and route template",
+            ["method", "route"],
+            buckets=latency_buckets,
+            registry=registry,
+        )
+        self.requests_in_progress = Gauge(
+            "http_requests_in_progress",
+            "HTTP requests currently being handled",
+            ["method"],
+            registry=registry,
+            multiprocess_mode="livesum",
+        )
+        self.db_query_duration = Histogram(
+            "db_query_duration_seconds",
+            "Database statement latency by statement type",
+            ["query_type"],
+            buckets=backend_buckets,
+            registry=registry,
+        )
+        self.db_statement_duration = Histogram(
+            "db_statement_duration_seconds",
+            "Database statement latency by statement shape id (shapes are listed at /debug/queries)",
+            ["statement"],
+            buckets=backend_buckets,
+            registry=registry,
+        )
+        self.cache_operation_duration = Histogram(
+            "cache_operation_duration_seconds",
+            "Cache operation latency by operation",
+            ["operation"],
+            buckets=backend_buckets,
+            registry=registry,
+        )
+        self.cache_lookups_total = Counter(
+            "cache_lookups_total",
+            "Cache lookups by operation and result (hit or miss)",
+            ["operation", "result"],
+            registry=registry,
+        )
+        self.event_loop_lag = Histogram(
+            "event_loop_lag_seconds",
+            "How late event loop callbacks run compared to when they were scheduled",
+            buckets=backend_buckets,
+            registry=registry,
+        )
+        self.event_loop_stalls_total = Counter(
+            "event_loop_stalls_total",
+            "Times the event loop was blocked for longer than the stall threshold",
+            registry=registry,
+        )
+        self.log_records_dropped_total = Counter(
+            "log_records_dropped_total",
+            "Log records dropped because the logging queue was full",
+            registry=registry,
+        )
+        self.business_metrics = Gauge(
+            "business_metric",
+            "Application-defined business metrics",
+            ["name"],
+            registry=registry,
+            multiprocess_mode="mostrecent",
+        )
     
-    def track_request(self, method: str, endpoint: str, status_code: int) -> None:
-        """Track HTTP request metrics."""
-        pass
+    @staticmethod
+    def _method(method: str) -> str:
+        """Fold unknown HTTP methods into one label value."""
+        return method if method in KNOWN_METHODS else "OTHER"
+    
+    def track_request(self, method: str, endpoint: str, status_code: int, duration: Optional[float] = None) -> None:
+        """Track HTTP request metrics; endpoint must be the route template."""
+        method = self._method(method)
+        self.requests_total.labels(method, endpoint, str(status_code)).inc()
+        if duration is not None:
+            self.request_duration.labels(method, endpoint).observe(duration)
+    
+    def track_in_progress(self, method: str) -> ContextManager[None]:
+        """Count a request as in progress for the duration of a with block."""
+        return self.requests_in_progress.labels(self._method(method)).track_inprogress()
+    
+    def request_started(self, method: str) -> None:
+        """Count a request as in progress (for frameworks without a wrapping hook)."""
+        self.requests_in_progress.labels(self._method(method)).inc()
+    
+    def request_finished(self, method: str) -> None:
+        """Stop counting a request started with request_started."""
+        self.requests_in_progress.labels(self._method(method)).dec()
     
     def track_business_metric(self, metric_name: str, value: float) -> None:
         """Track business metrics."""
-        pass
+        self.business_metrics.labels(metric_name).set(value)
     
     def track_database_query(self, query_type: str, duration: float) -> None:
         """Track database query metrics."""
-        pass
+        self.db_query_duration.labels(query_type).observe(duration)
     
-    def track_cache_operation(self, operation: str, hit: bool) -> None:
-        """Track cache operation metrics."""
-        pass
+    def track_statement(self, statement_id: str, duration: float) -> None:
+        """Track the latency of one statement shape."""
+        self.db_statement_duration.labels(statement_id).observe(duration)
+    
+    def track_cache_operation(
+        self, operation: str, hit: Optional[bool] = None, duration: Optional[float] = None
+    ) -> None:
+        """Track cache operation metrics; hit is None for writes."""
+        if hit is not None:
+            self.cache_lookups_total.labels(operation, "hit" if hit else "miss").inc()
+        if duration is not None:
+            self.cache_operation_duration.labels(operation).observe(duration)
+    
+    def track_cache_lookups(self, operation: str, hits: int, misses: int) -> None:
+        """Track the hits and misses of a multi-key lookup."""
+        if hits:
+            self.cache_lookups_total.labels(operation, "hit").inc(hits)
+        if misses:
+            self.cache_lookups_total.labels(operation, "miss").inc(misses)
+    
+    def track_loop_lag(self, lag: float) -> None:
+        """Track one event loop lag measurement."""
+        self.event_loop_lag.observe(lag)
+    
+    def track_loop_stall(self) -> None:
+        """Count an event loop stall."""
+        self.event_loop_stalls_total.inc()
+    
+    def track_log_record_dropped(self) -> None:
+        """Count a log record dropped because the logging queue was full."""
+        self.log_records_dropped_total.inc()
+
+
+class InstrumentedCache:
+    """CacheManager wrapper that times every operation and counts hits and misses."""
+    
+    def __init__(self, backend, metrics: MetricsCollector):
+        """Wrap a CacheManager."""
+        self.backend = backend
+        self.metrics = metrics
+    
+    def __getattr__(self, name: str) -> Any:
+        # Expose backend attributes such as the client used by health checks
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+    
+    async def initialize(self) -> None:
+        """Initialize the wrapped cache."""
+        await self.backend.initialize()
+    
+    async def close(self) -> None:
+        """Close the wrapped cache."""
+        await self.backend.close()
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value, recording a hit or miss."""
+        start = time.perf_counter()
+        value = await self.backend.get(key)
+        self.metrics.track_cache_operation("get", hit=value is not None, duration=time.perf_counter() - start)
+        return value
+    
+    async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value."""
+        start = time.perf_counter()
+        result = await self.backend.set(key, value, ttl)
+        self.metrics.track_cache_operation("set", duration=time.perf_counter() - start)
+        return result
+    
+    async def fill(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value loaded after a miss."""
+        start = time.perf_counter()
+        result = await self.backend.fill(key, value, ttl)
+        self.metrics.track_cache_operation("fill", duration=time.perf_counter() - start)
+        return result
+    
+    async def add(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value if the key is missing."""
+        start = time.perf_counter()
+        result = await self.backend.add(key, value, ttl)
+        self.metrics.track_cache_operation("add", duration=time.perf_counter() - start)
+        return result
+    
+    async def delete(self, key: str) -> bool:
+        """Delete value."""
+        start = time.perf_counter()
+        result = await self.backend.delete(key)
+        self.metrics.track_cache_operation("delete", duration=time.perf_counter() - start)
+        return result
+    
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values, recording a hit or miss per key."""
+        keys = list(keys)
+        start = time.perf_counter()
+        found = await self.backend.get_many(keys)
+        self.metrics.track_cache_operation("get_many", duration=time.perf_counter() - start)
+        self.metrics.track_cache_lookups("get_many", hits=len(found), misses=len(keys) - len(found))
+        return found
+    
+    async def set_many(self, mapping: Mapping[str, Any], ttl: int = 300) -> bool:
+        """Set several values."""
+        start = time.perf_counter()
+        result = await self.backend.set_many(mapping, ttl)
+        self.metrics.track_cache_operation("set_many", duration=time.perf_counter() - start)
+        return result
+    
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several values."""
+        start = time.perf_counter()
+        result = await self.backend.delete_many(keys)
+        self.metrics.track_cache_operation("delete_many", duration=time.perf_counter() - start)
+        return result
+    
+    async def health_check(self) -> bool:
+        """Check wrapped cache health."""
+        return await self.backend.health_check()
+
+
+def multiprocess_dir() -> Optional[str]:
+    """Get the multiprocess metrics directory, or None in single-process mode."""
+    return os.environ.get(MULTIPROCESS_DIR_ENV) or None
+
+
+def clear_multiprocess_dir() -> None:
+    """Remove metric files left by earlier runs; call once before starting workers."""
+    path = multiprocess_dir()
+    if path is None:
+        return
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in directory.glob("*.db"):
+        stale.unlink()
+    logger.info(f"Cleared multiprocess metrics directory {directory}")
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a dead process's live gauges so they stop counting toward scrapes."""
+    if multiprocess_dir() is not None:
+        multiprocess.mark_process_dead(pid)
+
+
+def scrape_registry() -> CollectorRegistry:
+    """Get the registry to serve scrapes from, aggregating all processes if needed."""
+    if multiprocess_dir() is None:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def generate_metrics() -> Tuple[bytes, str]:
+    """Render the metrics exposition and its content type."""
+    return generate_latest(scrape_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int) -> None:
+    """Serve /metrics on its own port, for processes without a web app."""
+    start_http_server(port, registry=scrape_registry())
+    logger.info(f"Serving metrics on port {port}")
+
+
+_collector: Optional[MetricsCollector] = None
+_collector_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsCollector:
+    """Get the process-wide collector, creating it on first use.
+    
+    Prometheus metrics can only be registered once per registry, so the
+    app, the data layer and the worker all share this instance.
+    """
+    global _collector
+    if _collector is None:
+        with _collector_lock:
+            if _collector is None:
+                from src.config import get_settings
+                settings = get_settings()
+                _collector = MetricsCollector(
+                    latency_buckets=settings.METRICS_LATENCY_BUCKETS,
+                    backend_buckets=settings.METRICS_BACKEND_BUCKETS,
+                )
+                if multiprocess_dir() is not None:
+                    # Covers graceful exits; gunicorn's child_exit hook covers crashes
+                    atexit.register(lambda: mark_process_dead(os.getpid()))
+    return _collector
 {% else %}
+from typing import ContextManager, Optional
+from contextlib import nullcontext
+
+UNMATCHED_ROUTE = "unmatched"
+
+
 class MetricsCollector:
     """Dummy metrics collector when metrics are disabled."""
     
     def __init__(self):
         pass
     
-    def track_request(self, method: str, endpoint: str, status_code: int) -> None:
+    def track_request(self, method: str, endpoint: str, status_code: int, duration: Optional[float] = None) -> None:
+        pass
+    
+    def track_in_progress(self, method: str) -> ContextManager[None]:
+        return nullcontext()
+    
+    def request_started(self, method: str) -> None:
+        pass
+    
+    def request_finished(self, method: str) -> None:
         pass
     
     def track_business_metric(self, metric_name: str, value: float) -> None:
@@ -45,6 +370,31 @@ class MetricsCollector:
     def track_database_query(self, query_type: str, duration: float) -> None:
         pass
     
-    def track_cache_operation(self, operation: str, hit: bool) -> None:
+    def track_statement(self, statement_id: str, duration: float) -> None:
+        pass
+    
+    def track_cache_operation(
+        self, operation: str, hit: Optional[bool] = None, duration: Optional[float] = None
+    ) -> None:
+        pass
+    
+    def track_cache_lookups(self, operation: str, hits: int, misses: int) -> None:
+        pass
+    
+    def track_loop_lag(self, lag: float) -> None:
+        pass
+    
+    def track_loop_stall(self) -> None:
+        pass
+    
+    def track_log_record_dropped(self) -> None:
         pass
+
+
+_collector = MetricsCollector()
+
+
+def get_metrics() -> MetricsCollector:
+    """Get the process-wide collector."""
+    return _collector
 {% endif %}
@@ -0,0 +1,191 @@
+"""On-demand sampling profiler for single requests and worker jobs."""
+from collections import Counter, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+import hmac
+import itertools
+import logging
+import random
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _collapse(frame: Any, root: str) -> str:
+    """Render a stack as one collapsed-stack line prefix, outermost frame first."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+        frame = frame.f_back
+    names.append(root)
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Background thread that samples the stacks of a few threads on a timer."""
+
+    def __init__(self, thread_ids: Iterable[int], interval: float):
+        """Initialize sampler for the given thread idents."""
+        self.thread_ids = list(thread_ids)
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """Stop sampling and return the collapsed stack counts."""
+        self._stopped.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in self.thread_ids:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.samples[_collapse(frame, names.get(thread_id, str(thread_id)))] += 1
+
+
+class CapturedProfile:
+    """One profiled request or job."""
+
+    def __init__(self, profile_id: int, name: str, samples: Counter, started_at: float, duration: float):
+        """Initialize profile."""
+        self.id = profile_id
+        self.name = name
+        self.samples = samples
+        self.started_at = started_at
+        self.duration = duration
+
+    def summary(self) -> Dict[str, Any]:
+        """Get the profile's metadata, without its stacks."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": sum(self.samples.values()),
+        }
+
+    def collapsed(self) -> str:
+        """Render as collapsed stacks ("frame;frame;frame count"), as read by flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class Profiler:
+    """Profile selected units of work and keep the most recent profiles.
+
+    Work is profiled when the caller asks for it (a request header, checked
+    with ``authorized``) or at random at ``sample_rate``. Only one profile
+    runs at a time per process, so the overhead stays bounded no matter
+    how many requests ask. Stacks are sampled rather than traced, so the
+    profiled code runs at close to full speed; on an event loop thread the
+    samples also include whatever else the loop ran meanwhile.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = 20,
+        interval: float = 0.005,
+        sample_rate: float = 0.0,
+        token: Optional[str] = None,
+    ):
+        """Initialize profiler."""
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.token = token
+        self._profiles: Deque[CapturedProfile] = deque(maxlen=buffer_size)
+        self._ids = itertools.count(1)
+        self._busy = threading.Lock()
+
+    def authorized(self, value: Optional[str]) -> bool:
+        """Check a header value against the configured token (any value when unset)."""
+        if value is None:
+            return False
+        if not self.token:
+            return True
+        return hmac.compare_digest(value.encode(), self.token.encode())
+
+    def should_profile(self, header_value: Optional[str] = None) -> bool:
+        """Decide whether to profile a unit of work."""
+        if self.authorized(header_value):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self, name: str, extra_threads: Iterable[int] = ()) -> Iterator[Optional[int]]:
+        """Profile the with block on this thread (and extra_threads).
+
+        Yields the id the profile will be stored under, or None when another
+        profile is already running and this one is skipped.
+        """
+        if not self._busy.acquire(blocking=False):
+            yield None
+            return
+        try:
+            profile_id = next(self._ids)
+            sampler = StackSampler([threading.get_ident(), *extra_threads], self.interval)
+            started_at = time.time()
+            start = time.perf_counter()
+            sampler.start()
+            try:
+                yield profile_id
+            finally:
+                samples = sampler.stop()
+                duration = time.perf_counter() - start
+                self._profiles.append(CapturedProfile(profile_id, name, samples, started_at, duration))
+                logger.info(f"Captured profile {profile_id} of {name} ({duration * 1000:.1f}ms)")
+        finally:
+            self._busy.release()
+
+    def profiles(self) -> List[CapturedProfile]:
+        """Get the buffered profiles, newest first."""
+        return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[CapturedProfile]:
+        """Get a buffered profile by id."""
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def dump(self, directory: str) -> int:
+        """Write every buffered profile to directory as <id>-<name>.collapsed files."""
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        profiles = self.profiles()
+        for profile in profiles:
+            safe_name = "".join(c if c.isalnum() else "_" for c in profile.name).strip("_")
+            (path / f"{profile.id}-{safe_name}.collapsed").write_text(profile.collapsed())
+        logger.info(f"Wrote {len(profiles)} profiles to {path}")
+        return len(profiles)
+
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    """Get the process-wide profiler, creating it on first use."""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                from src.config import get_settings
+                settings = get_settings()
+                _profiler = Profiler(
+                    buffer_size=settings.PROFILING_BUFFER_SIZE,
+                    interval=settings.PROFILING_INTERVAL,
+                    sample_rate=settings.PROFILING_SAMPLE_RATE,
+                    token=settings.PROFILING_TOKEN,
+                )
+    return _profiler
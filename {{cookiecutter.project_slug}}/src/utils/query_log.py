@@ -0,0 +1,179 @@
+"""Per-statement query timing, slowest-query table and slow-query log."""
+from functools import lru_cache
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import hashlib
+import heapq
+import itertools
+import logging
+import re
+import threading
+import time
+
+from src.utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Shape id shared by statements beyond max_shapes, so labels stay bounded
+OTHER_SHAPE_ID = "other"
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROW_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """Normalize a SQL statement so executions differing only in values match.
+
+    Literals and driver placeholders become ``?`` and value lists (``IN``
+    lists, multi-row ``VALUES``) collapse to ``(...)``, so a shape never
+    contains parameter values.
+    """
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _VALUE_LIST.sub("(...)", shape)
+    shape = _ROW_LIST.sub("(...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+@lru_cache(maxsize=1024)
+def _shape_hash(shape: str) -> str:
+    """Get a short stable id for a shape, used as its metric label."""
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+def redact(parameters: Any) -> Any:
+    """Replace parameter values with their type names, keeping the structure."""
+    if isinstance(parameters, Mapping):
+        return {key: redact(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        redacted = [redact(value) for value in parameters[:10]]
+        if len(parameters) > 10:
+            redacted.append(f"... {len(parameters) - 10} more")
+        return redacted
+    return type(parameters).__name__
+
+
+class StatementStats:
+    """Running totals for one statement shape."""
+
+    __slots__ = ("shape_id", "shape", "query_type", "count", "total", "max")
+
+    def __init__(self, shape_id: str, shape: str, query_type: str):
+        """Initialize empty totals."""
+        self.shape_id = shape_id
+        self.shape = shape
+        self.query_type = query_type
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.shape_id,
+            "statement": self.shape,
+            "query_type": self.query_type,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class QueryLog:
+    """Record every statement's duration by shape.
+
+    Feeds the statement histograms, keeps per-shape totals and the top_n
+    slowest executions for /debug/queries, and logs statements slower than
+    slow_threshold seconds with their parameters redacted.
+    """
+
+    def __init__(self, slow_threshold: float = 0.5, top_n: int = 20, max_shapes: int = 200):
+        """Initialize query log."""
+        self.slow_threshold = slow_threshold
+        self.top_n = top_n
+        self.max_shapes = max_shapes
+        self.metrics = get_metrics()
+        self._stats: Dict[str, StatementStats] = {}
+        self._slowest: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _shape_id(self, shape: str) -> str:
+        shape_id = _shape_hash(shape)
+        if shape_id not in self._stats and len(self._stats) >= self.max_shapes:
+            return OTHER_SHAPE_ID
+        return shape_id
+
+    def record(self, query_type: str, shape: str, duration: float, parameters: Any = None) -> None:
+        """Record one execution of a statement."""
+        with self._lock:
+            shape_id = self._shape_id(shape)
+            stats = self._stats.get(shape_id)
+            if stats is None:
+                stats = self._stats[shape_id] = StatementStats(
+                    shape_id, shape if shape_id != OTHER_SHAPE_ID else "(other statements)", query_type
+                )
+            stats.count += 1
+            stats.total += duration
+            stats.max = max(stats.max, duration)
+            if len(self._slowest) < self.top_n or duration > self._slowest[0][0]:
+                entry = {
+                    "id": shape_id,
+                    "statement": shape,
+                    "duration_ms": round(duration * 1000, 3),
+                    "at": time.time(),
+                }
+                item = (duration, next(self._sequence), entry)
+                if len(self._slowest) < self.top_n:
+                    heapq.heappush(self._slowest, item)
+                else:
+                    heapq.heapreplace(self._slowest, item)
+
+        self.metrics.track_database_query(query_type, duration)
+        self.metrics.track_statement(shape_id, duration)
+        if self.slow_threshold and duration >= self.slow_threshold:
+            logger.warning(
+                f"Slow query ({duration * 1000:.1f}ms): {shape} parameters={redact(parameters)}"
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the slowest executions and per-shape totals, slowest first."""
+        with self._lock:
+            slowest = [entry for _, _, entry in sorted(self._slowest, reverse=True)]
+            statements = sorted(self._stats.values(), key=lambda stats: stats.total, reverse=True)
+            return {
+                "slow_threshold_ms": self.slow_threshold * 1000,
+                "slowest": slowest,
+                "statements": [stats.to_dict() for stats in statements],
+            }
+
+    def reset(self) -> None:
+        """Clear totals and the slowest table."""
+        with self._lock:
+            self._stats.clear()
+            self._slowest.clear()
+
+
+_query_log: Optional[QueryLog] = None
+_query_log_lock = threading.Lock()
+
+
+def get_query_log() -> QueryLog:
+    """Get the process-wide query log, creating it on first use."""
+    global _query_log
+    if _query_log is None:
+        with _query_log_lock:
+            if _query_log is None:
+                from src.config import get_settings
+                settings = get_settings()
+                _query_log = QueryLog(
+                    slow_threshold=settings.DB_SLOW_QUERY_THRESHOLD,
+                    top_n=settings.DB_QUERY_LOG_TOP_N,
+                    max_shapes=settings.DB_QUERY_MAX_SHAPES,
+                )
+    return _query_log
@@ -0,0 +1,96 @@
+"""Fast JSON encoding for API responses."""
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Type
+from uuid import UUID
+import json
+
+from pydantic import BaseModel, TypeAdapter
+{%- if cookiecutter.web_framework == 'fastapi' %}
+from fastapi.responses import JSONResponse
+{%- else %}
+from flask import Response, current_app
+from flask.json.provider import DefaultJSONProvider
+{%- endif %}
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Encode types the JSON library does not handle natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    # orjson encodes these itself; the stdlib fallback needs them spelled out
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (Decimal, UUID)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode obj as compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data: Any) -> Any:
+    """Decode JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=None)
+def _adapter(model_type: Type[Any]) -> TypeAdapter:
+    """Get a TypeAdapter for a type, built once per type."""
+    return TypeAdapter(model_type)
+
+
+def dump_model(model: BaseModel) -> bytes:
+    """Encode a model straight to JSON bytes in pydantic-core, with no intermediate dict."""
+    return _adapter(type(model)).dump_json(model)
+{% if cookiecutter.web_framework == 'fastapi' %}
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; bytes content is sent as-is."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def model_response(model: BaseModel, status_code: int = 200) -> FastJSONResponse:
+    """Build a response from a validated model, skipping FastAPI's re-serialization."""
+    return FastJSONResponse(content=dump_model(model), status_code=status_code)
+{%- else %}
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Datetimes are encoded as ISO 8601 (not HTTP dates) and keys keep their
+    insertion order, matching the FastAPI variant.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        # Encode to bytes once instead of going through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+def model_response(model: BaseModel, status: int = 200) -> Response:
+    """Build a response from a validated model without an intermediate dict."""
+    return current_app.response_class(dump_model(model), status=status, mimetype="application/json")
+{%- endif %}
@@ -0,0 +1,339 @@
+"""OpenTelemetry tracing setup and helpers."""
+{% if cookiecutter.enable_tracing == 'yes' %}
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+import atexit
+import inspect
+import logging
+import threading
+
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import SpanContext, SpanKind, Status, StatusCode, TraceFlags
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("{{ cookiecutter.project_slug }}")
+
+
+class HeadSampler(Sampler):
+    """Sample a fixed fraction of new traces, following the parent's decision otherwise.
+
+    With record_unsampled, traces that lose the coin toss are still recorded
+    (but not marked sampled), so TailSamplingProcessor can keep them if they
+    turn out slow or failed. Downstream services still see them as unsampled.
+    """
+
+    def __init__(self, rate: float, record_unsampled: bool = False):
+        """Initialize sampler."""
+        self._sampler = ParentBased(TraceIdRatioBased(rate))
+        self.record_unsampled = record_unsampled
+
+    def should_sample(self, parent_context, trace_id, name, kind=None, attributes=None, links=None, trace_state=None):
+        result = self._sampler.should_sample(parent_context, trace_id, name, kind, attributes, links, trace_state)
+        if result.decision == Decision.DROP and self.record_unsampled:
+            # The span starts with the result's attributes, so pass the caller's on
+            return SamplingResult(Decision.RECORD_ONLY, attributes, result.trace_state)
+        return result
+
+    def get_description(self) -> str:
+        return f"HeadSampler({self._sampler.get_description()}, record_unsampled={self.record_unsampled})"
+
+
+def _as_sampled(span: ReadableSpan) -> ReadableSpan:
+    """Copy a finished span with its sampled flag set, so exporters accept it."""
+    ctx = span.context
+    return ReadableSpan(
+        name=span.name,
+        context=SpanContext(ctx.trace_id, ctx.span_id, ctx.is_remote, TraceFlags(TraceFlags.SAMPLED), ctx.trace_state),
+        parent=span.parent,
+        resource=span.resource,
+        attributes=span.attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """Pass sampled spans through; hold unsampled ones until their trace ends.
+
+    When the local root span of an unsampled trace ends, the trace is kept
+    (sent on to the delegate) if the root took at least slow_threshold
+    seconds or any span in it failed, and dropped otherwise. At most
+    max_pending traces are held; the oldest are dropped beyond that.
+    """
+
+    def __init__(self, delegate: SpanProcessor, slow_threshold: float, max_pending: int = 2048, max_spans: int = 512):
+        """Initialize processor in front of delegate (usually a BatchSpanProcessor)."""
+        self.delegate = delegate
+        self.slow_threshold_ns = int(slow_threshold * 1e9)
+        self.max_pending = max_pending
+        self.max_spans = max_spans
+        self._pending: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        self._failed: set = set()
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Optional[context.Context] = None) -> None:
+        self.delegate.on_start(span, parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.context.trace_flags.sampled:
+            self.delegate.on_end(span)
+            return
+        trace_id = span.context.trace_id
+        is_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            spans = self._pending.get(trace_id)
+            if spans is None:
+                spans = self._pending[trace_id] = []
+                if len(self._pending) > self.max_pending:
+                    evicted, _ = self._pending.popitem(last=False)
+                    self._failed.discard(evicted)
+            if len(spans) < self.max_spans:
+                spans.append(span)
+            if span.status.status_code == StatusCode.ERROR:
+                self._failed.add(trace_id)
+            if not is_root:
+                return
+            spans = self._pending.pop(trace_id)
+            failed = trace_id in self._failed
+            self._failed.discard(trace_id)
+        if failed or span.end_time - span.start_time >= self.slow_threshold_ns:
+            for kept in spans:
+                self.delegate.on_end(_as_sampled(kept))
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+
+class JSONLinesSpanExporter(SpanExporter):
+    """Append finished spans to a file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        """Initialize exporter."""
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning(f"Failed to write {len(spans)} spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _create_exporter(settings) -> Optional[SpanExporter]:
+    """Create the exporter named by TRACING_EXPORTER."""
+    if settings.TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    if settings.TRACING_EXPORTER == "file":
+        return JSONLinesSpanExporter(settings.TRACING_FILE_PATH)
+    if settings.TRACING_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    return None
+
+
+_configured = False
+
+
+def setup_tracing(settings, service_name: Optional[str] = None) -> None:
+    """Install the tracer provider; call once per process, before serving.
+
+    Spans are exported in batches from a background thread. Only head-sampled
+    traces (TRACING_SAMPLE_RATE) are exported, plus, with TRACING_TAIL_KEEP,
+    traces slower than TRACING_SLOW_THRESHOLD or containing an error.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    exporter = _create_exporter(settings)
+    if exporter is None:
+        logger.info("Tracing disabled (TRACING_EXPORTER=none)")
+        return
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name or settings.APP_NAME}),
+        sampler=HeadSampler(settings.TRACING_SAMPLE_RATE, record_unsampled=settings.TRACING_TAIL_KEEP),
+    )
+    processor: SpanProcessor = BatchSpanProcessor(
+        exporter,
+        max_queue_size=settings.TRACING_QUEUE_SIZE,
+        max_export_batch_size=settings.TRACING_BATCH_SIZE,
+        schedule_delay_millis=int(settings.TRACING_EXPORT_INTERVAL * 1000),
+    )
+    if settings.TRACING_TAIL_KEEP:
+        processor = TailSamplingProcessor(
+            processor, settings.TRACING_SLOW_THRESHOLD, max_pending=settings.TRACING_MAX_PENDING_TRACES
+        )
+    provider.add_span_processor(processor)
+    trace.set_tracer_provider(provider)
+    atexit.register(provider.shutdown)
+    logger.info(
+        f"Tracing to {settings.TRACING_EXPORTER} (sample rate {settings.TRACING_SAMPLE_RATE}, "
+        f"tail keep {settings.TRACING_TAIL_KEEP})"
+    )
+
+
+def traced(name: Optional[str] = None, kind: SpanKind = SpanKind.INTERNAL) -> Callable:
+    """Decorator to run a function (sync or async) in its own span, named after it by default."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.start_as_current_span(span_name, kind=kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name, kind=kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def server_span(name: str, headers: Mapping[str, str], attributes: Optional[Dict[str, Any]] = None) -> Iterator[trace.Span]:
+    """Open the span for an incoming request, continuing the caller's trace if it sent one."""
+    with tracer.start_as_current_span(
+        name, context=propagate.extract(headers), kind=SpanKind.SERVER, attributes=attributes
+    ) as span:
+        yield span
+
+
+def job_span(name: str) -> ContextManager[trace.Span]:
+    """Open the span for one unit of background work."""
+    return tracer.start_as_current_span(f"job {name}", kind=SpanKind.CONSUMER)
+
+
+def set_http_status(span: trace.Span, status_code: int) -> None:
+    """Record a response status, marking server errors as span errors."""
+    span.set_attribute("http.response.status_code", status_code)
+    if status_code >= 500:
+        span.set_status(Status(StatusCode.ERROR))
+
+
+class TracedCache:
+    """CacheManager wrapper that runs every operation in a span."""
+
+    def __init__(self, backend):
+        """Wrap a CacheManager."""
+        self.backend = backend
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose backend attributes such as the client used by health checks
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    async def initialize(self) -> None:
+        """Initialize the wrapped cache."""
+        await self.backend.initialize()
+
+    async def close(self) -> None:
+        """Close the wrapped cache."""
+        await self.backend.close()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value."""
+        with tracer.start_as_current_span("cache.get") as span:
+            value = await self.backend.get(key)
+            span.set_attribute("cache.hit", value is not None)
+            return value
+
+    async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value."""
+        with tracer.start_as_current_span("cache.set"):
+            return await self.backend.set(key, value, ttl)
+
+    async def fill(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value loaded after a miss."""
+        with tracer.start_as_current_span("cache.fill"):
+            return await self.backend.fill(key, value, ttl)
+
+    async def add(self, key: str, value: Any, ttl: int = 300) -> bool:
+        """Set value if the key is missing."""
+        with tracer.start_as_current_span("cache.add"):
+            return await self.backend.add(key, value, ttl)
+
+    async def delete(self, key: str) -> bool:
+        """Delete value."""
+        with tracer.start_as_current_span("cache.delete"):
+            return await self.backend.delete(key)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values."""
+        keys = list(keys)
+        with tracer.start_as_current_span("cache.get_many", attributes={"cache.keys": len(keys)}) as span:
+            found = await self.backend.get_many(keys)
+            span.set_attribute("cache.hits", len(found))
+            return found
+
+    async def set_many(self, mapping: Mapping[str, Any], ttl: int = 300) -> bool:
+        """Set several values."""
+        with tracer.start_as_current_span("cache.set_many", attributes={"cache.keys": len(mapping)}):
+            return await self.backend.set_many(mapping, ttl)
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete several values."""
+        with tracer.start_as_current_span("cache.delete_many"):
+            return await self.backend.delete_many(keys)
+
+    async def health_check(self) -> bool:
+        """Check wrapped cache health."""
+        return await self.backend.health_check()
+{% else %}
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, Mapping, Optional
+
+
+def setup_tracing(settings, service_name: Optional[str] = None) -> None:
+    pass
+
+
+def traced(name: Optional[str] = None, kind: Any = None) -> Callable:
+    """Tracing is disabled, so functions are returned unwrapped."""
+    def decorator(func: Callable) -> Callable:
+        return func
+    return decorator
+
+
+@contextmanager
+def server_span(name: str, headers: Mapping[str, str], attributes: Optional[Dict[str, Any]] = None) -> Iterator[None]:
+    yield None
+
+
+def job_span(name: str) -> ContextManager[None]:
+    return nullcontext()
+
+
+def set_http_status(span: Any, status_code: int) -> None:
+    pass
+{% endif %}
@@ -4,17 +4,28 @@ This worker provides a minimal, well-behaved entrypoint so that generated
 projects (and the local `docker-compose` setups) can run `python -m src.worker`
 without failing when no more advanced worker implementation is needed.
 
-It will initialize database/cache managers if configured, then wait for
-termination signals and shut down gracefully.
+It will initialize database/cache/queue managers if configured. With a queue
+it consumes messages with the handlers in `src.handlers` (see
+`src.utils.consumer`) until a termination signal; otherwise it just waits for
+one. Either way it shuts down gracefully.
 """
 import asyncio
 import signal
-from typing import Optional
+from typing import Any, Awaitable, Optional
 
 from src.config import Settings, InfrastructureConfig
 from src.utils.logging import setup_logging, get_logger
-from src.utils.database import DatabaseManager
-from src.utils.cache import CacheManager
+from src.utils.loop_monitor import LoopMonitor
+from src.utils.database import DatabaseManager, create_database_manager
+from src.utils.cache import CacheManager, create_cache_manager
+from src.utils.message_queue import QueueManager, create_queue_manager
+from src.utils.consumer import create_consumer
+import src.handlers  # noqa: F401 (registers the message handlers)
+from src.utils.profiling import get_profiler
+from src.utils.tracing import job_span, setup_tracing
+{%- if cookiecutter.enable_metrics == 'yes' %}
+from src.utils.metrics import get_metrics, start_metrics_server
+{%- endif %}
 
 
 class Worker:
@@ -25,26 +36,53 @@ class Worker:
 
         self.db: Optional[DatabaseManager] = None
         self.cache: Optional[CacheManager] = None
+        self.queue: Optional[QueueManager] = None
+        self.profiler = get_profiler()
+        self.loop_monitor = LoopMonitor(self.settings.LOOP_MONITOR_INTERVAL, self.settings.LOOP_STALL_THRESHOLD)
         self._shutdown = asyncio.Event()
 
     async def initialize(self):
         self.logger.info("Initializing worker components")
+        if self.settings.LOOP_MONITOR_ENABLED:
+            self.loop_monitor.start()
+{%- if cookiecutter.enable_metrics == 'yes' %}
+        # In multiprocess mode this process's samples land in the shared
+        # directory, so the web app's /metrics includes the worker too
+        get_metrics()
+        if self.settings.WORKER_METRICS_PORT:
+            start_metrics_server(self.settings.WORKER_METRICS_PORT)
+{%- endif %}
         if self.infra.database != 'none':
-            self.db = DatabaseManager(self.settings, self.infra)
+            self.db = create_database_manager(self.settings, self.infra)
             await self.db.initialize()
 
         if self.infra.cache != 'none':
-            self.cache = CacheManager(self.settings, self.infra)
+            self.cache = create_cache_manager(self.settings, self.infra)
             await self.cache.initialize()
 
+        if self.infra.queue:
+            self.queue = create_queue_manager(self.settings, self.infra)
+            await self.queue.initialize()
+
     async def start(self):
         await self.initialize()
+        if self.queue:
+            self.logger.info("Worker started — consuming messages until shutdown")
+            consumer = create_consumer(self.queue, self.settings, run_job=self.run_job)
+            await consumer.run(self._shutdown)
+            await self.shutdown()
+            return
         self.logger.info("Worker started — waiting for shutdown signal")
         await self._shutdown.wait()
         await self.shutdown()
 
     async def shutdown(self):
         self.logger.info("Worker shutting down")
+        if self.queue:
+            try:
+                await self.queue.close()
+            except Exception:
+                self.logger.exception("Error closing queue")
         if self.cache:
             try:
                 await self.cache.close()
@@ -55,6 +93,19 @@ class Worker:
                 await self.db.close()
             except Exception:
                 self.logger.exception("Error closing database")
+        await self.loop_monitor.stop()
+
+    async def run_job(self, name: str, job: Awaitable[Any], profile: bool = False) -> Any:
+        """Run one unit of work in a span, profiling it when asked to or when sampled."""
+        with job_span(name):
+            if not self.settings.PROFILING_ENABLED or not (profile or self.profiler.should_profile()):
+                return await job
+            with self.profiler.profile(name):
+                return await job
+
+    def dump_profiles(self, *_args):
+        """Write buffered profiles to PROFILING_DUMP_DIR (bound to SIGUSR1)."""
+        self.profiler.dump(self.settings.PROFILING_DUMP_DIR)
 
     def handle_signal(self, *_args):
         self.logger.info("Shutdown signal received")
@@ -63,12 +114,15 @@ class Worker:
 
 async def main():
     settings = Settings()
-    setup_logging(settings.LOG_LEVEL)
+    setup_logging(settings.LOG_LEVEL, settings)
+    setup_tracing(settings, service_name=f"{settings.APP_NAME}-worker")
     logger = get_logger(__name__)
 
     worker = Worker()
     signal.signal(signal.SIGTERM, lambda s, f: worker.handle_signal(s, f))
     signal.signal(signal.SIGINT, lambda s, f: worker.handle_signal(s, f))
+    if settings.PROFILING_ENABLED:
+        signal.signal(signal.SIGUSR1, lambda s, f: worker.dump_profiles(s, f))
 
     try:
         await worker.start()